@@ -6,28 +6,49 @@ import os
 import sys
 sys.path.append('.')
 sys.path.append('..')
-import json
 import shutil
+import functools
 os.environ['SPCONV_ALGO'] = 'native'
 from typing import *
-import torch
 import numpy as np
-import imageio
-from easydict import EasyDict as edict
 from PIL import Image
 
 
-import trellis
-from trellis.modules import sparse as sp
-from trellis.representations import Gaussian
-from trellis.utils import render_utils
-from trellis.models import ElasticSLatEncoder, ElasticSLatGaussianDecoder
+from trellis.utils.result_cache import ResultCache, cache_key, file_digest
+from trellis.pipelines.gaussian_vae import load_gaussian_vae, reconstruct_job, default_cache_params
+from trellis.utils.job_queue import create_job_queue, JobCancelled, JobFailed, QueueFull
+from serving.cache import ConversionCache
+from serving.registry import FileRegistry
 
 
 
 MAX_SEED = np.iinfo(np.int32).max
 TMP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp')
 os.makedirs(TMP_DIR, exist_ok=True)
+# Index of files registered by the viewer server (server.py); one connection for the app's lifetime.
+# Dropping a session's files also drops their converted files and sidecars in the server's cache
+VIEWER_CACHE = ConversionCache(os.path.join(TMP_DIR, 'viewer_cache'), max_bytes=None)
+VIEWER_REGISTRY = FileRegistry(os.path.join(TMP_DIR, 'viewer_registry.sqlite3'), on_drop=VIEWER_CACHE.drop_sources)
+# Turntable video settings, part of the result cache key
+VIDEO_NUM_FRAMES = 120
+VIDEO_FPS = 15
+# Reconstructions keyed by scene content, checkpoints and render parameters
+RESULT_CACHE = ResultCache(os.path.join(TMP_DIR, 'result_cache'), max_bytes=20 * 1024**3)
+CFG_FILE = "./pretrained_ckpts/slat_vae_128_mv/config.json"
+ENCODER_CKPT_FILE = "./pretrained_ckpts/slat_vae_128_mv/encoder_step0010000.pt"
+DECODER_CKPT_FILE = "./pretrained_ckpts/slat_vae_128_mv/decoder_step0010000.pt"
+# Job queue backend: 'local' (worker threads in this process) or 'process' (worker processes owning the models)
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'local')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '1'))
+JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', '16'))
+# On HF Spaces ZeroGPU, the GPU is only available inside `spaces.GPU` calls made from this process
+ZERO_GPU = os.environ.get('SPACES_ZERO_GPU', '').lower() in ('1', 't', 'true')
+# Seconds a closing session waits for its running jobs to stop before its files are removed
+SESSION_END_TIMEOUT = float(os.environ.get('SESSION_END_TIMEOUT', '600'))
+# Share of the progress bar reached when each reconstruction stage starts
+STAGE_PROGRESS = {'encode': 0.05, 'decode': 0.2, 'render': 0.35, 'encode_video': 0.8, 'save_ply': 0.9}
+# Created in __main__
+job_queue = None
 
     
 def start_session(req: gr.Request):
@@ -37,13 +58,31 @@ def start_session(req: gr.Request):
     
 def end_session(req: gr.Request):
     user_dir = os.path.join(TMP_DIR, str(req.session_hash))
+    # Stop queued and running reconstructions, and wait for them, before removing their output directory
+    if job_queue is not None:
+        session = str(req.session_hash)
+        job_queue.cancel_session(session)
+        if not job_queue.wait_session(session, timeout=SESSION_END_TIMEOUT):
+            print(f"Session {session}: jobs still running after {SESSION_END_TIMEOUT:.0f}s, keeping {user_dir}")
+            return
     shutil.rmtree(user_dir)
+    # Drop the viewer server's entries for this session's files
+    VIEWER_REGISTRY.drop_under(user_dir)
 
 
 @spaces.GPU(duration=120)
+def reconstruct_job_gpu(pipeline, payload, progress):
+    """
+    `reconstruct_job` under a ZeroGPU lease, called by the local queue workers (a plain call
+    outside HF Spaces). Each reconstruction holds the GPU only while it runs, not while queued.
+    """
+    return reconstruct_job(pipeline, payload, progress)
+
+
 def recon_scene_gaussian(
     scene_name: dict,
     req: gr.Request,
+    progress=gr.Progress(),
 ) -> Tuple[str, str, str]:
     """
     Convert an image to a 3D model and extract GLB file.
@@ -61,32 +100,53 @@ def recon_scene_gaussian(
     user_dir = os.path.join(TMP_DIR, str(req.session_hash))
 
     scene_feature_filepath = f"assets/example_spatialgen_image/{scene_name['scene_name']}.npz"
-    voxelized_feats = np.load(scene_feature_filepath)
-    print(f"Loading scene features from {scene_feature_filepath}. feats shape: {voxelized_feats['patchtokens'].shape}, indices shape: {voxelized_feats['indices'].shape}")
-    
-    feats = sp.SparseTensor(
-        feats=torch.from_numpy(voxelized_feats["patchtokens"]).float(),
-        coords=torch.cat(
-            [
-                torch.zeros(voxelized_feats["patchtokens"].shape[0], 1).int(),
-                torch.from_numpy(voxelized_feats["indices"]).int(),
-            ],
-            dim=1,
-        ),
-    ).cuda()
-    output_gaussians = pipeline.run(feats)
-
-    # Render video
-    video = render_utils.render_video(output_gaussians[0], num_frames=120)['color']
+    key = cache_key(
+        scene=file_digest(scene_feature_filepath),
+        checkpoints=[file_digest(f) for f in (CFG_FILE, ENCODER_CKPT_FILE, DECODER_CKPT_FILE)],
+        num_frames=VIDEO_NUM_FRAMES,
+        fps=VIDEO_FPS,
+        # Workers build the pipeline with the default tiling (SLAT_TILE_SIZE / SLAT_TILE_HALO)
+        pipeline=default_cache_params(),
+    )
     video_path = os.path.join(user_dir, 'sample.mp4')
-    imageio.mimsave(video_path, video, fps=15)
-    
-    # Save Gaussians as PLY files
-    gs = output_gaussians[0]
     ply_path = os.path.join(user_dir, 'sample.ply')
-    gs.save_ply(ply_path)
-    
-    torch.cuda.empty_cache()
+    # Linked under the cache lock: a concurrent put cannot evict the entry in between
+    if RESULT_CACHE.checkout(key, {'video': video_path, 'ply': ply_path}) is not None:
+        print(f"Result cache hit for {scene_feature_filepath} ({key[:12]})")
+        return video_path, {"gs_ply_path": ply_path}, ply_path
+
+    try:
+        job = job_queue.submit(
+            {
+                'scene_feature_filepath': scene_feature_filepath,
+                'output_dir': user_dir,
+                'num_frames': VIDEO_NUM_FRAMES,
+                'fps': VIDEO_FPS,
+            },
+            session=str(req.session_hash),
+        )
+    except QueueFull:
+        raise gr.Error("The server is busy, please try again in a minute.")
+
+    for event in job.events():
+        if event['type'] == 'queued':
+            progress(0.0, desc=f"Queued (position {event['position']})")
+        elif event['type'] == 'progress':
+            progress(STAGE_PROGRESS.get(event['stage'], 0.0), desc=event['stage'].replace('_', ' ').capitalize())
+    try:
+        result = job.wait()
+    except JobCancelled:
+        raise gr.Error("Reconstruction was cancelled.")
+    except JobFailed as e:
+        raise gr.Error(f"Reconstruction failed: {e}")
+    print(f"Reconstructed {scene_name['scene_name']}: {result['num_gaussians']} Gaussians, timings {result['timings']}")
+    video_path, ply_path = result['video_path'], result['ply_path']
+
+    RESULT_CACHE.put(
+        key,
+        {'video': video_path, 'ply': ply_path},
+        meta={'scene': scene_name['scene_name'], 'num_gaussians': result['num_gaussians'], 'timings': result['timings']},
+    )
     return video_path, {"gs_ply_path": ply_path}, ply_path  # video, ply_path (for viewer), ply_path (for download)
 
 
@@ -315,45 +375,26 @@ with demo:
     )
     
 
-class GaussianVAE(torch.nn.Module):
-    def __init__(self, cfg_file: str, encoder_ckpt_file: str, decoder_ckpt_file: str):
-        super().__init__()
-        train_cfg = edict(json.load(open(cfg_file, "r")))
-        encoder: ElasticSLatEncoder = getattr(trellis.models, train_cfg.models.encoder.name)(**train_cfg.models.encoder.args).cuda()
-        encoder.load_state_dict(torch.load(encoder_ckpt_file), strict=False)
-        encoder.eval()
-        print(f"Loaded {train_cfg.models.encoder.name} from {encoder_ckpt_file}")
-
-        decoder: ElasticSLatGaussianDecoder = getattr(trellis.models, train_cfg.models.decoder.name)(**train_cfg.models.decoder.args).cuda()
-        decoder.load_state_dict(torch.load(decoder_ckpt_file), strict=False)
-        decoder.eval()
-        print(f"Loaded {train_cfg.models.decoder.name} from {decoder_ckpt_file}")
-        self.encoder = encoder
-        self.decoder = decoder
-
-    def forward(self, feats: sp.SparseTensor) -> Tuple[sp.SparseTensor, List[Gaussian]]:
-        structure_latent, _, _ = self.encoder(feats, sample_posterior=True, return_raw=True)
-        print(f"Encoded latent code: {structure_latent.shape}")
-        assert torch.isfinite(structure_latent.feats).all(), "Non-finite latent"
-
-        decoded_gaussians: List[Gaussian] = self.decoder(structure_latent)[0]
-        print(f"Decoded gaussians: {decoded_gaussians[0].get_xyz.shape}")
-    
-        return structure_latent, decoded_gaussians
-    
-    def run(self, feats: sp.SparseTensor) -> List[Gaussian]:
-        _, decoded_gaussians = self.forward(feats)
-        return decoded_gaussians
-    
-    
 # Launch the Gradio app
 if __name__ == "__main__":
 
-    pipeline = GaussianVAE(
-        cfg_file="./pretrained_ckpts/slat_vae_128_mv/config.json",
-        encoder_ckpt_file="./pretrained_ckpts/slat_vae_128_mv/encoder_step0010000.pt",
-        decoder_ckpt_file="./pretrained_ckpts/slat_vae_128_mv/decoder_step0010000.pt",
+    # Workers own the models; the Gradio handlers only submit jobs and relay progress
+    job_backend = JOB_BACKEND
+    if ZERO_GPU and job_backend != 'local':
+        # Worker processes cannot take ZeroGPU leases: run the jobs on threads of this process
+        print(f"ZeroGPU: JOB_BACKEND={job_backend} is not supported, using the local backend")
+        job_backend = 'local'
+    job_queue = create_job_queue(
+        job_backend,
+        functools.partial(
+            load_gaussian_vae,
+            cfg_file=CFG_FILE,
+            encoder_ckpt_file=ENCODER_CKPT_FILE,
+            decoder_ckpt_file=DECODER_CKPT_FILE,
+        ),
+        reconstruct_job_gpu if job_backend == 'local' else reconstruct_job,
+        num_workers=JOB_WORKERS,
+        max_pending=JOB_MAX_PENDING,
     )
-    pipeline.cuda()
-    
+
     demo.launch(share=True)
\ No newline at end of file
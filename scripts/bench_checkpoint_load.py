@@ -0,0 +1,76 @@
+"""
+Checkpoint load time and peak RSS: `torch.load` + `load_state_dict` versus the meta-init,
+memory-mapped safetensors path (`trellis.utils.checkpoint_utils.load_model`).
+
+Each method runs in a fresh interpreter so peak RSS is not shared between them.
+
+Usage:
+    python scripts/bench_checkpoint_load.py --part encoder
+    python scripts/bench_checkpoint_load.py --part decoder --device cpu
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+CKPT_DIR = './pretrained_ckpts/slat_vae_128_mv'
+
+
+def run(method, cfg_file, part, ckpt_file, device):
+    import time
+    import resource
+    import torch
+    from easydict import EasyDict as edict
+    from trellis import models
+    from trellis.utils.checkpoint_utils import load_model
+
+    model_cfg = edict(json.load(open(cfg_file, 'r'))).models[part]
+    build = lambda: getattr(models, model_cfg.name)(**model_cfg.args)
+    t0 = time.perf_counter()
+    if method == 'torch_load':
+        model = build().to(device)
+        model.load_state_dict(torch.load(ckpt_file), strict=False)
+    else:
+        model, _ = load_model(build, ckpt_file, device=device)
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    return {
+        'seconds': time.perf_counter() - t0,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'params_m': sum(p.numel() for p in model.parameters()) / 1e6,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ckpt-dir', default=CKPT_DIR)
+    parser.add_argument('--part', choices=['encoder', 'decoder'], default='encoder')
+    parser.add_argument('--device', default='cuda')
+    parser.add_argument('--method', choices=['torch_load', 'mmap'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    cfg_file = os.path.join(args.ckpt_dir, 'config.json')
+    ckpt_file = os.path.join(args.ckpt_dir, f'{args.part}_step0010000.pt')
+    if args.method:
+        print(json.dumps(run(args.method, cfg_file, args.part, ckpt_file, args.device)))
+        sys.exit(0)
+
+    # Convert up front so the one-time conversion is not timed
+    from trellis.utils.checkpoint_utils import ensure_safetensors
+    ensure_safetensors(ckpt_file)
+
+    print(f"{'method':>12} {'seconds':>9} {'peak RSS MB':>12} {'params M':>9}")
+    for method in ['torch_load', 'mmap']:
+        proc = subprocess.run(
+            [sys.executable, __file__, '--ckpt-dir', args.ckpt_dir, '--part', args.part, '--device', args.device, '--method', method],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{method:>12} failed:\n{proc.stderr[-2000:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{method:>12} {r['seconds']:>9.2f} {r['peak_rss_mb']:>12.0f} {r['params_m']:>9.1f}")
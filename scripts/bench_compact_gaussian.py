@@ -0,0 +1,76 @@
+"""
+Memory and quality of `CompactGaussian` (`Gaussian.to_compact`) against the float32 `Gaussian`.
+
+For each Gaussian PLY, reports bytes per splat and the compression ratio for the fp16 and
+palette variants, the largest error of each decoded attribute, and, when CUDA is available,
+the PSNR of turntable renders of the compact scene against renders of the original.
+
+Usage:
+    python scripts/bench_compact_gaussian.py --ply tmp/*/sample.ply
+    python scripts/bench_compact_gaussian.py --ply scene.ply --views 30 --resolution 512
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from trellis.representations import Gaussian
+
+
+def float32_nbytes(gaussian):
+    tensors = [gaussian._xyz, gaussian._features_dc, gaussian._features_rest, gaussian._opacity, gaussian._scaling, gaussian._rotation]
+    return sum(t.numel() * t.element_size() for t in tensors if t is not None)
+
+
+def attribute_errors(gaussian, compact):
+    rot_ref, rot = gaussian.get_rotation, compact.get_rotation
+    return {
+        'xyz': (compact.get_xyz - gaussian.get_xyz).abs().max().item(),
+        'dc': (compact.get_features_dc - gaussian._features_dc).abs().max().item(),
+        'opacity': (compact.get_opacity - gaussian.get_opacity).abs().max().item(),
+        'scale_rel': ((compact.get_scaling - gaussian.get_scaling).abs() / gaussian.get_scaling.clamp(min=1e-12)).max().item(),
+        # q and -q are the same rotation
+        'rot_deg': torch.rad2deg(2 * torch.acos((rot_ref * rot).sum(-1).abs().clamp(max=1))).max().item(),
+    }
+
+
+def render_psnr(gaussian, compact, views, resolution):
+    from trellis.utils import render_utils
+    extrinsics, intrinsics = render_utils.turntable_cameras(num_frames=views)
+    options = {'resolution': resolution, 'bg_color': (0, 0, 0)}
+    frames = zip(
+        render_utils.iter_frames(gaussian, extrinsics, intrinsics, options, verbose=False, opt=True, keys=['color']),
+        render_utils.iter_frames(compact, extrinsics, intrinsics, options, verbose=False, opt=True, keys=['color']),
+    )
+    psnrs = []
+    for ref, out in frames:
+        mse = (ref['color'] - out['color']).square().mean().item()
+        psnrs.append(10 * torch.log10(torch.tensor(1 / max(mse, 1e-10))).item())
+    return sum(psnrs) / len(psnrs), min(psnrs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ply', nargs='+', required=True, help='Gaussian PLY files')
+    parser.add_argument('--views', type=int, default=30, help='turntable views for PSNR (CUDA only)')
+    parser.add_argument('--resolution', type=int, default=512)
+    args = parser.parse_args()
+
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    print(f"{'scene':>24} {'variant':>8} {'B/splat':>8} {'ratio':>6} {'xyz':>9} {'dc':>9} {'opac':>9} {'scale%':>7} {'rot°':>6} {'PSNR':>7} {'min':>7}")
+    for path in args.ply:
+        gaussian = Gaussian(aabb=[-0.5, -0.5, -0.5, 1, 1, 1], device=device)
+        gaussian.load_ply(path)
+        n = gaussian._xyz.shape[0]
+        name = os.path.basename(os.path.dirname(os.path.abspath(path))) + '/' + os.path.basename(path)
+        print(f"{name[-24:]:>24} {'float32':>8} {float32_nbytes(gaussian) / n:>8.1f} {1:>6.2f}")
+        for variant, palette in [('fp16', False), ('palette', True)]:
+            compact = gaussian.to_compact(palette=palette)
+            err = attribute_errors(gaussian, compact)
+            psnr = render_psnr(gaussian, compact, args.views, args.resolution) if device == 'cuda' else (float('nan'),) * 2
+            print(f"{'':>24} {variant:>8} {compact.nbytes / n:>8.1f} {float32_nbytes(gaussian) / compact.nbytes:>6.2f} "
+                  f"{err['xyz']:>9.2e} {err['dc']:>9.2e} {err['opacity']:>9.2e} {err['scale_rel'] * 100:>7.2f} {err['rot_deg']:>6.2f} "
+                  f"{psnr[0]:>7.2f} {psnr[1]:>7.2f}")
@@ -0,0 +1,68 @@
+"""
+PSNR versus splat count for `trellis.utils.gaussian_simplify.simplify`.
+
+For each Gaussian PLY and each keep ratio, simplifies the scene, times it, and compares
+turntable renders of the result against renders of the original (CUDA only; on CPU only
+counts and timings are reported). `--out` also writes the curve as JSON lines.
+
+Usage:
+    python scripts/bench_gaussian_simplify.py --ply tmp/*/sample.ply
+    python scripts/bench_gaussian_simplify.py --ply scene.ply --ratios 0.5 0.33 0.2 --out curve.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from trellis.representations import Gaussian
+from trellis.utils.gaussian_simplify import simplify
+
+
+def render_views(gaussian, views, resolution):
+    from trellis.utils import render_utils
+    extrinsics, intrinsics = render_utils.turntable_cameras(num_frames=views)
+    options = {'resolution': resolution, 'bg_color': (0, 0, 0)}
+    return [f['color'] for f in render_utils.iter_frames(gaussian, extrinsics, intrinsics, options, verbose=False, opt=True, keys=['color'])]
+
+
+def psnr(refs, outs):
+    values = [10 * torch.log10(1 / (ref - out).square().mean().clamp(min=1e-10)).item() for ref, out in zip(refs, outs)]
+    return sum(values) / len(values)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ply', nargs='+', required=True, help='Gaussian PLY files')
+    parser.add_argument('--ratios', type=float, nargs='+', default=[1.0, 0.5, 0.33, 0.25, 0.2], help='fraction of splats to keep')
+    parser.add_argument('--views', type=int, default=30, help='turntable views for PSNR (CUDA only)')
+    parser.add_argument('--resolution', type=int, default=512)
+    parser.add_argument('--out', help='append the curve as JSON lines to this file')
+    args = parser.parse_args()
+
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    print(f"{'scene':>24} {'keep':>6} {'splats':>10} {'seconds':>8} {'PSNR':>7}")
+    for path in args.ply:
+        gaussian = Gaussian(aabb=[-0.5, -0.5, -0.5, 1, 1, 1], device=device)
+        gaussian.load_ply(path)
+        num = gaussian._xyz.shape[0]
+        name = os.path.basename(os.path.dirname(os.path.abspath(path))) + '/' + os.path.basename(path)
+        refs = render_views(gaussian, args.views, args.resolution) if device == 'cuda' else None
+        for ratio in args.ratios:
+            if device == 'cuda':
+                torch.cuda.synchronize()
+            t0 = time.perf_counter()
+            simplified = simplify(gaussian, target_count=int(num * ratio), verbose=False)
+            if device == 'cuda':
+                torch.cuda.synchronize()
+            seconds = time.perf_counter() - t0
+            value = psnr(refs, render_views(simplified, args.views, args.resolution)) if refs is not None else float('nan')
+            count = simplified._xyz.shape[0]
+            print(f"{name[-24:]:>24} {ratio:>6.2f} {count:>10} {seconds:>8.2f} {value:>7.2f}")
+            if args.out:
+                with open(args.out, 'a') as f:
+                    f.write(json.dumps({'ply': path, 'keep': ratio, 'splats': count, 'input_splats': num, 'seconds': seconds, 'psnr': value}) + '\n')
@@ -0,0 +1,80 @@
+"""
+Throughput of batched GaussianVAE inference versus batch size.
+
+Loads the example scenes, replicates them to `--num-scenes`, and reconstructs them with
+`GaussianVAE.run_batch` for each batch size, reporting scenes/s, latency per batch and peak
+GPU memory. Requires CUDA and the pretrained checkpoints.
+
+Usage:
+    python scripts/bench_gaussian_vae_batch.py --batch-sizes 1 2 4 8 --num-scenes 16
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['SPCONV_ALGO'] = 'native'
+
+import torch
+
+from trellis.pipelines.gaussian_vae import GaussianVAE, load_scene_features
+
+
+CKPT_DIR = './pretrained_ckpts/slat_vae_128_mv'
+
+
+def bench(pipeline, scenes, batch_size, repeats):
+    batches = [scenes[i:i + batch_size] for i in range(0, len(scenes), batch_size)]
+    torch.cuda.synchronize()
+    torch.cuda.reset_peak_memory_stats()
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        with torch.no_grad():
+            for batch in batches:
+                gaussians = pipeline.run_batch(batch)
+                assert len(gaussians) == len(batch)
+        torch.cuda.synchronize()
+        times.append(time.perf_counter() - t0)
+    best = min(times)
+    return {
+        'scenes_per_s': len(scenes) / best,
+        'batch_ms': best / len(batches) * 1000,
+        'peak_mem_gb': torch.cuda.max_memory_allocated() / 1024**3,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenes', default='assets/example_spatialgen_image/*.npz', help='glob of scene feature files')
+    parser.add_argument('--num-scenes', type=int, default=16, help='scenes per measurement (examples are repeated)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--ckpt-dir', default=CKPT_DIR)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.scenes))
+    assert files, f"No scene features match {args.scenes}"
+    scenes = [load_scene_features(f).cuda() for f in files]
+    scenes = [scenes[i % len(scenes)] for i in range(args.num_scenes)]
+
+    pipeline = GaussianVAE(
+        cfg_file=os.path.join(args.ckpt_dir, 'config.json'),
+        encoder_ckpt_file=os.path.join(args.ckpt_dir, 'encoder_step0010000.pt'),
+        decoder_ckpt_file=os.path.join(args.ckpt_dir, 'decoder_step0010000.pt'),
+    ).cuda()
+
+    # Warm up kernels and the allocator on the largest batch
+    with torch.no_grad():
+        pipeline.run_batch(scenes[:max(args.batch_sizes)])
+
+    voxels = sum(s.feats.shape[0] for s in scenes)
+    print(f"{len(scenes)} scenes, {voxels} voxels")
+    print(f"{'batch':>6} {'scenes/s':>10} {'ms/batch':>10} {'peak GB':>9} {'speedup':>8}")
+    baseline = None
+    for batch_size in args.batch_sizes:
+        r = bench(pipeline, scenes, batch_size, args.repeats)
+        baseline = baseline or r['scenes_per_s']
+        print(f"{batch_size:>6} {r['scenes_per_s']:>10.2f} {r['batch_ms']:>10.1f} {r['peak_mem_gb']:>9.2f} {r['scenes_per_s'] / baseline:>7.2f}x")
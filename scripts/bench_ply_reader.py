@@ -0,0 +1,79 @@
+"""
+Gaussian PLY reader benchmark: memory-mapped `read_columns` versus the plyfile path it
+replaced (`PlyData.read` followed by one `np.asarray` per property).
+
+Writes random splats with the full Gaussian property layout (SH degree 3 by default),
+reads them back both ways, checks the arrays are identical, and reports seconds and MB/s.
+
+Usage:
+    python scripts/bench_ply_reader.py
+    python scripts/bench_ply_reader.py --sizes 1000000 5000000 --sh-degree 0
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# trellis.utils.ply_utils only needs numpy, so the benchmark runs without torch / CUDA
+from trellis.utils import ply_utils
+
+
+def gaussian_names(sh_degree):
+    names = ['x', 'y', 'z', 'nx', 'ny', 'nz', 'f_dc_0', 'f_dc_1', 'f_dc_2']
+    names += [f'f_rest_{i}' for i in range(3 * (sh_degree + 1) ** 2 - 3)]
+    names += ['opacity', 'scale_0', 'scale_1', 'scale_2', 'rot_0', 'rot_1', 'rot_2', 'rot_3']
+    return names
+
+
+def wanted_fields(names):
+    return ['x', 'y', 'z', 'f_dc_0', 'f_dc_1', 'f_dc_2'] + ply_utils.indexed_fields(names, 'f_rest_') + ['opacity'] \
+        + ply_utils.indexed_fields(names, 'scale_') + ply_utils.indexed_fields(names, 'rot_')
+
+
+def read_mmap(path):
+    vertices = ply_utils.memmap_ply_vertices(path)
+    return ply_utils.read_columns(vertices, wanted_fields(vertices.dtype.names))
+
+
+def read_plyfile(path):
+    from plyfile import PlyData
+    vertex = PlyData.read(path).elements[0]
+    fields = wanted_fields([p.name for p in vertex.properties])
+    data = np.zeros((vertex.count, len(fields)), dtype=np.float32)
+    for i, name in enumerate(fields):
+        data[:, i] = np.asarray(vertex[name])
+    return data
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 5_000_000])
+    parser.add_argument('--sh-degree', type=int, default=3)
+    args = parser.parse_args()
+
+    names = gaussian_names(args.sh_degree)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'splats':>10} {'MB':>8} {'reader':>8} {'seconds':>9} {'MB/s':>9} {'speedup':>8}")
+        for n in args.sizes:
+            path = os.path.join(tmp, 'splats.ply')
+            ply_utils.write_ply(path, rng.standard_normal((n, len(names)), dtype=np.float32), names)
+            mb = os.path.getsize(path) / 1024**2
+            fast, fast_s = timed(read_mmap, path)
+            ref, ref_s = timed(read_plyfile, path)
+            assert np.array_equal(fast, ref), 'read_columns output differs from plyfile'
+            print(f"{n:>10} {mb:>8.1f} {'mmap':>8} {fast_s:>9.3f} {mb / fast_s:>9.0f} {'':>8}")
+            print(f"{n:>10} {mb:>8.1f} {'plyfile':>8} {ref_s:>9.3f} {mb / ref_s:>9.0f} {ref_s / fast_s:>7.1f}x")
+            del fast, ref
+            os.remove(path)
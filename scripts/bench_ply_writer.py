@@ -0,0 +1,57 @@
+"""
+Gaussian PLY writer benchmark: vectorized `write_ply` versus the plyfile path it replaced
+(structured array filled with `list(map(tuple, ...))`).
+
+Writes random 17-attribute splats at each size, checks the two outputs are byte-identical,
+and reports seconds and MB/s. The plyfile path is slow (tens of seconds at 5M), so it only
+runs up to --plyfile-max splats.
+
+Usage:
+    python scripts/bench_ply_writer.py
+    python scripts/bench_ply_writer.py --sizes 1000000 5000000 --plyfile-max 5000000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# trellis.utils.ply_utils only needs numpy, so the benchmark runs without torch / CUDA
+from trellis.utils import ply_utils
+
+NAMES = ['x', 'y', 'z', 'nx', 'ny', 'nz', 'f_dc_0', 'f_dc_1', 'f_dc_2', 'opacity',
+         'scale_0', 'scale_1', 'scale_2', 'rot_0', 'rot_1', 'rot_2', 'rot_3']
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 5_000_000])
+    parser.add_argument('--plyfile-max', type=int, default=1_000_000, help='largest size to run the plyfile path on')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'splats':>10} {'MB':>8} {'writer':>8} {'seconds':>9} {'MB/s':>9} {'speedup':>8}")
+        for n in args.sizes:
+            attributes = rng.standard_normal((n, len(NAMES)), dtype=np.float32)
+            fast_path = os.path.join(tmp, 'fast.ply')
+            fast = timed(ply_utils.write_ply, fast_path, attributes, NAMES)
+            mb = os.path.getsize(fast_path) / 1024**2
+            print(f"{n:>10} {mb:>8.1f} {'numpy':>8} {fast:>9.3f} {mb / fast:>9.0f} {'':>8}")
+            if n <= args.plyfile_max:
+                ref_path = os.path.join(tmp, 'ref.ply')
+                ref = timed(ply_utils.write_ply_plyfile, ref_path, attributes, NAMES)
+                with open(fast_path, 'rb') as a, open(ref_path, 'rb') as b:
+                    assert a.read() == b.read(), 'write_ply output differs from plyfile'
+                print(f"{n:>10} {mb:>8.1f} {'plyfile':>8} {ref:>9.3f} {mb / ref:>9.0f} {ref / fast:>7.0f}x")
+                os.remove(ref_path)
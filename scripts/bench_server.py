@@ -0,0 +1,155 @@
+"""
+Load generator for the viewer server.
+
+Runs N parallel clients that repeatedly download a served file and reports throughput and
+p50/p99 latency. Either points at a running server (--url) or starts a local one with a
+synthetic file, so the single-threaded and pooled modes can be compared directly.
+
+Usage:
+    python scripts/bench_server.py --clients 8 --requests 64
+    python scripts/bench_server.py --clients 8 --mode single --no-sendfile
+    python scripts/bench_server.py --url http://127.0.0.1:9001/serve/<file_id> --clients 16
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    k = (len(values) - 1) * q / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def fetch(url, headers=None):
+    parsed = urllib.parse.urlparse(url)
+    path = parsed.path + (f'?{parsed.query}' if parsed.query else '')
+    t0 = time.perf_counter()
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=300)
+    try:
+        conn.request('GET', path, headers=headers or {})
+        resp = conn.getresponse()
+        nbytes = 0
+        while True:
+            chunk = resp.read(1024 * 1024)
+            if not chunk:
+                break
+            nbytes += len(chunk)
+        status = resp.status
+    finally:
+        conn.close()
+    return status, nbytes, time.perf_counter() - t0
+
+
+def run_load(url, clients, requests, headers=None):
+    latencies, statuses = [], {}
+    total_bytes = 0
+    lock = threading.Lock()
+
+    def worker(_):
+        nonlocal total_bytes
+        try:
+            status, nbytes, latency = fetch(url, headers)
+        except OSError as e:
+            status, nbytes, latency = type(e).__name__, 0, None
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            total_bytes += nbytes
+            if latency is not None and status in (200, 206, 304):
+                latencies.append(latency)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(worker, range(requests)))
+    elapsed = time.perf_counter() - t0
+    return {
+        'elapsed': elapsed,
+        'requests': requests,
+        'statuses': statuses,
+        'bytes': total_bytes,
+        'req_per_s': requests / elapsed,
+        'mb_per_s': total_bytes / elapsed / 1024 / 1024,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def start_local_server(mode, file_size_mb, max_workers, max_connections, use_sendfile):
+    from http.server import HTTPServer
+    from server import COOPCORPHandler, PooledHTTPServer
+    from serving.cache import ConversionCache
+    from serving.registry import FileRegistry
+
+    tmp = tempfile.NamedTemporaryFile(suffix='.ply', delete=False)
+    chunk = os.urandom(1024 * 1024)
+    for _ in range(file_size_mb):
+        tmp.write(chunk)
+    tmp.close()
+
+    COOPCORPHandler.use_sendfile = use_sendfile
+    COOPCORPHandler.configure(registry=FileRegistry(':memory:'), conversion_cache=ConversionCache(tempfile.mkdtemp()))
+    COOPCORPHandler.log_message = lambda *args, **kwargs: None
+    if mode == 'single':
+        server = HTTPServer(('127.0.0.1', 0), COOPCORPHandler)
+    else:
+        server = PooledHTTPServer(('127.0.0.1', 0), COOPCORPHandler, max_workers=max_workers, max_connections=max_connections)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    path = COOPCORPHandler.register_file(COOPCORPHandler, tmp.name)
+    return server, tmp.name, f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', type=str, default=None, help='URL to load; starts a local server if omitted')
+    parser.add_argument('--clients', type=int, default=8, help='Number of parallel clients')
+    parser.add_argument('--requests', type=int, default=64, help='Total number of requests')
+    parser.add_argument('--range', type=str, default=None, help='Optional Range header, e.g. bytes=0-1048575')
+    parser.add_argument('--mode', choices=['pool', 'single'], default='pool', help='Local server mode')
+    parser.add_argument('--file-size-mb', type=int, default=32, help='Size of the synthetic file (local server)')
+    parser.add_argument('--max-workers', type=int, default=32)
+    parser.add_argument('--max-connections', type=int, default=128)
+    parser.add_argument('--no-sendfile', action='store_true')
+    args = parser.parse_args()
+
+    server, tmp_path, url = None, None, args.url
+    if url is None:
+        server, tmp_path, url = start_local_server(
+            args.mode, args.file_size_mb, args.max_workers, args.max_connections, not args.no_sendfile,
+        )
+        print(f"Local server: mode={args.mode}, sendfile={not args.no_sendfile}, file={args.file_size_mb} MB")
+
+    # Silence the server's per-request prints while measuring
+    stdout = sys.stdout
+    try:
+        if server is not None:
+            sys.stdout = open(os.devnull, 'w')
+        stats = run_load(url, args.clients, args.requests, {'Range': args.range} if args.range else None)
+    finally:
+        if sys.stdout is not stdout:
+            sys.stdout.close()
+            sys.stdout = stdout
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            os.remove(tmp_path)
+
+    print(f"URL:         {url}")
+    print(f"Clients:     {args.clients}")
+    print(f"Requests:    {stats['requests']} in {stats['elapsed']:.2f} s  (statuses: {stats['statuses']})")
+    print(f"Throughput:  {stats['req_per_s']:.1f} req/s, {stats['mb_per_s']:.1f} MB/s")
+    print(f"Latency:     p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
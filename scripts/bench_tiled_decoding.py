@@ -0,0 +1,153 @@
+"""
+Peak memory and latency of tiled encoding and decoding versus tile size and halo.
+
+Loads a scene (optionally replicated side by side into a larger room) or builds a synthetic
+room, then runs the encoder and the Gaussian decoder over the whole scene and with each
+`--tile-sizes` and `--halos` value (see `SparseTransformerBase.forward_tiled`). Reports the
+peak GPU memory, the time, and the largest deviation of the network outputs from the untiled
+pass. Requires CUDA and the pretrained checkpoints.
+
+`--geometry-only` needs neither: it reports, from the voxel coordinates alone, the number of
+tiles, the largest tile with its halo (what peak activation memory scales with) and the
+voxels processed relative to one pass (the compute overhead).
+
+Usage:
+    python scripts/bench_tiled_decoding.py --scene assets/example_spatialgen_image/scene.npz --replicate 4
+    python scripts/bench_tiled_decoding.py --scene scene.npz --tile-sizes 32 64 128 --halos 8 16
+    python scripts/bench_tiled_decoding.py --geometry-only --room 256 --halos 8 16 32
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['SPCONV_ALGO'] = 'native'
+
+import torch
+
+from trellis.models.structured_latent_vae.base import spatial_tiles
+
+
+CKPT_DIR = './pretrained_ckpts/slat_vae_128_mv'
+
+
+def room_coords(resolution, num_boxes=12, seed=0):
+    """Surface voxels (1, x, y, z) of a box-shaped room filling the grid, plus furniture boxes."""
+    generator = torch.Generator().manual_seed(seed)
+    boxes = [(0, resolution)] + [None] * num_boxes
+    coords = []
+    for i, box in enumerate(boxes):
+        if box is None:
+            size = torch.randint(resolution // 16, resolution // 4, (3,), generator=generator)
+            lo = torch.randint(1, resolution - 1, (3,), generator=generator).minimum(resolution - 1 - size)
+            hi = lo + size
+        else:
+            lo, hi = torch.full((3,), box[0]), torch.full((3,), box[1])
+        grid = torch.stack(torch.meshgrid(*[torch.arange(int(a), int(b)) for a, b in zip(lo, hi)], indexing='ij'), dim=-1).reshape(-1, 3)
+        surface = ((grid == lo) | (grid == hi - 1)).any(dim=-1)
+        coords.append(grid[surface])
+    coords = torch.unique(torch.cat(coords), dim=0)
+    return torch.cat([torch.zeros(coords.shape[0], 1, dtype=coords.dtype), coords], dim=1).int()
+
+
+def tile_geometry(coords, tile_size, halo):
+    num_tiles, largest, processed = 0, 0, 0
+    for indices, _ in spatial_tiles(coords, tile_size, halo):
+        num_tiles += 1
+        largest = max(largest, indices.shape[0])
+        processed += indices.shape[0]
+    return num_tiles, largest, processed
+
+
+def replicate(scene, copies):
+    """Place `copies` of a single-scene tensor side by side along x."""
+    from trellis.modules import sparse as sp
+    if copies == 1:
+        return scene
+    extent = int(scene.coords[:, 1].max()) + 1
+    assert extent * copies <= 1024, f"{copies} copies of a scene {extent} voxels wide exceed the 1024 grid"
+    coords = torch.cat([scene.coords + torch.tensor([0, i * extent, 0, 0], dtype=scene.coords.dtype, device=scene.device) for i in range(copies)])
+    return sp.SparseTensor(feats=scene.feats.repeat(copies, 1), coords=coords)
+
+
+def measure(fn):
+    torch.cuda.synchronize()
+    base = torch.cuda.memory_allocated()
+    torch.cuda.reset_peak_memory_stats()
+    t0 = time.perf_counter()
+    out = fn()
+    torch.cuda.synchronize()
+    return out, time.perf_counter() - t0, (torch.cuda.max_memory_allocated() - base) / 1024**3
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scene', default='assets/example_spatialgen_image/*.npz', help='scene feature file (first match of a glob)')
+    parser.add_argument('--room', type=int, default=None, help='use a synthetic room of this resolution instead of --scene')
+    parser.add_argument('--replicate', type=int, default=1, help='copies of the scene placed side by side')
+    parser.add_argument('--tile-sizes', type=int, nargs='+', default=[16, 32, 64, 128])
+    parser.add_argument('--halos', type=int, nargs='+', default=None, help='context per tile in voxels (default: the exact halo only)')
+    parser.add_argument('--geometry-only', action='store_true', help='only report tile counts and sizes (no model, no GPU)')
+    parser.add_argument('--num-blocks', type=int, default=12, help='for --geometry-only: blocks of the model')
+    parser.add_argument('--window-size', type=int, default=8, help='for --geometry-only: swin window of the model')
+    parser.add_argument('--ckpt-dir', default=CKPT_DIR)
+    parser.add_argument('--encoder-ckpt', default='encoder_step0010000.pt')
+    parser.add_argument('--decoder-ckpt', default='decoder_step0010000.pt')
+    args = parser.parse_args()
+
+    if args.geometry_only:
+        if args.room is not None:
+            coords = room_coords(args.room)
+        else:
+            from trellis.pipelines.gaussian_vae import load_scene_features
+            coords = load_scene_features(sorted(glob.glob(args.scene))[0]).coords
+        exact = args.num_blocks * (args.window_size - 1)
+        num = coords.shape[0]
+        extent = int((coords[:, 1:].max(dim=0).values - coords[:, 1:].min(dim=0).values).max()) + 1
+        print(f"{num} voxels, {extent} voxels wide; exact halo {exact} ({args.num_blocks} blocks, window {args.window_size})")
+        print(f"{'halo':>6} {'tile':>6} {'tiles':>6} {'largest':>9} {'peak %':>7} {'compute x':>9}")
+        for halo in args.halos or [exact]:
+            for tile_size in args.tile_sizes:
+                if tile_size + 2 * halo >= extent:
+                    print(f"{halo:>6} {tile_size:>6} {'spans the scene: one pass':>34}")
+                    continue
+                num_tiles, largest, processed = tile_geometry(coords, tile_size, halo)
+                print(f"{halo:>6} {tile_size:>6} {num_tiles:>6} {largest:>9} {largest / num * 100:>7.1f} {processed / num:>9.2f}")
+        sys.exit(0)
+
+    from trellis.pipelines.gaussian_vae import GaussianVAE, load_scene_features
+
+    files = sorted(glob.glob(args.scene))
+    assert files, f"No scene features match {args.scene}"
+    pipeline = GaussianVAE(
+        cfg_file=os.path.join(args.ckpt_dir, 'config.json'),
+        encoder_ckpt_file=os.path.join(args.ckpt_dir, args.encoder_ckpt),
+        decoder_ckpt_file=os.path.join(args.ckpt_dir, args.decoder_ckpt),
+    ).cuda()
+    encoder, decoder = pipeline.encoder, pipeline.decoder
+    feats = replicate(load_scene_features(files[0]).cuda(), args.replicate)
+    print(f"{feats.feats.shape[0]} voxels; exact halo: encoder {encoder.tile_halo()}, decoder {decoder.tile_halo()} voxels")
+
+    def run(model, x, tile_size, halo):
+        # network outputs per voxel (the encoder's mean and log-variance, the decoder's Gaussian parameters)
+        if tile_size is None:
+            return model._forward_feats(x).feats
+        return model.forward_tiled(model._forward_feats, x, tile_size, halo).feats
+
+    with torch.no_grad():
+        enc_ref, _, _ = measure(lambda: run(encoder, feats, None, None))
+        latent = feats.replace(enc_ref.chunk(2, dim=-1)[0])
+        dec_ref = run(decoder, latent, None, None)
+        print(f"{'halo':>6} {'tile':>6} {'enc GB':>7} {'enc s':>7} {'enc err':>9} {'dec GB':>7} {'dec s':>7} {'dec err':>9}")
+        runs = [(None, None)] + [(halo, tile_size) for halo in (args.halos or [None]) for tile_size in args.tile_sizes]
+        for halo, tile_size in runs:
+            z, enc_s, enc_gb = measure(lambda: run(encoder, feats, tile_size, halo))
+            h, dec_s, dec_gb = measure(lambda: run(decoder, latent, tile_size, halo))
+            enc_err = (z - enc_ref).abs().max().item()
+            dec_err = (h - dec_ref).abs().max().item()
+            name = 'full' if tile_size is None else str(tile_size)
+            halo_name = '-' if tile_size is None else ('exact' if halo is None else str(halo))
+            print(f"{halo_name:>6} {name:>6} {enc_gb:>7.2f} {enc_s:>7.2f} {enc_err:>9.2e} {dec_gb:>7.2f} {dec_s:>7.2f} {dec_err:>9.2e}")
+            del z, h
@@ -0,0 +1,127 @@
+"""
+Latency and allocations of `SLatGaussianDecoder.to_representation` versus the per-scene,
+per-attribute loop it replaced (kept below as `to_representation_loop`).
+
+Feeds random decoder outputs (default: 200k voxels x 32 Gaussians per voxel, split over
+`--scenes` scenes) through both, checks they agree, and reports the best time and the
+bytes allocated (peak on CUDA, total allocated by the call on CPU).
+
+Usage:
+    python scripts/bench_to_representation.py
+    python scripts/bench_to_representation.py --voxels 200000 --scenes 4 --device cuda
+"""
+import os
+import sys
+import time
+import types
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from trellis.models.structured_latent_vae.decoder_gs import SLatGaussianDecoder
+from trellis.representations import Gaussian
+
+REP_CONFIG = {
+    '3d_filter_kernel_size': 0.0, 'scaling_bias': 0.004, 'opacity_bias': 0.1, 'scaling_activation': 'exp',
+    'scaling_max': 0.01, 'num_gaussians': 32, 'perturb_offset': True, 'voxel_size': 1.5,
+    'lr': {'_xyz': 1.0, '_features_dc': 1.0, '_scaling': 1.0, '_rotation': 0.1, '_opacity': 1.0},
+}
+
+
+def to_representation_loop(self, x):
+    """The previous implementation: one Gaussian per scene, several copies per attribute."""
+    ret = []
+    for i in range(x.shape[0]):
+        representation = Gaussian(
+            sh_degree=0,
+            aabb=[-0.5, -0.5, -0.5, 1.0, 1.0, 1.0],
+            mininum_kernel_size=self.rep_config["3d_filter_kernel_size"],
+            scaling_bias=self.rep_config["scaling_bias"],
+            opacity_bias=self.rep_config["opacity_bias"],
+            scaling_activation=self.rep_config["scaling_activation"],
+            scaling_max=self.rep_config["scaling_max"],
+            device=x.feats.device,
+        )
+        xyz = (x.coords[x.layout[i]][:, 1:].float() + 0.5) / self.resolution
+        for k, v in self.layout.items():
+            if k == "_xyz":
+                offset = x.feats[x.layout[i]][:, v["range"][0] : v["range"][1]].reshape(-1, *v["shape"])
+                offset = offset * self.rep_config["lr"][k]
+                if self.rep_config["perturb_offset"]:
+                    offset = offset + self.offset_perturbation
+                offset = torch.tanh(offset) / self.resolution * 0.5 * self.rep_config["voxel_size"]
+                _xyz = xyz.unsqueeze(1) + offset
+                setattr(representation, k, _xyz.flatten(0, 1))
+            else:
+                feats = x.feats[x.layout[i]][:, v["range"][0] : v["range"][1]].reshape(-1, *v["shape"]).flatten(0, 1)
+                feats = feats * self.rep_config["lr"][k]
+                setattr(representation, k, feats)
+        ret.append(representation)
+    return ret
+
+
+def decoder_output(decoder, voxels, scenes, device):
+    # to_representation only reads feats, coords and layout of the network output
+    counts = [voxels // scenes + (i < voxels % scenes) for i in range(scenes)]
+    coords = torch.cat([
+        torch.cat([torch.full((c, 1), i), torch.randint(0, decoder.resolution, (c, 3))], dim=1) for i, c in enumerate(counts)
+    ]).int().to(device)
+    starts = torch.tensor([0] + counts).cumsum(0).tolist()
+    layout = [slice(starts[i], starts[i + 1]) for i in range(scenes)]
+    feats = torch.randn(voxels, decoder.out_channels, device=device)
+    return types.SimpleNamespace(feats=feats, coords=coords, layout=layout, shape=torch.Size([scenes, decoder.out_channels]))
+
+
+def measure(fn, device, repeats):
+    def sync():
+        if device == 'cuda':
+            torch.cuda.synchronize()
+    times = []
+    for _ in range(repeats):
+        sync()
+        t0 = time.perf_counter()
+        out = fn()
+        sync()
+        times.append(time.perf_counter() - t0)
+        del out
+    if device == 'cuda':
+        base = torch.cuda.memory_allocated()
+        torch.cuda.reset_peak_memory_stats()
+        out = fn()
+        allocated = torch.cuda.max_memory_allocated() - base
+    else:
+        with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU], profile_memory=True) as prof:
+            out = fn()
+        allocated = sum(max(e.cpu_memory_usage, 0) for e in prof.events() if e.cpu_parent is None)
+    return min(times), allocated, out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voxels', type=int, default=200_000)
+    parser.add_argument('--scenes', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    args = parser.parse_args()
+
+    decoder = SLatGaussianDecoder(
+        resolution=64, model_channels=64, latent_channels=8, num_blocks=0, num_heads=1, representation_config=REP_CONFIG,
+    ).to(args.device)
+    x = decoder_output(decoder, args.voxels, args.scenes, args.device)
+    output_mb = args.voxels * decoder.out_channels * 4 / 1024**2
+
+    with torch.no_grad():
+        loop_s, loop_bytes, loop = measure(lambda: to_representation_loop(decoder, x), args.device, args.repeats)
+        fused_s, fused_bytes, fused = measure(lambda: decoder.to_representation(x), args.device, args.repeats)
+    for i in range(args.scenes):
+        for k in decoder.layout:
+            assert torch.allclose(getattr(loop[i], k), getattr(fused[i], k), atol=1e-6), f"scene {i} {k} differs"
+
+    print(f"{args.voxels} voxels x {REP_CONFIG['num_gaussians']} Gaussians, {args.scenes} scene(s), {args.device}; "
+          f"network output {output_mb:.0f} MB")
+    print(f"{'version':>8} {'ms':>9} {'alloc MB':>9}")
+    print(f"{'loop':>8} {loop_s * 1000:>9.1f} {loop_bytes / 1024**2:>9.0f}")
+    print(f"{'fused':>8} {fused_s * 1000:>9.1f} {fused_bytes / 1024**2:>9.0f}")
+    print(f"speedup {loop_s / fused_s:.2f}x, {loop_bytes / max(fused_bytes, 1):.2f}x fewer bytes allocated")
@@ -0,0 +1,67 @@
+"""
+Checks for `Gaussian.activation_cache`: cached getters match uncached ones, reassigned or
+in-place modified attributes are picked up, and a caller modifying a returned activation in
+place does not leak into later reads.
+
+Usage:
+    python scripts/check_activation_cache.py [--num 10000] [--device cpu]
+"""
+import os
+import sys
+import argparse
+
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trellis.representations import Gaussian
+
+GETTERS = ['get_xyz', 'get_features', 'get_opacity', 'get_scaling', 'get_rotation']
+
+
+def random_gaussian(num, device, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    gaussian = Gaussian(aabb=[-0.5, -0.5, -0.5, 1.0, 1.0, 1.0], sh_degree=0, scaling_max=0.01, device=device)
+    gaussian._xyz = torch.rand(num, 3, generator=generator).to(device)
+    gaussian._features_dc = torch.randn(num, 1, 3, generator=generator).to(device)
+    gaussian._scaling = torch.randn(num, 3, generator=generator).to(device) - 6
+    gaussian._rotation = torch.randn(num, 4, generator=generator).to(device)
+    gaussian._opacity = torch.randn(num, 1, generator=generator).to(device)
+    return gaussian
+
+
+def check(cond, msg):
+    print(f"{'PASS' if cond else 'FAIL'}: {msg}")
+    return bool(cond)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num', type=int, default=10000)
+    parser.add_argument('--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    args = parser.parse_args()
+
+    gaussian = random_gaussian(args.num, args.device)
+    reference = {name: getattr(gaussian, name).clone() for name in GETTERS}
+    ok = True
+    with torch.no_grad(), gaussian.activation_cache():
+        ok &= check(all(torch.equal(getattr(gaussian, name), reference[name]) for name in GETTERS), "cached getters match uncached ones")
+        ok &= check(all(getattr(gaussian, name) is getattr(gaussian, name) for name in GETTERS), "repeated reads hit the cache")
+
+        for name in GETTERS:
+            getattr(gaussian, name).mul_(0)
+        ok &= check(all(torch.equal(getattr(gaussian, name), reference[name]) for name in GETTERS if name != 'get_features'),
+                    "activations modified in place by a caller are recomputed")
+
+        gaussian._xyz.add_(1)
+        ok &= check(torch.allclose(gaussian.get_xyz, reference['get_xyz'] + gaussian.aabb[3:]), "in-place attribute edits are picked up")
+        gaussian._opacity = torch.zeros_like(gaussian._opacity)
+        ok &= check(torch.allclose(gaussian.get_opacity, torch.sigmoid(gaussian.opacity_bias).expand(args.num, 1)),
+                    "reassigned attributes are picked up")
+    ok &= check(len(gaussian._activation_cache) == 0, "the cache is emptied on exit")
+
+    print('All checks passed' if ok else 'Some checks FAILED')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Round-trip error checks for the compact splat format (`serving/compact.py`).
+
+Encodes synthetic Gaussians (or a PLY written by `Gaussian.save_ply`), decodes them again and
+checks the per-attribute error against the quantization step of each field. Also checks the
+conversion cache and the `/serve/<id>?format=compact` endpoint.
+
+Usage:
+    python scripts/check_compact_format.py [--ply path/to/sample.ply] [--num 100000]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import threading
+import http.client
+from http.server import HTTPServer
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trellis.utils.ply_utils import memmap_ply_vertices, gaussian_attributes
+from serving.compact import SH_C0, encode_compact, decode_compact, convert_ply_to_compact
+from serving.cache import ConversionCache
+from serving.registry import FileRegistry
+
+
+def random_gaussians(num, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'xyz': rng.uniform(-0.5, 0.5, (num, 3)).astype(np.float32) * np.array([4, 3, 2.5], dtype=np.float32),
+        'f_dc': rng.uniform(-0.5 / SH_C0, 0.5 / SH_C0, (num, 3)).astype(np.float32),
+        'opacity': rng.normal(0, 3, num).astype(np.float32),
+        'scale': rng.uniform(np.log(1e-4), np.log(1e-2), (num, 3)).astype(np.float32),
+        'rot': rng.normal(0, 1, (num, 4)).astype(np.float32),
+    }
+
+
+def write_ply(path, attrs):
+    """Write attributes in the `Gaussian.save_ply` vertex layout."""
+    names = ['x', 'y', 'z', 'nx', 'ny', 'nz', 'f_dc_0', 'f_dc_1', 'f_dc_2', 'opacity',
+             'scale_0', 'scale_1', 'scale_2', 'rot_0', 'rot_1', 'rot_2', 'rot_3']
+    num = attrs['xyz'].shape[0]
+    rows = np.concatenate([
+        attrs['xyz'], np.zeros((num, 3), np.float32), attrs['f_dc'], attrs['opacity'][:, None], attrs['scale'], attrs['rot'],
+    ], axis=1).astype('<f4')
+    header = ['ply', 'format binary_little_endian 1.0', f'element vertex {num}']
+    header += [f'property float {n}' for n in names] + ['end_header']
+    with open(path, 'wb') as f:
+        f.write(('\n'.join(header) + '\n').encode('ascii'))
+        f.write(rows.tobytes())
+
+
+def check(cond, msg):
+    print(f"{'PASS' if cond else 'FAIL'}: {msg}")
+    return bool(cond)
+
+
+def roundtrip_errors(attrs):
+    data = encode_compact(attrs)
+    out = decode_compact(data)
+    sigmoid = lambda x: 1 / (1 + np.exp(-x.astype(np.float64)))
+    rgb = lambda f_dc: (0.5 + SH_C0 * f_dc).clip(0, 1)
+    q = attrs['rot'] / np.linalg.norm(attrs['rot'], axis=1, keepdims=True)
+    extent = attrs['xyz'].max(axis=0) - attrs['xyz'].min(axis=0)
+    scale_extent = float(attrs['scale'].max() - attrs['scale'].min())
+    return len(data), {
+        'xyz': (np.abs(out['xyz'] - attrs['xyz']).max(axis=0) / extent * 65535).max(),
+        'color': np.abs(rgb(out['f_dc']) - rgb(attrs['f_dc'])).max() * 255,
+        'opacity': np.abs(sigmoid(out['opacity']) - sigmoid(attrs['opacity'])).max() * 255,
+        'scale': np.abs(out['scale'] - attrs['scale']).max() / scale_extent * 255,
+        'rot': 1 - np.abs((out['rot'] * q).sum(axis=1)).min(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ply', type=str, default=None, help='Gaussian PLY to check (default: synthetic)')
+    parser.add_argument('--num', type=int, default=100000, help='Number of synthetic Gaussians')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ply_path = args.ply
+        if ply_path is None:
+            ply_path = os.path.join(tmp_dir, 'sample.ply')
+            write_ply(ply_path, random_gaussians(args.num))
+        attrs = gaussian_attributes(memmap_ply_vertices(ply_path))
+
+        size, err = roundtrip_errors(attrs)
+        ply_size = os.path.getsize(ply_path)
+        print(f"PLY {ply_size} bytes -> compact {size} bytes ({ply_size / size:.2f}x)")
+        ok = check(ply_size / size >= 4, "compact file is at least 4x smaller")
+        # Errors are in units of the quantization step, 0.5 is exact rounding
+        ok &= check(err['xyz'] <= 0.51, f"position error {err['xyz']:.3f} steps")
+        ok &= check(err['color'] <= 0.51, f"color error {err['color']:.3f} steps")
+        ok &= check(err['opacity'] <= 0.51, f"opacity error {err['opacity']:.3f} steps")
+        ok &= check(err['scale'] <= 0.51, f"log-scale error {err['scale']:.3f} steps")
+        ok &= check(err['rot'] <= 1e-5, f"rotation 1 - |<q, q'>| = {err['rot']:.2e}")
+
+        single = decode_compact(encode_compact({k: v[:1] for k, v in attrs.items()}))
+        ok &= check(np.allclose(single['xyz'], attrs['xyz'][:1]) and all(np.isfinite(v).all() for v in single.values()),
+                    "single splat round-trips")
+        empty = decode_compact(encode_compact({k: v[:0] for k, v in attrs.items()}))
+        ok &= check(all(v.shape[0] == 0 for v in empty.values()), "empty scene round-trips")
+
+        cache = ConversionCache(os.path.join(tmp_dir, 'cache'))
+        calls = []
+        convert = lambda src, dst: (calls.append(src), convert_ply_to_compact(src, dst))
+        first = cache.get(ply_path, 'compact', 1, convert)
+        second = cache.get(ply_path, 'compact', 1, convert)
+        ok &= check(first == second and len(calls) == 1, "conversion cache converts once")
+        ok &= check(cache.path(ply_path, 'compact', 2) != first, "format version is part of the cache key")
+
+        from server import COOPCORPHandler
+        COOPCORPHandler.configure(registry=FileRegistry(os.path.join(tmp_dir, 'registry.sqlite3')), conversion_cache=cache)
+        COOPCORPHandler.log_message = lambda *a, **k: None
+        server = HTTPServer(('127.0.0.1', 0), COOPCORPHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = COOPCORPHandler.register_file(COOPCORPHandler, ply_path)
+            conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+            conn.request('GET', f'{url}?format=compact')
+            resp = conn.getresponse()
+            body = resp.read()
+            with open(first, 'rb') as f:
+                ok &= check(resp.status == 200 and body == f.read() and len(calls) == 1, "/serve/<id>?format=compact serves the cached file")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print('All checks passed' if ok else 'Some checks FAILED')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
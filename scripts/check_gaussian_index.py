@@ -0,0 +1,84 @@
+"""
+Correctness and timing checks for `GaussianIndex` against brute force over all splats.
+
+Builds an index over synthetic Gaussians and compares AABB, frustum and k-nearest queries
+with exhaustive evaluation, then checks that `reorder` keeps query results consistent.
+
+Usage:
+    python scripts/check_gaussian_index.py [--num 1000000] [--device cuda]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from trellis.representations import Gaussian, GaussianIndex
+from trellis.representations.gaussian.gaussian_index import gaussian_extents, frustum_planes
+from trellis.utils.gaussian_simplify import sphere_cameras
+
+
+def random_gaussian(num, device, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    gaussian = Gaussian(aabb=[-0.5, -0.5, -0.5, 1, 1, 1], scaling_max=0.01, device=device)
+    gaussian._xyz = torch.rand(num, 3, generator=generator).to(device)
+    gaussian._features_dc = torch.randn(num, 1, 3, generator=generator).to(device)
+    gaussian._opacity = torch.randn(num, 1, generator=generator).to(device)
+    gaussian._scaling = torch.log(torch.rand(num, 3, generator=generator) * 4e-3 + 1e-4).to(device)
+    gaussian._rotation = torch.randn(num, 4, generator=generator).to(device)
+    return gaussian
+
+
+def timed(fn, *args, **kwargs):
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return out, (time.perf_counter() - t0) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num', type=int, default=300_000)
+    parser.add_argument('--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    args = parser.parse_args()
+
+    gaussian = random_gaussian(args.num, args.device)
+    xyz, extents = gaussian.get_xyz, gaussian_extents(gaussian)
+    index, ms = timed(GaussianIndex, gaussian)
+    print(f"build: {ms:.1f} ms, {len(index.levels)} levels")
+
+    lo = torch.tensor([-0.1, -0.2, 0.0], device=args.device)
+    hi = torch.tensor([0.1, 0.0, 0.05], device=args.device)
+    result, ms = timed(index.query_aabb, lo, hi)
+    expected = torch.nonzero(((xyz - extents <= hi) & (xyz + extents >= lo)).all(dim=-1))[:, 0]
+    assert torch.equal(result, expected), 'query_aabb differs from brute force'
+    print(f"aabb: {result.shape[0]} splats in {ms:.1f} ms")
+
+    extrinsics, intrinsics = sphere_cameras(4, r=0.6, device=args.device)
+    for extr, intr in zip(extrinsics, intrinsics):
+        planes = frustum_planes(extr, intr, 0.1, 100.0)
+        reach = xyz @ planes[:, :3].T + planes[:, 3] + extents @ planes[:, :3].abs().T
+        expected = torch.nonzero((reach >= 0).all(dim=-1))[:, 0]
+        result, ms = timed(index.query_frustum, extr, intr)
+        assert torch.equal(result, expected), 'query_frustum differs from brute force'
+        print(f"frustum: {result.shape[0]} splats in {ms:.1f} ms")
+
+    points = torch.rand(1000, 3, device=args.device) - 0.5
+    (dist, idx), ms = timed(index.knn, points, 8)
+    expected_dist, _ = torch.cdist(points, xyz, compute_mode='donot_use_mm_for_euclid_dist').topk(8, largest=False)
+    assert torch.allclose(dist, expected_dist), 'knn distances differ from brute force'
+    assert torch.allclose((xyz[idx] - points[:, None]).norm(dim=-1), dist), 'knn indices do not match distances'
+    print(f"knn: 1000 points, k=8 in {ms:.1f} ms")
+
+    before = xyz.clone()
+    expected = index.query_aabb(lo, hi)
+    order = index.reorder()
+    assert torch.equal(gaussian.get_xyz, before[order])
+    assert torch.equal(order[index.query_aabb(lo, hi)].sort().values, expected), 'reorder changed query results'
+    print("reorder: ok")
@@ -0,0 +1,61 @@
+"""
+Import-time regression check.
+
+Imports each lightweight entry point in a fresh interpreter and fails if it pulls in a heavy
+dependency that should only load on first use (attention kernels, rasterizers, mesh tools),
+or if it exceeds its time budget. Run it after touching imports in trellis/ or server.py.
+
+Usage:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-scale 2   # slow machines / cold disk cache
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from profile_imports import profile_import
+
+
+# Loaded lazily by the code that needs them
+HEAVY = [
+    'flash_attn', 'xformers', 'nvdiffrast', 'diff_gaussian_rasterization', 'gsplat', 'diso',
+    'utils3d', 'trimesh', 'xatlas', 'pyvista', 'pymeshfix', 'igraph', 'cv2', 'lpips', 'spconv',
+]
+
+# module -> (seconds budget, modules that must not be imported)
+CHECKS = {
+    'server': (0.5, HEAVY + ['torch', 'numpy']),
+    'trellis': (0.2, HEAVY + ['torch']),
+    'trellis.utils.render_utils': (10.0, HEAVY),
+    'trellis.utils.postprocessing_utils': (10.0, HEAVY),
+    'trellis.renderers': (10.0, HEAVY),
+    'trellis.representations': (10.0, HEAVY),
+    'trellis.modules.sparse.attention': (10.0, HEAVY),
+    'trellis.pipelines.gaussian_vae': (10.0, HEAVY),
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='multiply every time budget')
+    parser.add_argument('modules', nargs='*', help='subset of modules to check')
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules or CHECKS:
+        budget, forbidden = CHECKS[module]
+        budget *= args.budget_scale
+        try:
+            _, seconds, modules = profile_import(module)
+        except RuntimeError as e:
+            print(f"FAIL {module}: {e}")
+            failures += 1
+            continue
+        loaded = sorted(m for m in forbidden if m in modules)
+        ok = not loaded and seconds <= budget
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {module}: {seconds:.3f} s (budget {budget:.1f} s)" +
+              (f", eagerly imports {', '.join(loaded)}" if loaded else ''))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,160 @@
+"""
+Local client that checks Range / ETag / conditional-GET handling and precompressed
+(Accept-Encoding) responses of the viewer server.
+
+Starts `server.COOPCORPHandler` on an ephemeral port, registers a file and verifies that
+partial reads are byte-exact against the file on disk.
+
+Usage:
+    python scripts/check_range_requests.py [--file path/to/sample.ply]
+"""
+import os
+import sys
+import argparse
+import gzip
+import time
+import tempfile
+import threading
+import http.client
+from http.server import HTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server import COOPCORPHandler
+from serving.cache import ConversionCache
+from serving.registry import FileRegistry
+
+
+def request(port, path, headers=None, method='GET'):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request(method, path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def check(cond, msg):
+    print(f"{'PASS' if cond else 'FAIL'}: {msg}")
+    return bool(cond)
+
+
+def run_checks(port, url, data):
+    size = len(data)
+    ok = True
+
+    resp, body = request(port, url)
+    ok &= check(resp.status == 200 and body == data, "full GET returns the whole file")
+    etag, last_modified = resp.getheader('ETag'), resp.getheader('Last-Modified')
+    ok &= check(etag and last_modified, f"validators present (ETag={etag}, Last-Modified={last_modified})")
+    ok &= check(resp.getheader('Accept-Ranges') == 'bytes', "Accept-Ranges: bytes")
+
+    for rng, (start, end) in {
+        'bytes=0-0': (0, 0),
+        'bytes=10-99': (10, 99),
+        f'bytes={size // 2}-': (size // 2, size - 1),
+        'bytes=-100': (size - 100, size - 1),
+        f'bytes=100-{size * 2}': (100, size - 1),
+    }.items():
+        resp, body = request(port, url, {'Range': rng})
+        ok &= check(
+            resp.status == 206
+            and body == data[start:end + 1]
+            and resp.getheader('Content-Range') == f'bytes {start}-{end}/{size}'
+            and int(resp.getheader('Content-Length')) == end - start + 1,
+            f"{rng} returns bytes {start}-{end}",
+        )
+
+    resp, body = request(port, url, {'Range': f'bytes={size}-'})
+    ok &= check(resp.status == 416 and resp.getheader('Content-Range') == f'bytes */{size}', "unsatisfiable range returns 416")
+
+    resp, body = request(port, url, {'Range': 'bytes=0-9,20-29'})
+    ok &= check(resp.status == 200 and body == data, "multi-range falls back to the full file")
+
+    resp, body = request(port, url, {'Range': 'bytes=0-9', 'If-Range': etag})
+    ok &= check(resp.status == 206 and body == data[:10], "matching If-Range honors the range")
+    resp, body = request(port, url, {'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+    ok &= check(resp.status == 200 and body == data, "stale If-Range returns the full file")
+
+    resp, body = request(port, url, {'If-None-Match': etag})
+    ok &= check(resp.status == 304 and body == b'', "If-None-Match with current ETag returns 304")
+    resp, body = request(port, url, {'If-None-Match': '"other"'})
+    ok &= check(resp.status == 200, "If-None-Match with other ETag returns 200")
+    resp, body = request(port, url, {'If-Modified-Since': last_modified})
+    ok &= check(resp.status == 304, "If-Modified-Since at Last-Modified returns 304")
+    resp, body = request(port, url, {'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+    ok &= check(resp.status == 200, "If-Modified-Since in the past returns 200")
+
+    resp, body = request(port, url, method='HEAD')
+    ok &= check(resp.status == 200 and body == b'' and int(resp.getheader('Content-Length')) == size, "HEAD returns headers only")
+    return ok
+
+
+def run_encoding_checks(port, url, data):
+    ok = True
+    resp, body = request(port, url, {'Accept-Encoding': 'gzip'})
+    ok &= check(resp.status == 200 and body == data and resp.getheader('Content-Encoding') is None,
+                "first gzip request is answered uncompressed")
+    ok &= check(resp.getheader('Vary') == 'Accept-Encoding', "Vary: Accept-Encoding")
+
+    # The sidecar is built by a background worker
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        resp, body = request(port, url, {'Accept-Encoding': 'gzip;q=1.0, identity;q=0.5'})
+        if resp.getheader('Content-Encoding') == 'gzip':
+            break
+        time.sleep(0.1)
+    ok &= check(resp.getheader('Content-Encoding') == 'gzip' and int(resp.getheader('Content-Length')) == len(body)
+                and gzip.decompress(body) == data, "later request streams the gzip sidecar")
+    gz_etag = resp.getheader('ETag')
+
+    resp, body = request(port, url, {'Accept-Encoding': 'gzip', 'Range': 'bytes=0-9'})
+    ok &= check(resp.status == 206 and resp.getheader('Content-Encoding') == 'gzip' and len(body) == 10,
+                "ranges apply to the compressed representation")
+    resp, body = request(port, url, {'Accept-Encoding': 'gzip', 'If-None-Match': gz_etag})
+    ok &= check(resp.status == 304, "sidecar revalidates with its own ETag")
+    resp, body = request(port, url, {'Accept-Encoding': 'gzip;q=0'})
+    ok &= check(resp.getheader('Content-Encoding') is None and body == data, "q=0 disables the coding")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', type=str, default=None, help='File to serve (default: 1 MB of random bytes)')
+    args = parser.parse_args()
+
+    tmp = None
+    file_path = args.file
+    if file_path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix='.ply', delete=False)
+        tmp.write(os.urandom(1024 * 1024 + 123))
+        tmp.close()
+        file_path = tmp.name
+    file_path = os.path.abspath(file_path)
+
+    cache_dir = tempfile.TemporaryDirectory()
+    COOPCORPHandler.configure(
+        registry=FileRegistry(os.path.join(cache_dir.name, 'registry.sqlite3')),
+        conversion_cache=ConversionCache(os.path.join(cache_dir.name, 'cache')),
+    )
+    server = HTTPServer(('127.0.0.1', 0), COOPCORPHandler)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = COOPCORPHandler.register_file(COOPCORPHandler, file_path)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        ok = run_checks(port, url, data)
+        ok &= run_encoding_checks(port, url, data)
+    finally:
+        server.shutdown()
+        server.server_close()
+        cache_dir.cleanup()
+        if tmp is not None:
+            os.remove(tmp.name)
+    print('All checks passed' if ok else 'Some checks FAILED')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
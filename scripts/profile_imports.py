@@ -0,0 +1,78 @@
+"""
+Per-module import-time report.
+
+Imports the target in a fresh interpreter with `-X importtime` and prints the slowest
+modules by cumulative and self time, plus totals per top-level package. Use it to find
+what dominates startup before making an import lazy.
+
+Usage:
+    python scripts/profile_imports.py app
+    python scripts/profile_imports.py trellis.pipelines.gaussian_vae --top 40
+    python scripts/profile_imports.py server --package-only
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile_import(module, env=None):
+    """
+    Import `module` in a subprocess. Returns the `-X importtime` records as
+    (name, self_s, cumulative_s, depth) in import order, the import wall time and
+    the set of modules loaded afterwards.
+    """
+    env = dict(os.environ if env is None else env)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    code = (f"import sys, json, time; t = time.perf_counter(); import {module}; "
+            f"print(json.dumps({{'seconds': time.perf_counter() - t, 'modules': sorted(sys.modules)}}))")
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    records = []
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            records.append((name, int(self_us) / 1e6, int(cum_us) / 1e6, (len(indent) - 1) // 2))
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return records, result['seconds'], set(result['modules'])
+
+
+def package_totals(records):
+    totals = defaultdict(float)
+    for name, self_s, _, _ in records:
+        totals[name.split('.')[0]] += self_s
+    return sorted(totals.items(), key=lambda kv: -kv[1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('module', help='module to import, e.g. app or trellis.utils.render_utils')
+    parser.add_argument('--top', type=int, default=25, help='rows per table')
+    parser.add_argument('--package-only', action='store_true', help='only print per-package totals')
+    args = parser.parse_args()
+
+    records, seconds, _ = profile_import(args.module)
+    print(f"import {args.module}: {seconds:.3f} s, {len(records)} modules")
+
+    print(f"\n{'self s':>8}  package")
+    for package, total in package_totals(records)[:args.top]:
+        print(f"{total:>8.3f}  {package}")
+    if args.package_only:
+        sys.exit(0)
+
+    print(f"\n{'cum s':>8} {'self s':>8}  module (by cumulative time)")
+    for name, self_s, cum_s, depth in sorted(records, key=lambda r: -r[2])[:args.top]:
+        print(f"{cum_s:>8.3f} {self_s:>8.3f}  {name}")
+
+    print(f"\n{'self s':>8}  module (by self time)")
+    for name, self_s, cum_s, depth in sorted(records, key=lambda r: -r[1])[:args.top]:
+        print(f"{self_s:>8.3f}  {name}")
@@ -2,98 +2,747 @@
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 import urllib.parse
 import os
-import shutil
+import re
+import json
+import time
 import hashlib
+import logging
+import argparse
+import threading
+import email.utils
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from serving.cache import ConversionCache
+from serving.compress import SidecarCompressor, negotiate_encoding
+from serving.registry import FileRegistry
+from serving.metrics import ServerMetrics
+
+logger = logging.getLogger('viewer_server')
+
+# Chunk size used when streaming (partial) file bodies
+COPY_CHUNK_SIZE = 1024 * 1024
+# Where converted files (compact splats, ...) are cached
+CONVERSION_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp', 'viewer_cache')
+# Persistent index of registered files, shared with app.py
+REGISTRY_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp', 'viewer_registry.sqlite3')
+# Only files under these directories can be registered through /viewer?file=
+DEFAULT_ALLOWED_ROOTS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets'),
+]
+
+_RANGE_RE = re.compile(r'^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def log_event(level: int, event: str, **fields):
+    """
+    Log a structured event as `event key=value ...`; the fields are also attached to the record for JSON output.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, '%s %s', event, ' '.join(f'{k}={v}' for k, v in fields.items()),
+                   extra={'event': event, 'fields': fields})
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None) or record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level='INFO', fmt='text'):
+    handler = logging.StreamHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+class TemplateCache:
+    """
+    Keeps a text file in memory and reloads it only when its mtime or size changes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._key = None
+        self._content = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        st = os.stat(self.path)
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key != self._key:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._content = f.read()
+                self._key = key
+                log_event(logging.INFO, 'template_loaded', path=self.path, bytes=len(self._content))
+            return self._content
+
+
+class CountingWriter:
+    """Wraps the response stream and counts the bytes written to it."""
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_written = 0
+
+    def write(self, data):
+        n = self.raw.write(data)
+        self.bytes_written += len(data) if n is None else n
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def route_of(path: str) -> str:
+    """Low-cardinality route label of a request path."""
+    if path.startswith('/serve/'):
+        parts = path.split('/')
+        return f"/serve/{parts[3]}" if len(parts) > 3 and parts[3] in ('lod', 'region') else '/serve'
+    if path in ('/viewer', '/stats', '/metrics'):
+        return path
+    return 'static'
+
+
+def file_validators(st: os.stat_result):
+    """
+    Build the (ETag, Last-Modified) validator pair of a file from its mtime and size.
+    """
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+    return etag, last_modified
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match / If-Range header against an ETag.
+    """
+    if header.strip() == '*':
+        return True
+    strip_weak = lambda tag: tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()
+    return any(strip_weak(tag) == strip_weak(etag) for tag in header.split(','))
+
+
+def modified_since(header: str, mtime: float) -> bool:
+    """
+    Return False if the file was not modified after the HTTP date in `header`.
+    Unparsable dates count as modified, as required by RFC 9110.
+    """
+    try:
+        since = email.utils.parsedate_to_datetime(header)
+    except (TypeError, ValueError, IndexError):
+        return True
+    if since is None:
+        return True
+    return int(mtime) > since.timestamp()
+
+
+def parse_range(header: str, file_size: int):
+    """
+    Parse a single-range `Range: bytes=...` header.
+
+    Returns:
+        None if the header should be ignored (missing, malformed or multi-range),
+        (start, end) inclusive byte positions for a satisfiable range,
+        or False if the range is not satisfiable.
+    """
+    if not header:
+        return None
+    m = _RANGE_RE.match(header)
+    if m is None:
+        return None
+    first, last = m.group(1), m.group(2)
+    if first == '' and last == '':
+        return None
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or file_size == 0:
+            return False
+        return max(file_size - length, 0), file_size - 1
+    start = int(first)
+    if last != '' and int(last) < start:
+        return None
+    if start >= file_size:
+        return False
+    end = int(last) if last != '' else file_size - 1
+    return start, min(end, file_size - 1)
+
 
 class COOPCORPHandler(SimpleHTTPRequestHandler):
-    # Class-level storage shared across all instances
-    file_cache = {}
-    
+    # Class-level registry shared across all instances (bounded, persisted in sqlite); set by `configure`
+    registry = None
+    # Send file bodies with socket.sendfile (os.sendfile where available)
+    use_sendfile = True
+    # Converted files (compact splats, LOD orders), keyed by source path, mtime and format version;
+    # size-bounded (LRU), and a file's converted files are dropped when the registry drops the file
+    conversion_cache = None
+    # Precompressed (gzip/zstd) sidecars, built by a background worker
+    sidecars = None
+    # Grid indexes over Gaussian centers, persisted next to each PLY (created on first region query)
+    spatial_indexes = None
+    _spatial_indexes_lock = threading.Lock()
+    # Viewer page, reloaded only when index.html changes
+    template = TemplateCache('index.html')
+    # Request counters, bytes sent, in-flight connections and latency histograms
+    metrics = ServerMetrics()
+
+    @classmethod
+    def configure(cls, registry: Optional[FileRegistry] = None, conversion_cache: Optional[ConversionCache] = None,
+                  sidecars: Optional[SidecarCompressor] = None):
+        """
+        Set the registry, conversion cache and sidecar compressor shared by all handlers (nothing is
+        created at import time). Missing ones default to the sqlite index and cache under tmp/; the
+        registry's dropped files take their converted files with them.
+        """
+        cls.registry = registry if registry is not None else FileRegistry(REGISTRY_DB_PATH, allowed_roots=DEFAULT_ALLOWED_ROOTS)
+        cls.conversion_cache = conversion_cache if conversion_cache is not None else ConversionCache(CONVERSION_CACHE_DIR)
+        cls.sidecars = sidecars if sidecars is not None else SidecarCompressor(cls.conversion_cache)
+        cls.registry.on_drop = cls.conversion_cache.drop_sources
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+        self.metrics.connection_opened()
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.metrics.connection_closed()
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def log_message(self, format, *args):
+        log_event(logging.DEBUG, 'http', client=self.address_string(), message=format % args)
+
+    def log_request(self, code='-', size='-'):
+        # Requests are logged once with their latency by `handle_request`
+        pass
+
+    def handle_request(self, method, handler):
+        """Dispatch a request and record its metrics and access-log entry."""
+        route = route_of(urllib.parse.urlparse(self.path).path)
+        self._status = None
+        self.wfile.bytes_written = 0
+        self._bytes_sendfile = 0
+        start = time.perf_counter()
+        try:
+            handler()
+        finally:
+            elapsed = time.perf_counter() - start
+            nbytes = self.wfile.bytes_written + self._bytes_sendfile
+            self.metrics.observe(route, method, self._status or 0, nbytes, elapsed)
+            log_event(logging.INFO, 'request', method=method, path=self.path, route=route, status=self._status,
+                      bytes=nbytes, ms=round(elapsed * 1000, 2), client=self.client_address[0])
+
     def serve_viewer(self, parsed_path):
         try:
             query_params = urllib.parse.parse_qs(parsed_path.query)
             file_path = query_params.get('file', [None])[0]
-            
-            with open('index.html', 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
+
+            html_content = self.template.get()
+
             if file_path and os.path.exists(file_path):
+                if not self.registry.is_allowed(file_path):
+                    log_event(logging.WARNING, 'register_refused', path=file_path, reason='outside allowed roots')
+                    self.send_error(403, "File is outside the served directories")
+                    return
                 # Create a direct file URL
-                file_url = self.register_file(file_path)
+                try:
+                    file_url = self.register_file(file_path)
+                except FileNotFoundError:
+                    # A directory, or a file removed since the check above
+                    log_event(logging.WARNING, 'register_refused', path=file_path, reason='not a file')
+                    self.send_error(404, "File not found")
+                    return
                 html_content = html_content.replace('{{PLY_DATA}}', file_url)
-                
-                file_size = os.path.getsize(file_path)
-                print(f" Direct file URL: {file_url} -> {file_path} ({file_size/1024/1024:.1f} MB)")
-                print(f" Cache size: {len(self.file_cache)} files")
+
+                log_event(logging.INFO, 'register', url=file_url, path=file_path, size=os.path.getsize(file_path))
             else:
                 html_content = html_content.replace('{{PLY_DATA}}', '')
-            
+
+            body = html_content.encode('utf-8')
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write(html_content.encode('utf-8'))
-            
+            self.wfile.write(body)
+
         except Exception as e:
-            print(f" Error in serve_viewer: {e}")
+            logger.exception('serve_viewer failed')
             self.send_error(500, f"Error: {str(e)}")
-    
+
     def register_file(self, file_path):
         """Register file and return a serving URL"""
-        file_id = hashlib.md5(file_path.encode()).hexdigest()[:12]
-        self.file_cache[file_id] = file_path
+        file_id = self.registry.register(file_path)
         return f"/serve/{file_id}"
-    
-    def serve_file(self, parsed_path):
-        """Serve file directly - no encoding, just stream bytes"""
+
+    def not_modified(self, etag, st):
+        """
+        Evaluate If-None-Match / If-Modified-Since. If-None-Match takes precedence.
+        """
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            return not modified_since(if_modified_since, st.st_mtime)
+        return False
+
+    def requested_range(self, etag, st):
+        """
+        Return the parsed Range header, honoring If-Range (a stale If-Range yields the full file).
+        """
+        range_header = self.headers.get('Range')
+        if not range_header:
+            return None
+        if_range = self.headers.get('If-Range')
+        if if_range is not None:
+            if if_range.strip().startswith(('"', 'W/')):
+                # If-Range requires a strong match
+                if if_range.strip() != etag:
+                    return None
+            elif modified_since(if_range, st.st_mtime):
+                return None
+        return parse_range(range_header, st.st_size)
+
+    def send_validators(self, etag, last_modified):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Last-Modified, Accept-Ranges, Content-Range, Content-Length, Content-Encoding, X-LOD-Level, X-LOD-Levels, X-LOD-Count, X-Region-Count')
+
+    def copy_range(self, f, start, length):
+        """Stream `length` bytes of `f` starting at `start` to the client."""
+        if self.use_sendfile:
+            try:
+                # Zero-copy: the kernel moves file pages straight into the socket
+                self.wfile.flush()
+                self._bytes_sendfile += self.connection.sendfile(f, start, length)
+                return
+            except (AttributeError, OSError, ValueError) as e:
+                if isinstance(e, (BrokenPipeError, ConnectionResetError)):
+                    raise
+                log_event(logging.WARNING, 'sendfile_fallback', error=e)
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+    def send_file(self, file_path, content_type='application/octet-stream', head_only=False, extra_headers=None):
+        """Stream a file from disk, honoring Range and conditional-GET headers"""
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            file_size = st.st_size
+            etag, last_modified = file_validators(st)
+
+            if self.not_modified(etag, st):
+                log_event(logging.DEBUG, 'not_modified', path=file_path)
+                self.send_response(304)
+                for key, value in (extra_headers or {}).items():
+                    self.send_header(key, value)
+                self.send_validators(etag, last_modified)
+                self.end_headers()
+                return
+
+            byte_range = self.requested_range(etag, st)
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{file_size}')
+                self.send_validators(etag, last_modified)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            if byte_range is None:
+                start, end = 0, file_size - 1
+                log_event(logging.DEBUG, 'stream', path=file_path, size=file_size)
+                self.send_response(200)
+            else:
+                start, end = byte_range
+                log_event(logging.DEBUG, 'stream_range', path=file_path, start=start, end=end, size=file_size)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{file_size}')
+            length = end - start + 1
+
+            self.send_header('Content-type', content_type)
+            self.send_header('Content-Length', str(length))
+            for key, value in (extra_headers or {}).items():
+                self.send_header(key, value)
+            self.send_validators(etag, last_modified)
+            self.end_headers()
+
+            if not head_only:
+                # Stream file directly
+                self.copy_range(f, start, length)
+
+    def compact_file(self, file_path):
+        """Return the cached compact (quantized) version of a PLY, converting it on first use"""
+        # lazy import: numpy is only needed for converted formats
+        from serving.compact import COMPACT_VERSION, convert_ply_to_compact
+        return self.conversion_cache.get(file_path, 'compact', COMPACT_VERSION, convert_ply_to_compact)
+
+    def negotiate_sidecar(self, file_path, extra_headers):
+        """
+        Return the precompressed sidecar matching Accept-Encoding if it is already built, else `file_path`.
+        Missing sidecars are built in the background for later requests.
+        """
+        encoding = negotiate_encoding(self.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return file_path
+        sidecar_path = self.sidecars.lookup(file_path, encoding)
+        if sidecar_path is None:
+            return file_path
+        extra_headers['Content-Encoding'] = encoding
+        return sidecar_path
+
+    def serve_lod(self, file_id, file_path, query_params, head_only=False):
+        """
+        Progressive streaming: without `level`, describe the levels as JSON; with `level=k`,
+        serve the k-th importance-ordered prefix of the PLY.
+        """
+        # lazy import: numpy is only needed for converted formats
+        from serving.lod import LOD_VERSION, build_lod_order, lod_manifest, write_lod_level
+        ordered_path = self.conversion_cache.get(file_path, 'lod', LOD_VERSION, build_lod_order)
+        manifest = lod_manifest(ordered_path)
+        num_levels = len(manifest['levels'])
+
+        level = query_params.get('level', [None])[0]
+        if level is None:
+            for entry in manifest['levels']:
+                entry['url'] = f"/serve/{file_id}/lod?level={entry['level']}"
+            body = json.dumps(manifest).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(body)
+            return
+
+        try:
+            level = int(level)
+        except ValueError:
+            level = -1
+        if level < 0:
+            self.send_error(400, f"Invalid level, expected 0..{num_levels - 1}")
+            return
+        level = min(level, num_levels - 1)
+        if level == num_levels - 1:
+            level_path = ordered_path
+        else:
+            level_path = self.conversion_cache.get(
+                ordered_path, f'lod{level}', LOD_VERSION,
+                lambda src, dst: write_lod_level(src, dst, level),
+            )
+        extra_headers = {
+            'Vary': 'Accept-Encoding',
+            'X-LOD-Level': str(level),
+            'X-LOD-Levels': str(num_levels),
+            'X-LOD-Count': str(manifest['levels'][level]['count']),
+        }
+        level_path = self.negotiate_sidecar(level_path, extra_headers)
+        self.send_file(level_path, head_only=head_only, extra_headers=extra_headers)
+
+    def serve_region(self, file_path, query_params, head_only=False):
+        """
+        Serve the Gaussians whose centers fall in `aabb=minx,miny,minz,maxx,maxy,maxz` or in the frustum of
+        `frustum=<16 floats>` (row-major OpenGL view-projection matrix), optionally grown by `margin`.
+        """
+        # lazy import: numpy is only needed for spatial queries
+        from trellis.utils.ply_utils import memmap_ply_vertices, ply_header
+        from serving.spatial import SpatialIndexCache
+        with self._spatial_indexes_lock:
+            if COOPCORPHandler.spatial_indexes is None:
+                COOPCORPHandler.spatial_indexes = SpatialIndexCache()
+        try:
+            margin = float(query_params.get('margin', ['0'])[0])
+            if 'aabb' in query_params:
+                box = [float(v) for v in query_params['aabb'][0].split(',')]
+                if len(box) != 6:
+                    raise ValueError('aabb needs 6 values')
+                query = ('aabb', box, margin)
+            elif 'frustum' in query_params:
+                view_proj = [float(v) for v in query_params['frustum'][0].split(',')]
+                if len(view_proj) != 16:
+                    raise ValueError('frustum needs 16 values')
+                query = ('frustum', view_proj, margin)
+            else:
+                raise ValueError('expected an aabb or frustum parameter')
+        except ValueError as e:
+            self.send_error(400, f"Invalid region query: {e}")
+            return
+
+        st = os.stat(file_path)
+        etag, last_modified = file_validators(st)
+        etag = f'"{hashlib.sha1(f"{etag}|{query}".encode()).hexdigest()[:24]}"'
+        if self.not_modified(etag, st):
+            self.send_response(304)
+            self.send_validators(etag, last_modified)
+            self.end_headers()
+            return
+
+        if query[0] == 'aabb':
+            box = query[1]
+            rows = self.spatial_indexes.query_aabb(
+                file_path, [v - margin for v in box[:3]], [v + margin for v in box[3:]],
+            )
+        else:
+            rows = self.spatial_indexes.query_frustum(file_path, query[1], margin)
+        vertices = memmap_ply_vertices(file_path)
+        header = ply_header(vertices.dtype, len(rows))
+        log_event(logging.DEBUG, 'region_query', path=file_path, kind=query[0], selected=len(rows), total=len(vertices))
+
+        self.send_response(200)
+        self.send_header('Content-type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(header) + len(rows) * vertices.dtype.itemsize))
+        self.send_header('X-Region-Count', str(len(rows)))
+        self.send_validators(etag, last_modified)
+        self.end_headers()
+        if head_only:
+            return
+        self.wfile.write(header)
+        # Matching rows are sorted, so the memory-mapped reads walk the file forward
+        batch = 1 << 18
+        for start in range(0, len(rows), batch):
+            self.wfile.write(vertices[rows[start:start + batch]].tobytes())
+
+    def serve_file(self, parsed_path, head_only=False):
+        """Serve file directly - no encoding, just stream bytes (supports Range and conditional GET)"""
         try:
             path_parts = parsed_path.path.split('/')
             if len(path_parts) >= 3:
                 file_id = path_parts[2]
-                file_path = self.file_cache.get(file_id)
-                
-                print(f"🔍 Looking up file_id: {file_id}")
-                print(f"📁 Available files in cache: {list(self.file_cache.keys())}")
-                
+                file_path = self.registry.resolve(file_id)
+
                 if file_path and os.path.exists(file_path):
-                    file_size = os.path.getsize(file_path)
-                    print(f"📦 Streaming file: {file_path} ({file_size} bytes)")
-                    
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/octet-stream')
-                    self.send_header('Content-Length', str(file_size))
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    
-                    # Stream file directly
-                    with open(file_path, 'rb') as f:
-                        shutil.copyfileobj(f, self.wfile)
+                    query_params = urllib.parse.parse_qs(parsed_path.query)
+                    subresource = path_parts[3] if len(path_parts) > 3 else ''
+                    if subresource == 'lod':
+                        self.serve_lod(file_id, file_path, query_params, head_only=head_only)
+                        return
+                    elif subresource == 'region':
+                        self.serve_region(file_path, query_params, head_only=head_only)
+                        return
+                    elif subresource != '':
+                        self.send_error(404, f"Unknown resource: {subresource}")
+                        return
+                    file_format = query_params.get('format', ['ply'])[0]
+                    extra_headers = {'Vary': 'Accept-Encoding'}
+                    if file_format == 'compact':
+                        file_path = self.compact_file(file_path)
+                        extra_headers['X-Splat-Format'] = 'compact'
+                    elif file_format != 'ply':
+                        self.send_error(400, f"Unknown format: {file_format}")
+                        return
+                    file_path = self.negotiate_sidecar(file_path, extra_headers)
+                    self.send_file(file_path, head_only=head_only, extra_headers=extra_headers)
                     return
                 else:
-                    print(f" File not found in cache: {file_id}")
-                    print(f" File path exists: {os.path.exists(file_path) if file_path else 'No path'}")
-            
-            self.send_error(404, f"File not found. Cache has {len(self.file_cache)} files: {list(self.file_cache.keys())}")
-            
+                    log_event(logging.INFO, 'file_not_found', file_id=file_id)
+
+            self.send_error(404, f"File not found. Registry has {len(self.registry)} files")
+
+        except (BrokenPipeError, ConnectionResetError):
+            log_event(logging.INFO, 'client_disconnected', path=parsed_path.path)
         except Exception as e:
-            print(f" Error serving file: {e}")
+            logger.exception('serve_file failed')
             self.send_error(500, f"Error: {str(e)}")
-    
-    def do_GET(self):
+
+    def serve_stats(self):
+        """Report the file registry as JSON"""
+        try:
+            body = json.dumps(self.registry.stats(), indent=2).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+        except Exception as e:
+            logger.exception('serve_stats failed')
+            self.send_error(500, f"Error: {str(e)}")
+
+    def serve_metrics(self):
+        """Report request metrics in the Prometheus text format"""
+        body = self.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route_GET(self):
         parsed_path = urllib.parse.urlparse(self.path)
-        print(f" Request: {self.path}")
-        
+
         if parsed_path.path == '/viewer':
             self.serve_viewer(parsed_path)
         elif parsed_path.path.startswith('/serve/'):
             self.serve_file(parsed_path)
+        elif parsed_path.path == '/stats':
+            self.serve_stats()
+        elif parsed_path.path == '/metrics':
+            self.serve_metrics()
         else:
             super().do_GET()
 
-def start_viewer_server(port=9001):
-    print("✅ Serving with COOP/COEP headers...")
-    print("🌐 Viewer available at: http://0.0.0.0:9001/viewer")
-    server = HTTPServer(('0.0.0.0', port), COOPCORPHandler)
-    server.serve_forever()
+    def route_HEAD(self):
+        parsed_path = urllib.parse.urlparse(self.path)
+        if parsed_path.path.startswith('/serve/'):
+            self.serve_file(parsed_path, head_only=True)
+        else:
+            super().do_HEAD()
+
+    def do_GET(self):
+        self.handle_request('GET', self.route_GET)
+
+    def do_HEAD(self):
+        self.handle_request('HEAD', self.route_HEAD)
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTP server that handles each connection on a bounded thread pool.
+
+    Args:
+        max_workers: number of connections served concurrently.
+        max_connections: number of accepted connections (served + queued). Connections
+            beyond this limit are answered with 503 and closed immediately.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, RequestHandlerClass, max_workers=32, max_connections=128, bind_and_activate=True):
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+        self.max_workers = max_workers
+        self.max_connections = max(max_connections, max_workers)
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='viewer')
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self.reject_request(request, client_address)
+            return
+        try:
+            self._executor.submit(self._process_request_slot, request, client_address)
+        except RuntimeError:
+            # Executor already shut down
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_slot(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def reject_request(self, request, client_address):
+        log_event(logging.WARNING, 'connection_rejected', client=client_address[0], limit=self.max_connections)
+        try:
+            request.sendall(
+                b"HTTP/1.0 503 Service Unavailable\r\n"
+                b"Retry-After: 1\r\n"
+                b"Content-Length: 0\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_viewer_server(port=9001, host='0.0.0.0', threaded=True, max_workers=32, max_connections=128, use_sendfile=True,
+                        registry_size=256, registry_ttl=24 * 3600, allowed_roots=None, cache_size=10 * 1024**3):
+    """
+    Start the viewer server.
+
+    Args:
+        threaded: serve connections on a bounded thread pool instead of one at a time.
+        max_workers: number of connections served concurrently (threaded mode).
+        max_connections: accepted connections (served + queued) before answering 503 (threaded mode).
+        use_sendfile: send file bodies with zero-copy sendfile instead of buffered copies.
+        registry_size: maximum number of registered files (LRU eviction).
+        registry_ttl: seconds a registered file is kept without being accessed.
+        allowed_roots: directories files may be registered from (default: tmp/ and assets/).
+        cache_size: bytes of converted files and sidecars kept in tmp/viewer_cache (LRU eviction).
+    """
+    COOPCORPHandler.use_sendfile = use_sendfile
+    COOPCORPHandler.configure(
+        registry=FileRegistry(
+            REGISTRY_DB_PATH, max_entries=registry_size, ttl=registry_ttl,
+            allowed_roots=allowed_roots or DEFAULT_ALLOWED_ROOTS,
+        ),
+        conversion_cache=ConversionCache(CONVERSION_CACHE_DIR, max_bytes=cache_size),
+    )
+    log_event(logging.INFO, 'registry_restored', files=len(COOPCORPHandler.registry), db=COOPCORPHandler.registry.db_path)
+    evicted = COOPCORPHandler.conversion_cache.evict()
+    log_event(logging.INFO, 'cache_restored', evicted=evicted, size=COOPCORPHandler.conversion_cache.size(),
+              max_size=cache_size, root=COOPCORPHandler.conversion_cache.root)
+    log_event(logging.INFO, 'listening', url=f"http://{host}:{port}/viewer", threaded=threaded,
+              max_workers=max_workers, max_connections=max_connections, sendfile=use_sendfile)
+    if threaded:
+        server = PooledHTTPServer((host, port), COOPCORPHandler, max_workers=max_workers, max_connections=max_connections)
+    else:
+        server = HTTPServer((host, port), COOPCORPHandler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
 
 if __name__ == '__main__':
-    start_viewer_server()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Gaussian splatting viewer server')
+    parser.add_argument('--host', type=str, default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=9001)
+    parser.add_argument('--single-threaded', action='store_true', help='Serve one connection at a time')
+    parser.add_argument('--max-workers', type=int, default=32, help='Connections served concurrently')
+    parser.add_argument('--max-connections', type=int, default=128, help='Accepted connections before answering 503')
+    parser.add_argument('--no-sendfile', action='store_true', help='Copy file bodies through Python buffers')
+    parser.add_argument('--registry-size', type=int, default=256, help='Maximum number of registered files')
+    parser.add_argument('--registry-ttl', type=float, default=24 * 3600, help='Seconds a file stays registered without access')
+    parser.add_argument('--cache-size', type=float, default=10, help='GB of converted files and sidecars kept on disk')
+    parser.add_argument('--allow-root', action='append', default=None, help='Directory files may be served from (repeatable)')
+    parser.add_argument('--log-level', type=str, default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--log-format', type=str, default='text', choices=['text', 'json'])
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+    start_viewer_server(
+        port=args.port,
+        host=args.host,
+        threaded=not args.single_threaded,
+        max_workers=args.max_workers,
+        max_connections=args.max_connections,
+        use_sendfile=not args.no_sendfile,
+        registry_size=args.registry_size,
+        registry_ttl=args.registry_ttl,
+        allowed_roots=args.allow_root,
+        cache_size=int(args.cache_size * 1024**3),
+    )
@@ -0,0 +1,5 @@
+"""
+Helpers for the viewer server (`server.py`).
+
+Only depends on the standard library and NumPy, so the server can use it without importing torch.
+"""
@@ -0,0 +1,184 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Callable, Iterable, List, Optional
+
+
+class ConversionCache:
+    """
+    On-disk cache of files derived from a source file (compact splats, sidecars, ...).
+
+    Entries are keyed by the source path, its mtime and size, the derived format and the
+    format version, so a source is converted once and re-converted only when it changes
+    or the format is bumped. Entry names start with a hash of the source path, and a
+    `<hash>.source` marker records the path, so all entries of a source can be found:
+    building an entry drops the stale ones of the same format, and `drop_source` /
+    `purge` remove them when the source goes away. Files derived from cached files (e.g.
+    sidecars of LOD levels) are dropped with them.
+
+    The cache is bounded: beyond `max_bytes`, the least recently used entries are evicted.
+    Use is recorded in the access time, set on every hit; the mtime is left alone since it
+    is the ETag of the served file.
+
+    Args:
+        root: directory holding the derived files.
+        max_bytes: size limit of the cache (None for no limit).
+        grace: seconds after its last use during which an entry is never evicted, so a path
+            just returned by `get` is still there when the caller opens it.
+    """
+    def __init__(self, root: str, max_bytes: Optional[int] = 10 * 1024**3, grace: float = 60.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.grace = grace
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._evict_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def source_id(src_path: str) -> str:
+        return hashlib.sha1(os.path.abspath(src_path).encode()).hexdigest()[:16]
+
+    def key(self, src_path: str, fmt: str, version: int) -> str:
+        st = os.stat(src_path)
+        ident = f"{os.path.abspath(src_path)}|{st.st_mtime_ns}|{st.st_size}|{fmt}|{version}"
+        return hashlib.sha1(ident.encode()).hexdigest()
+
+    def path(self, src_path: str, fmt: str, version: int, ext: str = 'bin') -> str:
+        return os.path.join(self.root, f"{self.source_id(src_path)}-{self.key(src_path, fmt, version)}.{fmt}.{ext}")
+
+    def lookup(self, src_path: str, fmt: str, version: int, ext: str = 'bin'):
+        """Return the cached file path, or None if it has not been built yet."""
+        dst_path = self.path(src_path, fmt, version, ext)
+        return dst_path if self._touch(dst_path) else None
+
+    def get(self, src_path: str, fmt: str, version: int, convert: Callable[[str, str], None], ext: str = 'bin') -> str:
+        """
+        Return the cached file for `src_path`, building it with `convert(src_path, tmp_path)` if needed.
+        Concurrent requests for the same entry wait for a single conversion.
+        """
+        dst_path = self.path(src_path, fmt, version, ext)
+        if self._touch(dst_path):
+            return dst_path
+        with self._locks_guard:
+            lock = self._locks.setdefault(dst_path, threading.Lock())
+        built = False
+        with lock:
+            if not os.path.exists(dst_path):
+                tmp_path = f"{dst_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    convert(src_path, tmp_path)
+                    self._mark_source(src_path)
+                    os.replace(tmp_path, dst_path)
+                    built = True
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        with self._locks_guard:
+            self._locks.pop(dst_path, None)
+        if built:
+            # Older versions of this entry (the source changed since) are no longer reachable
+            suffix = f".{fmt}.{ext}"
+            self._remove([p for p in self._entries(self.source_id(src_path)) if p.endswith(suffix) and p != dst_path])
+            self.evict()
+        return dst_path
+
+    def drop_source(self, src_path: str) -> int:
+        """Remove every entry derived from `src_path`. Returns the number of removed files."""
+        source_id = self.source_id(src_path)
+        removed = self._remove(self._entries(source_id))
+        self._unlink(os.path.join(self.root, f"{source_id}.source"))
+        return removed
+
+    def drop_sources(self, src_paths: Iterable[str]) -> int:
+        return sum(self.drop_source(p) for p in src_paths)
+
+    def purge(self) -> int:
+        """Remove the entries of sources that no longer exist. Returns the number of removed files."""
+        removed = 0
+        for name in os.listdir(self.root):
+            if not name.endswith('.source'):
+                continue
+            try:
+                with open(os.path.join(self.root, name), 'r') as f:
+                    src_path = f.read()
+            except OSError:
+                continue
+            if not os.path.exists(src_path):
+                removed += self.drop_source(src_path)
+        return removed
+
+    def evict(self) -> int:
+        """Purge orphaned entries, then evict least recently used ones beyond `max_bytes`."""
+        with self._evict_lock:
+            removed = self.purge()
+            if self.max_bytes is None:
+                return removed
+            entries = []
+            for name in os.listdir(self.root):
+                if name.endswith(('.source', '.tmp')):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.root, name))
+                except OSError:
+                    continue
+                entries.append((st.st_atime, st.st_size, os.path.join(self.root, name)))
+            total = sum(size for _, size, _ in entries)
+            now = time.time()
+            for last_use, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if now - last_use < self.grace:
+                    continue
+                if os.path.exists(path):
+                    removed += self._remove([path])
+                    total -= size
+            return removed
+
+    def size(self) -> int:
+        total = 0
+        for name in os.listdir(self.root):
+            try:
+                total += os.path.getsize(os.path.join(self.root, name))
+            except OSError:
+                pass
+        return total
+
+    def _entries(self, source_id: str) -> List[str]:
+        prefix = f"{source_id}-"
+        return [os.path.join(self.root, name) for name in os.listdir(self.root) if name.startswith(prefix) and not name.endswith('.tmp')]
+
+    def _mark_source(self, src_path: str) -> None:
+        marker = os.path.join(self.root, f"{self.source_id(src_path)}.source")
+        if not os.path.exists(marker):
+            tmp_path = f"{marker}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(os.path.abspath(src_path))
+            os.replace(tmp_path, marker)
+
+    def _remove(self, paths: List[str]) -> int:
+        """Remove cached files and, recursively, the files derived from them."""
+        removed = 0
+        for path in paths:
+            if self._unlink(path):
+                removed += 1
+            removed += self.drop_source(path)
+        return removed
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """Mark an entry as used now (access time only); False if it does not exist."""
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlink(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,131 @@
+"""
+Quantized compact splat format.
+
+Layout (little endian), version 1:
+    header (64 bytes):
+        magic       4s      b'GSCP'
+        version     u2
+        reserved    u2
+        count       u4
+        aabb_min    3 x f4  scene AABB of the splat centers
+        aabb_max    3 x f4
+        scale_min   f4      range of the log scales
+        scale_max   f4
+        padding     to 64 bytes
+    blocks (structure of arrays, each padded to 4 bytes):
+        position    N x 3 x u2  centers normalized to the AABB
+        color       N x 3 x u1  sRGB base color (0.5 + SH_C0 * f_dc)
+        opacity     N x u1      sigmoid(opacity)
+        scale       N x 3 x u1  log scales, linearly quantized over [scale_min, scale_max]
+        rotation    N x u4      smallest-three quaternion: 2 bit index of the largest
+                                component, 3 x 10 bit remaining components
+
+17 bytes per splat versus 68 bytes in the float32 PLY.
+"""
+import struct
+
+import numpy as np
+
+from trellis.utils.ply_utils import memmap_ply_vertices, gaussian_attributes
+from trellis.utils.quaternion_utils import pack_quaternions, unpack_quaternions
+
+COMPACT_MAGIC = b'GSCP'
+COMPACT_VERSION = 1
+HEADER_SIZE = 64
+SH_C0 = 0.28209479177387814
+
+_HEADER = struct.Struct('<4sHHI3f3fff')
+
+
+def _pad4(n: int) -> int:
+    return (n + 3) & ~3
+
+
+def _block_layout(count: int):
+    sizes = [
+        ('position', count * 6),
+        ('color', count * 3),
+        ('opacity', count),
+        ('scale', count * 3),
+        ('rotation', count * 4),
+    ]
+    layout, offset = {}, HEADER_SIZE
+    for name, size in sizes:
+        layout[name] = (offset, size)
+        offset += _pad4(size)
+    return layout, offset
+
+
+def encode_compact(attrs: dict) -> bytes:
+    """
+    Quantize Gaussian attributes (as returned by `trellis.utils.ply_utils.gaussian_attributes`) into the compact format.
+    """
+    xyz, f_dc, opacity, scale, rot = attrs['xyz'], attrs['f_dc'], attrs['opacity'], attrs['scale'], attrs['rot']
+    count = xyz.shape[0]
+    layout, total = _block_layout(count)
+
+    if count > 0:
+        aabb_min, aabb_max = xyz.min(axis=0), xyz.max(axis=0)
+        scale_min, scale_max = float(scale.min()), float(scale.max())
+    else:
+        aabb_min = aabb_max = np.zeros(3, dtype=np.float32)
+        scale_min = scale_max = 0.0
+    extent = np.where(aabb_max > aabb_min, aabb_max - aabb_min, 1.0)
+    scale_extent = scale_max - scale_min if scale_max > scale_min else 1.0
+
+    buf = np.zeros(total, dtype=np.uint8)
+    _HEADER.pack_into(buf, 0, COMPACT_MAGIC, COMPACT_VERSION, 0, count, *aabb_min.tolist(), *aabb_max.tolist(), scale_min, scale_max)
+
+    def block(name, dtype, shape):
+        offset, size = layout[name]
+        return buf[offset:offset + size].view(dtype).reshape(shape)
+
+    block('position', '<u2', (count, 3))[:] = np.rint((xyz - aabb_min) / extent * 65535).clip(0, 65535)
+    block('color', 'u1', (count, 3))[:] = np.rint((0.5 + SH_C0 * f_dc).clip(0, 1) * 255)
+    block('opacity', 'u1', (count,))[:] = np.rint(1 / (1 + np.exp(-opacity.astype(np.float64))) * 255)
+    block('scale', 'u1', (count, 3))[:] = np.rint((scale - scale_min) / scale_extent * 255).clip(0, 255)
+    block('rotation', '<u4', (count,))[:] = pack_quaternions(rot)
+    return buf.tobytes()
+
+
+def decode_compact(data) -> dict:
+    """
+    Dequantize a compact buffer back into Gaussian attributes.
+
+    Returns:
+        dict with xyz, f_dc, opacity (logit), scale (log) and rot (normalized), the same keys as `encode_compact` takes.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    magic, version, _, count, *rest = _HEADER.unpack_from(buf, 0)
+    if magic != COMPACT_MAGIC:
+        raise ValueError('not a compact splat buffer')
+    if version != COMPACT_VERSION:
+        raise ValueError(f'unsupported compact splat version {version}')
+    aabb_min, aabb_max = np.array(rest[0:3], dtype=np.float32), np.array(rest[3:6], dtype=np.float32)
+    scale_min, scale_max = rest[6], rest[7]
+    extent = np.where(aabb_max > aabb_min, aabb_max - aabb_min, 1.0).astype(np.float32)
+    scale_extent = scale_max - scale_min if scale_max > scale_min else 1.0
+    layout, _ = _block_layout(count)
+
+    def block(name, dtype, shape):
+        offset, size = layout[name]
+        return buf[offset:offset + size].view(dtype).reshape(shape)
+
+    alpha = block('opacity', 'u1', (count,)).astype(np.float32) / 255
+    alpha = alpha.clip(0.5 / 255, 1 - 0.5 / 255)
+    return {
+        'xyz': block('position', '<u2', (count, 3)).astype(np.float32) / 65535 * extent + aabb_min,
+        'f_dc': (block('color', 'u1', (count, 3)).astype(np.float32) / 255 - 0.5) / SH_C0,
+        'opacity': np.log(alpha / (1 - alpha)),
+        'scale': block('scale', 'u1', (count, 3)).astype(np.float32) / 255 * scale_extent + scale_min,
+        'rot': unpack_quaternions(block('rotation', '<u4', (count,))),
+    }
+
+
+def convert_ply_to_compact(src_path: str, dst_path: str) -> None:
+    """
+    Convert a Gaussian PLY (as written by `Gaussian.save_ply`) into a compact file.
+    """
+    attrs = gaussian_attributes(memmap_ply_vertices(src_path))
+    with open(dst_path, 'wb') as f:
+        f.write(encode_compact(attrs))
@@ -0,0 +1,117 @@
+"""
+Precompressed sidecar files and Accept-Encoding negotiation.
+"""
+import gzip
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .cache import ConversionCache
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_VERSION = 1
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def _gzip_file(src_path: str, dst_path: str) -> None:
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as raw:
+        # mtime=0 keeps the sidecar byte-identical across rebuilds
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _zstd_file(src_path: str, dst_path: str) -> None:
+    cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        cctx.copy_stream(src, dst)
+
+
+# Supported content codings in order of preference
+ENCODINGS = {}
+if zstandard is not None:
+    ENCODINGS['zstd'] = _zstd_file
+ENCODINGS['gzip'] = _gzip_file
+
+
+def negotiate_encoding(accept_encoding: str, available=None):
+    """
+    Pick a content coding from an `Accept-Encoding` header.
+
+    Returns:
+        The coding name, or None if the identity coding should be sent.
+    """
+    if not accept_encoding:
+        return None
+    available = list(ENCODINGS) if available is None else available
+    qvalues = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+    best, best_q = None, 0.0
+    for name in available:
+        q = qvalues.get(name, qvalues.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class SidecarCompressor:
+    """
+    Builds compressed sidecars of served files on a background worker.
+
+    `lookup` never blocks: if the sidecar does not exist yet it schedules the build and
+    returns None, so the current request is answered uncompressed and later ones get the sidecar.
+
+    Args:
+        cache: the conversion cache holding the sidecars.
+        max_workers: number of background compression threads.
+    """
+    def __init__(self, cache: ConversionCache, max_workers: int = 1):
+        self.cache = cache
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sidecar')
+
+    def lookup(self, src_path: str, encoding: str):
+        """Return the sidecar path for `encoding`, scheduling its build if it does not exist yet."""
+        dst_path = self.cache.lookup(src_path, encoding, SIDECAR_VERSION)
+        if dst_path is None:
+            self.schedule(src_path, encoding)
+        return dst_path
+
+    def schedule(self, src_path: str, encoding: str) -> None:
+        key = (src_path, encoding)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._build, src_path, encoding)
+
+    def _build(self, src_path: str, encoding: str) -> None:
+        try:
+            self.cache.get(src_path, encoding, SIDECAR_VERSION, ENCODINGS[encoding])
+            logger.info('sidecar_built encoding=%s path=%s', encoding, src_path)
+        except Exception:
+            logger.exception('sidecar_failed encoding=%s path=%s', encoding, src_path)
+        finally:
+            with self._lock:
+                self._pending.discard((src_path, encoding))
@@ -0,0 +1,88 @@
+"""
+Prometheus text-format metrics for the viewer server.
+"""
+import bisect
+import threading
+
+# Latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ''
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class ServerMetrics:
+    """
+    Thread-safe request counters, bytes sent, in-flight connections and per-route latency histograms.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._requests = {}         # (route, method, status) -> count
+        self._bytes_sent = {}       # route -> bytes
+        self._latency = {}          # route -> [bucket counts..., +Inf count, sum]
+        self._in_flight = 0
+        self._connections = 0
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self._connections += 1
+
+    def connection_closed(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def observe(self, route: str, method: str, status: int, nbytes: int, seconds: float) -> None:
+        with self._lock:
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._bytes_sent[route] = self._bytes_sent.get(route, 0) + nbytes
+            hist = self._latency.setdefault(route, [0] * (len(self.buckets) + 1) + [0.0])
+            hist[bisect.bisect_left(self.buckets, seconds)] += 1
+            hist[-1] += seconds
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            requests = dict(self._requests)
+            bytes_sent = dict(self._bytes_sent)
+            latency = {k: list(v) for k, v in self._latency.items()}
+            in_flight, connections = self._in_flight, self._connections
+
+        lines = [
+            '# HELP viewer_requests_total HTTP requests handled, by route, method and status.',
+            '# TYPE viewer_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(requests.items()):
+            lines.append(f'viewer_requests_total{_labels(route=route, method=method, status=status)} {count}')
+        lines += [
+            '# HELP viewer_bytes_sent_total Response bytes sent (headers and body), by route.',
+            '# TYPE viewer_bytes_sent_total counter',
+        ]
+        for route, nbytes in sorted(bytes_sent.items()):
+            lines.append(f'viewer_bytes_sent_total{_labels(route=route)} {nbytes}')
+        lines += [
+            '# HELP viewer_connections_in_flight Connections currently being served.',
+            '# TYPE viewer_connections_in_flight gauge',
+            f'viewer_connections_in_flight {in_flight}',
+            '# HELP viewer_connections_total Connections accepted.',
+            '# TYPE viewer_connections_total counter',
+            f'viewer_connections_total {connections}',
+            '# HELP viewer_request_duration_seconds Request latency, by route.',
+            '# TYPE viewer_request_duration_seconds histogram',
+        ]
+        for route, hist in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist):
+                cumulative += count
+                lines.append(f'viewer_request_duration_seconds_bucket{_labels(route=route, le=bound)} {cumulative}')
+            cumulative += hist[len(self.buckets)]
+            lines.append(f'viewer_request_duration_seconds_bucket{_labels(route=route, le="+Inf")} {cumulative}')
+            lines.append(f'viewer_request_duration_seconds_sum{_labels(route=route)} {hist[-1]}')
+            lines.append(f'viewer_request_duration_seconds_count{_labels(route=route)} {cumulative}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,228 @@
+"""
+Registry of the files served by the viewer server.
+
+`server.py` registers a file when a viewer page opens it and serves it as `/serve/<file_id>`;
+the id is a hash of the real path, so no path appears in URLs. The index is a sqlite table
+(`tmp/viewer_registry.sqlite3` by default), shared with `app.py`, which drops a session's
+entries when the session ends.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Callable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id     TEXT PRIMARY KEY,
+    path        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0,
+    registered  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_last_access ON files (last_access);
+"""
+
+
+class FileRegistry:
+    """
+    Bounded, persistent registry of files served by the viewer server.
+
+    Entries live in a local sqlite index so they survive restarts, are evicted least-recently-used
+    beyond `max_entries` and after `ttl` seconds without access, and are dropped as soon as the
+    underlying file disappears (e.g. when `end_session` removes `tmp/<session>`).
+
+    `resolve` is on the hot path of every `/serve` request: it only reads the index, and its hit
+    counts and access times are kept in memory and written in one batch at most every
+    `flush_interval` seconds (and before eviction, `stats` and `close`). The database runs in WAL
+    mode with `synchronous=NORMAL`, so commits do not wait for a disk sync.
+
+    Args:
+        db_path: path of the sqlite index.
+        max_entries: maximum number of registered files.
+        ttl: seconds an entry is kept without being accessed (None keeps entries forever).
+        allowed_roots: only files under these directories can be registered (None allows any file).
+        on_drop: called with the paths of dropped entries (e.g. to drop their converted files).
+        flush_interval: seconds between writes of the pending hit counts and access times.
+    """
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 256,
+        ttl: Optional[float] = 24 * 3600,
+        allowed_roots: Optional[List[str]] = None,
+        on_drop: Optional[Callable[[List[str]], None]] = None,
+        flush_interval: float = 5.0,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_drop = on_drop
+        self.allowed_roots = None if allowed_roots is None else [os.path.realpath(r) for r in allowed_roots]
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # file_id -> (hits, last access) not yet written to the index
+        self._pending = {}
+        self._flushed = time.time()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def file_id(path: str) -> str:
+        return hashlib.md5(path.encode()).hexdigest()[:12]
+
+    def is_allowed(self, path: str) -> bool:
+        if self.allowed_roots is None:
+            return True
+        real_path = os.path.realpath(path)
+        return any(os.path.commonpath([real_path, root]) == root for root in self.allowed_roots)
+
+    def register(self, path: str) -> str:
+        """
+        Register a file and return its id.
+
+        Raises:
+            PermissionError: if the file is outside the allowed roots.
+            FileNotFoundError: if the path does not exist or is not a regular file (e.g. a directory).
+        """
+        path = os.path.realpath(path)
+        if not self.is_allowed(path):
+            raise PermissionError(f"{path} is outside the allowed roots")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        st = os.stat(path)
+        file_id = self.file_id(path)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO files (file_id, path, size, mtime, hits, registered, last_access) VALUES (?, ?, ?, ?, 0, ?, ?) "
+                "ON CONFLICT(file_id) DO UPDATE SET path=excluded.path, size=excluded.size, mtime=excluded.mtime, last_access=excluded.last_access",
+                (file_id, path, st.st_size, st.st_mtime, now, now),
+            )
+            dropped = self._evict(now)
+        self._dropped(dropped)
+        return file_id
+
+    def resolve(self, file_id: str) -> Optional[str]:
+        """
+        Return the path of a registered file and count the hit, or None if it is unknown, expired or gone.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT path, last_access FROM files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is None:
+                return None
+            path, last_access = row
+            last_access = max(last_access, self._pending.get(file_id, (0, 0.0))[1])
+        expired = self.ttl is not None and now - last_access > self.ttl
+        if expired or not os.path.isfile(path):
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+                self._pending.pop(file_id, None)
+            self._dropped([path])
+            return None
+        with self._lock:
+            hits = self._pending.get(file_id, (0, 0.0))[0]
+            self._pending[file_id] = (hits + 1, now)
+            flush = now - self._flushed >= self.flush_interval
+        if flush:
+            self.flush()
+        return path
+
+    def flush(self) -> None:
+        """Write the pending hit counts and access times to the index."""
+        with self._lock, self._conn:
+            self._flush()
+
+    def drop_under(self, directory: str) -> int:
+        """Drop every entry whose file lives under `directory`. Returns the number of dropped entries."""
+        directory = os.path.realpath(directory).rstrip(os.sep) + os.sep
+        pattern = directory.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        with self._lock, self._conn:
+            dropped = self._delete("WHERE path LIKE ? ESCAPE '\\'", (pattern,))
+        self._dropped(dropped)
+        return len(dropped)
+
+    def purge(self) -> int:
+        """Drop expired entries and entries whose file is gone. Returns the number of dropped entries."""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT file_id, path FROM files").fetchall()
+            missing = [(file_id, path) for file_id, path in rows if not os.path.isfile(path)]
+            self._conn.executemany("DELETE FROM files WHERE file_id = ?", [(file_id,) for file_id, _ in missing])
+            for file_id, _ in missing:
+                self._pending.pop(file_id, None)
+            dropped = [path for _, path in missing] + self._evict(time.time())
+        self._dropped(dropped)
+        return len(dropped)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._conn.executemany(
+                "UPDATE files SET hits = hits + ?, last_access = MAX(last_access, ?) WHERE file_id = ?",
+                [(hits, last_access, file_id) for file_id, (hits, last_access) in self._pending.items()],
+            )
+            self._pending.clear()
+        self._flushed = time.time()
+
+    def _evict(self, now: float) -> List[str]:
+        """Delete expired and least recently used entries beyond `max_entries`. Returns their paths."""
+        self._flush()
+        dropped = []
+        if self.ttl is not None:
+            dropped += self._delete("WHERE last_access < ?", (now - self.ttl,))
+        dropped += self._delete(
+            "WHERE file_id IN (SELECT file_id FROM files ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        return dropped
+
+    def _delete(self, where: str, params: tuple) -> List[str]:
+        rows = self._conn.execute(f"SELECT file_id, path FROM files {where}", params).fetchall()
+        if rows:
+            self._conn.execute(f"DELETE FROM files {where}", params)
+        for file_id, _ in rows:
+            self._pending.pop(file_id, None)
+        return [path for _, path in rows]
+
+    def _dropped(self, paths: List[str]) -> None:
+        # Outside the lock: the callback may take its own time (removing files)
+        if paths and self.on_drop is not None:
+            self.on_drop(paths)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Summary of the registry and its entries, most recently used first."""
+        self.purge()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_id, path, size, mtime, hits, registered, last_access FROM files ORDER BY last_access DESC"
+            ).fetchall()
+        entries = [
+            dict(zip(('file_id', 'path', 'size', 'mtime', 'hits', 'registered', 'last_access'), row))
+            for row in rows
+        ]
+        return {
+            'entries': len(entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'total_size': sum(e['size'] for e in entries),
+            'total_hits': sum(e['hits'] for e in entries),
+            'files': entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            with self._conn:
+                self._flush()
+            self._conn.close()
@@ -0,0 +1,183 @@
+"""
+Uniform-grid spatial index over the Gaussian centers of a served PLY.
+
+The index stores the occupied cells (sorted linear ids), the start of each cell in a
+cell-sorted row permutation, and the grid geometry. It is built with vectorized NumPy and
+persisted next to the PLY as `<ply>.grid.npz`, tagged with the PLY's mtime and size.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from trellis.utils.ply_utils import memmap_ply_vertices
+
+logger = logging.getLogger(__name__)
+
+GRID_VERSION = 1
+# Target number of Gaussians per occupied cell
+GRID_POINTS_PER_CELL = 16
+GRID_MAX_RESOLUTION = 1024
+
+
+class GridIndex:
+    """
+    Uniform grid over points. Rows of a cell are `order[starts[i]:starts[i + 1]]` for the i-th occupied cell `cells[i]`.
+    """
+    def __init__(self, aabb_min, cell_size, resolution, cells, starts, order):
+        self.aabb_min = np.asarray(aabb_min, dtype=np.float64)
+        self.cell_size = np.asarray(cell_size, dtype=np.float64)
+        self.resolution = np.asarray(resolution, dtype=np.int64)
+        self.cells = cells
+        self.starts = starts
+        self.order = order
+
+    @classmethod
+    def build(cls, xyz: np.ndarray) -> "GridIndex":
+        xyz = np.asarray(xyz, dtype=np.float64)
+        count = xyz.shape[0]
+        if count == 0:
+            return cls(np.zeros(3), np.ones(3), np.ones(3, np.int64), np.zeros(0, np.int64), np.zeros(1, np.int64), np.zeros(0, np.int64))
+        aabb_min, aabb_max = xyz.min(axis=0), xyz.max(axis=0)
+        res = int(np.clip(np.round(np.cbrt(count / GRID_POINTS_PER_CELL)), 1, GRID_MAX_RESOLUTION))
+        resolution = np.full(3, res, dtype=np.int64)
+        extent = np.maximum(aabb_max - aabb_min, 1e-9)
+        cell_size = extent / resolution
+        ijk = np.clip(((xyz - aabb_min) / cell_size).astype(np.int64), 0, resolution - 1)
+        linear = (ijk[:, 0] * resolution[1] + ijk[:, 1]) * resolution[2] + ijk[:, 2]
+        order = np.argsort(linear, kind='stable')
+        cells, counts = np.unique(linear[order], return_counts=True)
+        starts = np.concatenate([[0], np.cumsum(counts)])
+        index_dtype = np.int32 if count < 2**31 else np.int64
+        return cls(aabb_min, cell_size, resolution, cells, starts, order.astype(index_dtype))
+
+    def save(self, path: str, src_mtime_ns: int, src_size: int) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        try:
+            np.savez(
+                tmp_path,
+                version=GRID_VERSION, src_mtime_ns=src_mtime_ns, src_size=src_size,
+                aabb_min=self.aabb_min, cell_size=self.cell_size, resolution=self.resolution,
+                cells=self.cells, starts=self.starts, order=self.order,
+            )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str, src_mtime_ns: int, src_size: int):
+        """Load a persisted index, or return None if it is missing or stale."""
+        try:
+            with np.load(path) as data:
+                if (int(data['version']) != GRID_VERSION or int(data['src_mtime_ns']) != src_mtime_ns
+                        or int(data['src_size']) != src_size):
+                    return None
+                return cls(data['aabb_min'], data['cell_size'], data['resolution'], data['cells'], data['starts'], data['order'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def cell_bounds(self):
+        """Lower and upper corners [M, 3] of the occupied cells."""
+        r = self.resolution
+        ijk = np.stack([self.cells // (r[1] * r[2]), (self.cells // r[2]) % r[1], self.cells % r[2]], axis=1)
+        lo = self.aabb_min + ijk * self.cell_size
+        return lo, lo + self.cell_size
+
+    def rows_of(self, selected: np.ndarray) -> np.ndarray:
+        """Concatenated rows of the selected occupied cells, in ascending row order."""
+        begins, ends = self.starts[selected], self.starts[selected + 1]
+        lengths = ends - begins
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        # Vectorized concatenation of the ranges [begin, end)
+        offsets = np.repeat(begins - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return np.sort(self.order[offsets + np.arange(total)])
+
+    def candidates_aabb(self, lo, hi) -> np.ndarray:
+        cell_lo, cell_hi = self.cell_bounds()
+        hit = np.all((cell_hi >= lo) & (cell_lo <= hi), axis=1)
+        return self.rows_of(np.nonzero(hit)[0])
+
+    def candidates_planes(self, planes) -> np.ndarray:
+        cell_lo, cell_hi = self.cell_bounds()
+        hit = np.ones(len(self.cells), dtype=bool)
+        for plane in planes:
+            # The box is outside if its corner furthest along the normal is behind the plane
+            corner = np.where(plane[:3] >= 0, cell_hi, cell_lo)
+            hit &= corner @ plane[:3] + plane[3] >= 0
+        return self.rows_of(np.nonzero(hit)[0])
+
+
+def frustum_planes(view_proj, margin: float = 0.0) -> np.ndarray:
+    """
+    Inward-facing planes [6, 4] of an OpenGL-style 4x4 view-projection matrix (row-major, clip = M @ [x, y, z, 1]),
+    pushed outwards by `margin` world units.
+    """
+    m = np.asarray(view_proj, dtype=np.float64).reshape(4, 4)
+    planes = np.stack([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+    norms = np.linalg.norm(planes[:, :3], axis=1, keepdims=True).clip(min=1e-12)
+    planes = planes / norms
+    planes[:, 3] += margin
+    return planes
+
+
+def _xyz(vertices: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    selected = vertices[rows]
+    return np.stack([selected['x'], selected['y'], selected['z']], axis=1).astype(np.float64)
+
+
+class SpatialIndexCache:
+    """
+    Builds, persists and keeps in memory the grid indexes of served PLYs.
+
+    Args:
+        max_entries: number of indexes kept in memory.
+    """
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def index_path(ply_path: str) -> str:
+        return f"{ply_path}.grid.npz"
+
+    def get(self, ply_path: str) -> GridIndex:
+        st = os.stat(ply_path)
+        key = (ply_path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+        index = GridIndex.load(self.index_path(ply_path), st.st_mtime_ns, st.st_size)
+        if index is None:
+            vertices = memmap_ply_vertices(ply_path)
+            index = GridIndex.build(_xyz(vertices, slice(None)))
+            try:
+                index.save(self.index_path(ply_path), st.st_mtime_ns, st.st_size)
+            except OSError as e:
+                logger.warning('spatial_index_not_persisted path=%s error=%s', ply_path, e)
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def query_aabb(self, ply_path: str, lo, hi) -> np.ndarray:
+        """Rows (ascending) whose center lies in the box [lo, hi]."""
+        lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+        rows = self.get(ply_path).candidates_aabb(lo, hi)
+        xyz = _xyz(memmap_ply_vertices(ply_path), rows)
+        return rows[np.all((xyz >= lo) & (xyz <= hi), axis=1)]
+
+    def query_frustum(self, ply_path: str, view_proj, margin: float = 0.0) -> np.ndarray:
+        """Rows (ascending) whose center lies inside the frustum of `view_proj`."""
+        planes = frustum_planes(view_proj, margin)
+        rows = self.get(ply_path).candidates_planes(planes)
+        xyz = _xyz(memmap_ply_vertices(ply_path), rows)
+        return rows[np.all(xyz @ planes[:, :3].T + planes[:, 3] >= 0, axis=1)]
@@ -1,6 +1,26 @@
-from . import models
-from . import modules
-from . import pipelines
-from . import renderers
-from . import representations
-from . import utils
+import importlib
+
+# Subpackages are imported on first access so that `import trellis` (or any of its
+# submodules) does not pull in every model, renderer and CUDA extension up front
+__submodules = ['models', 'modules', 'pipelines', 'renderers', 'representations', 'utils']
+
+__all__ = __submodules
+
+def __getattr__(name):
+    if name not in globals():
+        if name in __submodules:
+            module = importlib.import_module(f".{name}", __name__)
+            globals()[name] = module
+        else:
+            raise AttributeError(f"module {__name__} has no attribute {name}")
+    return globals()[name]
+
+
+# For Pylance
+if __name__ == '__main__':
+    from . import models
+    from . import modules
+    from . import pipelines
+    from . import renderers
+    from . import representations
+    from . import utils
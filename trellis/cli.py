@@ -0,0 +1,202 @@
+"""
+Headless command line entry points.
+
+    python -m trellis.cli reconstruct <scene_dir> -o <output_dir> [--workers N]
+
+`reconstruct` turns every scene feature file (`.npz` with `patchtokens` and `indices`) in
+`scene_dir` into `<output_dir>/<scene>/sample.ply`, `sample.mp4` and `meta.json`. Finished
+scenes are appended to `<output_dir>/manifest.jsonl`; rerunning the same command skips scenes
+whose manifest entry is done, whose source file is unchanged and whose outputs still exist, so
+interrupted runs resume where they stopped.
+
+    python -m trellis.cli convert-scenes <scene_dir> [--store DIR]
+
+`convert-scenes` prebuilds the memory-mapped scene feature store (see
+`trellis.utils.scene_store`) so the first request for each scene skips the conversion.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import functools
+from typing import *
+
+# Same spconv algorithm as app.py; spawned workers inherit it before importing trellis
+os.environ.setdefault('SPCONV_ALGO', 'native')
+
+MANIFEST_NAME = 'manifest.jsonl'
+DEFAULT_CKPT_DIR = './pretrained_ckpts/slat_vae_128_mv'
+
+
+def source_signature(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def read_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest manifest record per scene. A truncated last line (interrupted write) is ignored.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['scene']] = record
+    return records
+
+
+def append_manifest(path: str, record: Dict[str, Any]) -> None:
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def is_complete(record: Optional[Dict[str, Any]], scene_file: str) -> bool:
+    if record is None or record.get('status') != 'done':
+        return False
+    if record.get('source') != source_signature(scene_file):
+        return False
+    return all(os.path.exists(p) for p in (record['ply_path'], record['video_path']))
+
+
+def reconstruct(args) -> int:
+    from .utils.job_queue import create_job_queue, JobFailed, JobCancelled
+    from .pipelines.gaussian_vae import load_gaussian_vae, reconstruct_job
+
+    scene_files = sorted(glob.glob(os.path.join(args.scene_dir, args.pattern)))
+    if not scene_files:
+        print(f"No scene files matching {args.pattern} in {args.scene_dir}", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = read_manifest(manifest_path)
+
+    todo = []
+    for scene_file in scene_files:
+        scene = os.path.splitext(os.path.basename(scene_file))[0]
+        if not args.force and is_complete(manifest.get(scene), scene_file):
+            continue
+        if not args.retry_failed and manifest.get(scene, {}).get('status') == 'failed' \
+                and manifest[scene].get('source') == source_signature(scene_file):
+            continue
+        todo.append((scene, scene_file))
+    print(f"{len(scene_files)} scenes, {len(scene_files) - len(todo)} already processed, {len(todo)} to run with {args.workers} {args.backend} worker(s)")
+    if not todo:
+        return 0
+
+    job_queue = create_job_queue(
+        args.backend,
+        functools.partial(
+            load_gaussian_vae,
+            cfg_file=os.path.join(args.ckpt_dir, 'config.json'),
+            encoder_ckpt_file=os.path.join(args.ckpt_dir, args.encoder_ckpt),
+            decoder_ckpt_file=os.path.join(args.ckpt_dir, args.decoder_ckpt),
+            tile_size=args.tile_size,
+            tile_halo=args.tile_halo,
+        ),
+        reconstruct_job,
+        num_workers=args.workers,
+        max_pending=len(todo),
+    )
+    pending = {}
+    for scene, scene_file in todo:
+        scene_dir = os.path.join(args.output_dir, scene)
+        os.makedirs(scene_dir, exist_ok=True)
+        job = job_queue.submit({
+            'scene_feature_filepath': scene_file,
+            'output_dir': scene_dir,
+            'num_frames': args.num_frames,
+            'fps': args.fps,
+        })
+        pending[job.job_id] = (scene, scene_file, job, time.time())
+
+    num_failed = 0
+    finished = 0
+    try:
+        while pending:
+            for job_id, (scene, scene_file, job, submitted) in list(pending.items()):
+                if not job.finished:
+                    continue
+                del pending[job_id]
+                finished += 1
+                record = {'scene': scene, 'source_file': scene_file, 'source': source_signature(scene_file), 'finished_at': time.time()}
+                try:
+                    result = job.wait()
+                except (JobFailed, JobCancelled) as e:
+                    num_failed += 1
+                    record.update(status='failed', error=str(e) or type(e).__name__)
+                    print(f"[{finished}/{len(todo)}] {scene} failed: {record['error']}", file=sys.stderr)
+                else:
+                    record.update(status='done', wall_seconds=record['finished_at'] - submitted, **result)
+                    with open(os.path.join(os.path.dirname(result['ply_path']), 'meta.json'), 'w') as f:
+                        json.dump(record, f, indent=2)
+                    print(f"[{finished}/{len(todo)}] {scene}: {result['num_gaussians']} Gaussians, " +
+                          ', '.join(f"{k} {v:.2f}s" for k, v in result['timings'].items()))
+                append_manifest(manifest_path, record)
+            if pending:
+                time.sleep(0.2)
+    except KeyboardInterrupt:
+        print(f"Interrupted with {len(pending)} scene(s) unfinished; rerun the same command to resume.", file=sys.stderr)
+        return 130
+    finally:
+        job_queue.shutdown()
+    return 1 if num_failed else 0
+
+
+def convert_scenes(args) -> int:
+    from .utils.scene_store import SceneFeatureStore
+
+    scene_files = sorted(glob.glob(os.path.join(args.scene_dir, args.pattern)))
+    if not scene_files:
+        print(f"No scene files matching {args.pattern} in {args.scene_dir}", file=sys.stderr)
+        return 1
+    store = SceneFeatureStore(args.store) if args.store else SceneFeatureStore()
+    for i, scene_file in enumerate(scene_files):
+        t0 = time.time()
+        entry_dir = store.convert(scene_file, force=args.force)
+        print(f"[{i + 1}/{len(scene_files)}] {scene_file} -> {entry_dir} ({time.time() - t0:.2f}s)")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m trellis.cli')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('reconstruct', help='reconstruct Gaussians, PLYs and turntable videos for a directory of scenes')
+    p.add_argument('scene_dir', help='directory of scene feature .npz files')
+    p.add_argument('-o', '--output-dir', required=True, help='output directory (one subdirectory per scene plus the manifest)')
+    p.add_argument('--pattern', default='*.npz', help='glob for scene files inside scene_dir')
+    p.add_argument('--workers', type=int, default=1, help='number of worker processes, each holding its own copy of the model')
+    p.add_argument('--backend', choices=['process', 'local'], default='process', help='run workers as processes or as threads of this process')
+    p.add_argument('--ckpt-dir', default=DEFAULT_CKPT_DIR)
+    p.add_argument('--encoder-ckpt', default='encoder_step0010000.pt', help='encoder checkpoint file inside --ckpt-dir')
+    p.add_argument('--decoder-ckpt', default='decoder_step0010000.pt', help='decoder checkpoint file inside --ckpt-dir')
+    p.add_argument('--num-frames', type=int, default=120, help='turntable video frames')
+    p.add_argument('--fps', type=int, default=15)
+    p.add_argument('--tile-size', type=int, default=None, help='encode/decode in spatial tiles of this many voxels per side to bound memory (default: $SLAT_TILE_SIZE or whole scenes)')
+    p.add_argument('--tile-halo', type=int, default=None, help='context around each tile in voxels; smaller than the exact halo is approximate but saves memory (default: $SLAT_TILE_HALO or exact)')
+    p.add_argument('--force', action='store_true', help='reprocess scenes already marked done in the manifest')
+    p.add_argument('--retry-failed', action='store_true', help='retry scenes whose last attempt failed')
+    p.set_defaults(func=reconstruct)
+
+    p = subparsers.add_parser('convert-scenes', help='convert scene .npz files into the memory-mapped scene feature store')
+    p.add_argument('scene_dir', help='directory of scene feature .npz files')
+    p.add_argument('--store', default=None, help='scene store directory (default: $SCENE_STORE_DIR or tmp/scene_store in the repository)')
+    p.add_argument('--pattern', default='*.npz', help='glob for scene files inside scene_dir')
+    p.add_argument('--force', action='store_true', help='reconvert scenes that are already current')
+    p.set_defaults(func=convert_scenes)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -43,7 +43,7 @@ def from_pretrained(path: str, **kwargs):
     """
     import os
     import json
-    from safetensors.torch import load_file
+    from ..utils.checkpoint_utils import load_model
     is_local = os.path.exists(f"{path}.json") and os.path.exists(f"{path}.safetensors")
 
     if is_local:
@@ -59,8 +59,8 @@ def from_pretrained(path: str, **kwargs):
 
     with open(config_file, 'r') as f:
         config = json.load(f)
-    model = __getattr__(config['name'])(**config['args'], **kwargs)
-    model.load_state_dict(load_file(model_file), strict=False)
+    # Meta-initialized and filled from the memory-mapped file, so the weights are allocated once
+    model, _ = load_model(lambda: __getattr__(config['name'])(**config['args'], **kwargs), model_file, device='cpu')
 
     return model
 
@@ -24,6 +24,35 @@ def block_attn_config(self):
             yield "windowed", self.window_size, None, self.window_size // 2 * (i % 2), None
 
 
+def spatial_tiles(coords: torch.Tensor, tile_size: int, halo: int) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+    """
+    Split sparse voxels into cubic tiles of `tile_size` voxels per side, each extended by
+    `halo` voxels of context on every side.
+
+    Args:
+        coords: [N x 4] (batch, x, y, z) voxel coordinates, in [0, 1023].
+        tile_size: side of a tile core, in voxels.
+        halo: context added around each core, in voxels.
+
+    Yields:
+        (indices, core): the rows of a tile, context included, in ascending order, and a mask
+        of the rows among them that the tile owns. Every row is owned by exactly one tile.
+    """
+    coords = coords.long()
+    cells = coords[:, 1:] // tile_size
+    keys = ((coords[:, 0] * 1024 + cells[:, 0]) * 1024 + cells[:, 1]) * 1024 + cells[:, 2]
+    # Voxels sorted by (batch, x): the x range of a tile is a contiguous slab
+    slab_keys, order = torch.sort(coords[:, 0] * 1024 + coords[:, 1])
+    for key in torch.unique(keys).tolist():
+        batch, cell = key >> 30, torch.tensor([(key >> 20) & 1023, (key >> 10) & 1023, key & 1023], device=coords.device)
+        lo, hi = cell * tile_size - halo, (cell + 1) * tile_size + halo
+        start, stop = torch.searchsorted(slab_keys, torch.stack([batch * 1024 + lo[0].clamp(min=0), batch * 1024 + hi[0].clamp(max=1024)])).tolist()
+        slab = order[start:stop]
+        inside = ((coords[slab, 2:] >= lo[1:]) & (coords[slab, 2:] < hi[1:])).all(dim=-1)
+        indices = slab[inside].sort().values
+        yield indices, keys[indices] == key
+
+
 class SparseTransformerBase(nn.Module):
     """
     Sparse Transformer without output layers.
@@ -129,6 +158,58 @@ class SparseTransformerBase(nn.Module):
                     nn.init.constant_(module.bias, 0)
         self.apply(_basic_init)
 
+    def tile_halo(self) -> int:
+        """
+        Context, in voxels per side, that a spatial tile needs for its core voxels to come out
+        as in a pass over the whole scene. Each swin block mixes voxels less than `window_size`
+        apart, so the receptive field grows by `window_size - 1` per block.
+        """
+        assert self.attn_mode == "swin", f"Tiled inference needs local (swin) attention, got {self.attn_mode}"
+        return self.num_blocks * (self.window_size - 1)
+
+    def forward_tiled(
+        self,
+        fn: Callable[[sp.SparseTensor], sp.SparseTensor],
+        x: sp.SparseTensor,
+        tile_size: int,
+        halo: Optional[int] = None,
+    ) -> sp.SparseTensor:
+        """
+        Run `fn`, a network with one output per input voxel, over `x` one spatial tile at a
+        time (see `spatial_tiles`) and keep each tile's output for the voxels it owns. Peak
+        memory follows the size of a tile and its halo instead of the whole scene.
+
+        When a tile with its halo (`tile_size + 2 * halo` voxels per side) spans every scene of
+        `x`, tiling would only repeat the full pass per tile, so `x` is run in one pass.
+
+        Args:
+            fn: the network, e.g. the model up to its output layer.
+            x: the input, one or more scenes.
+            tile_size: side of a tile core, in voxels.
+            halo: context around each tile, in voxels. Defaults to `tile_halo()`, which matches
+                a full pass; a smaller halo trades accuracy near tile borders for memory.
+        """
+        halo = self.tile_halo() if halo is None else halo
+        if x.feats.shape[0] == 0:
+            return fn(x)
+        extent = max(
+            int((x.coords[s, 1:].max(dim=0).values - x.coords[s, 1:].min(dim=0).values).max()) + 1
+            for s in x.layout if s.stop > s.start
+        )
+        if tile_size + 2 * halo >= extent:
+            print(f"[{type(self).__name__}] tile of {tile_size} + 2 x {halo} halo voxels spans the scene "
+                  f"({extent} voxels), running it in one pass; use a smaller halo or a larger scene to save memory")
+            return fn(x)
+        out = None
+        for indices, core in spatial_tiles(x.coords, tile_size, halo):
+            coords = x.coords[indices].clone()
+            coords[:, 0] = 0
+            h = fn(sp.SparseTensor(feats=x.feats[indices], coords=coords)).feats
+            if out is None:
+                out = h.new_empty(x.feats.shape[0], *h.shape[1:])
+            out[indices[core]] = h[core]
+        return x.replace(out)
+
     def forward(self, x: sp.SparseTensor) -> sp.SparseTensor:
         h = self.input_layer(x)
         if self.pe_mode == "ape":
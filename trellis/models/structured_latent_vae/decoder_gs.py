@@ -1,4 +1,4 @@
-from typing import List, Literal, Optional
+from typing import Literal, Optional, Tuple
 
 import torch
 import torch.nn as nn
@@ -7,7 +7,7 @@ import torch.nn.functional as F
 from trellis.models.sparse_elastic_mixin import SparseTransformerElasticMixin
 from trellis.models.structured_latent_vae.base import SparseTransformerBase
 from trellis.modules import sparse as sp
-from trellis.representations import Gaussian
+from trellis.representations import Gaussian, GaussianBatch
 from trellis.utils.random_utils import hammersley_sequence
 from trellis.modules.utils import convert_module_to_f16, convert_module_to_f32, zero_module
 from trellis.modules.sparse.linear import SparseLinear
@@ -213,70 +213,86 @@ class SLatGaussianDecoder(SparseTransformerBase):
             start += v["size"]
         self.out_channels = start
 
-    def to_representation(self, x: sp.SparseTensor) -> List[Gaussian]:
+    def to_representation(self, x: sp.SparseTensor) -> GaussianBatch:
         """
         Convert a batch of network outputs to 3D representations.
 
+        All scenes are converted at once: every voxel yields `num_gaussians` splats, so the
+        splats of scene `i` are the rows `x.layout[i]` scaled by `num_gaussians`. Each attribute
+        is a view of its output channels, materialized once by the `lr` scaling.
+
         Args:
             x: The [N x * x C] sparse tensor output by the network.
-            voxel_occs: The voxel occupancy tensor.
 
         Returns:
-            list of representations
+            the Gaussians of all scenes, one entry per batch item
         """
-        ret = []
-        for i in range(x.shape[0]):
-            representation = Gaussian(
-                sh_degree=0,
-                aabb=[-0.5, -0.5, -0.5, 1.0, 1.0, 1.0],
-                mininum_kernel_size=self.rep_config["3d_filter_kernel_size"],
-                scaling_bias=self.rep_config["scaling_bias"],
-                opacity_bias=self.rep_config["opacity_bias"],
-                scaling_activation=self.rep_config["scaling_activation"],
-                scaling_max=self.rep_config["scaling_max"],
-            )
-            # convert xyz to [0, 1]
-            xyz = (x.coords[x.layout[i]][:, 1:].float() + 0.5) / self.resolution
-            for k, v in self.layout.items():
-                if k == "_xyz":
-                    offset = x.feats[x.layout[i]][:, v["range"][0] : v["range"][1]].reshape(-1, *v["shape"])
-                    offset = offset * self.rep_config["lr"][k]
+        representation = Gaussian(
+            sh_degree=0,
+            aabb=[-0.5, -0.5, -0.5, 1.0, 1.0, 1.0],
+            mininum_kernel_size=self.rep_config["3d_filter_kernel_size"],
+            scaling_bias=self.rep_config["scaling_bias"],
+            opacity_bias=self.rep_config["opacity_bias"],
+            scaling_activation=self.rep_config["scaling_activation"],
+            scaling_max=self.rep_config["scaling_max"],
+            device=x.feats.device,
+        )
+        feats = x.feats
+        # Without autograd, the xyz offsets are transformed in place
+        inplace = not (torch.is_grad_enabled() and feats.requires_grad)
+        for k, v in self.layout.items():
+            # [N x G x ...] view of the attribute's channels; scaling by lr is its only copy
+            attr = feats[:, v["range"][0] : v["range"][1]].view(feats.shape[0], *v["shape"]) * self.rep_config["lr"][k]
+            if k == "_xyz":
+                # voxel centers in [0, 1] plus offsets bounded to the voxel
+                center = ((x.coords[:, 1:].float() + 0.5) / self.resolution).unsqueeze(1)
+                scale = 0.5 * self.rep_config["voxel_size"] / self.resolution
+                if inplace:
                     if self.rep_config["perturb_offset"]:
-                        offset = offset + self.offset_perturbation
-                    offset = torch.tanh(offset) / self.resolution * 0.5 * self.rep_config["voxel_size"]
-                    # print(f"[SLatGaussianDecoder:to_representation] offset min: {offset.min().item()}, max: {offset.max().item()}, mean: {offset.mean().item()}")
-                    _xyz = xyz.unsqueeze(1) + offset
-                    setattr(representation, k, _xyz.flatten(0, 1))
-                    # print(f"[SLatGaussianDecoder:to_representation] xyz: {_xyz.flatten(0, 1).shape}")
+                        attr.add_(self.offset_perturbation)
+                    attr = attr.tanh_().mul_(scale).add_(center)
                 else:
-                    feats = x.feats[x.layout[i]][:, v["range"][0] : v["range"][1]].reshape(-1, *v["shape"]).flatten(0, 1)
-                    feats = feats * self.rep_config["lr"][k]
-                    # if k == "_scaling":
-                    #     feats = feats.clamp(max=self.rep_config["scaling_max"])
-                        # # we set _scaling range to [-inf, inf], and GaussianModel will handle the activation and clamp
-                        # print(
-                        #     f"[SLatGaussianDecoder:to_representation] _scaling min: {feats.min().item()}, max: {feats.max().item()}, mean: {feats.mean().item()}"
-                        # )
-                    # if k == "_opacity":
-                    #     print(
-                    #         f"[SLatGaussianDecoder:to_representation] _opacity min: {feats.min().item()}, max: {feats.max().item()}, mean: {feats.mean().item()}"
-                    #     )
-                    # if k == "_rotation":
-                    #     print(f"[SLatGaussianDecoder:to_representation] _rotation shape: {feats.shape}, min: {feats.min().item()}, max: {feats.max().item()}, mean: {feats.mean().item()}")
-                    setattr(representation, k, feats)
-                    # print(f"[SLatGaussianDecoder:to_representation] {k}: {feats.shape}")
-            ret.append(representation)
-        return ret
-
-    def forward(self, x: sp.SparseTensor, x_mask: Optional[torch.tensor] = None) -> List[Gaussian]:
-        # if x_mask is not None:
-        #     print(f"[SLatGaussianDecoder:forward] x shape: {x.shape}, x_mask shape: {x_mask.shape}")
+                    if self.rep_config["perturb_offset"]:
+                        attr = attr + self.offset_perturbation
+                    attr = torch.tanh(attr) * scale + center
+            # we set _scaling range to [-inf, inf], and GaussianModel will handle the activation and clamp
+            setattr(representation, k, attr.flatten(0, 1))
+        num_gaussians = self.rep_config["num_gaussians"]
+        layout = [slice(s.start * num_gaussians, s.stop * num_gaussians) for s in x.layout]
+        return GaussianBatch(representation, layout)
+
+    def _forward_feats(self, x: sp.SparseTensor) -> sp.SparseTensor:
         h = super().forward(x)
         # for block in self.upsample:
         #     h = block(h)
         h = h.type(x.dtype)
         h = h.replace(F.layer_norm(h.feats, h.feats.shape[-1:]))
         h = self.out_layer(h)
+        return h
+
+    def forward(
+        self,
+        x: sp.SparseTensor,
+        x_mask: Optional[torch.tensor] = None,
+        tile_size: Optional[int] = None,
+        tile_halo: Optional[int] = None,
+    ) -> Tuple[GaussianBatch, sp.SparseTensor]:
+        """
+        Decode latents to Gaussians.
+
+        Args:
+            x: the structured latents.
+            tile_size: if given, decode in spatial tiles of this many voxels per side (see
+                `forward_tiled`).
+            tile_halo: context around each tile, in voxels. Defaults to `tile_halo()`, which
+                matches decoding the whole scene.
+        """
+        # if x_mask is not None:
+        #     print(f"[SLatGaussianDecoder:forward] x shape: {x.shape}, x_mask shape: {x_mask.shape}")
+        if tile_size is None:
+            h = self._forward_feats(x)
+        else:
+            h = self.forward_tiled(self._forward_feats, x, tile_size, tile_halo)
         # print(f"[SLatGaussianDecoder:forward] h shape: {h.shape}, h feats: {h.feats.shape}, h coords: {h.coords.shape}")
         return self.to_representation(h), h
 
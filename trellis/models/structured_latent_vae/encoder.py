@@ -56,12 +56,27 @@ class SLatEncoder(SparseTransformerBase):
         nn.init.constant_(self.out_layer.weight, 0)
         nn.init.constant_(self.out_layer.bias, 0)
 
-    def forward(self, x: sp.SparseTensor, sample_posterior=True, return_raw=False):
+    def _forward_feats(self, x: sp.SparseTensor) -> sp.SparseTensor:
         h = super().forward(x)
         h = h.type(x.dtype)
         h = h.replace(F.layer_norm(h.feats, h.feats.shape[-1:]))
         h = self.out_layer(h)
-        
+        return h
+
+    def forward(
+        self,
+        x: sp.SparseTensor,
+        sample_posterior=True,
+        return_raw=False,
+        tile_size: Optional[int] = None,
+        tile_halo: Optional[int] = None,
+    ):
+        # tile_size / tile_halo: encode in spatial tiles of this many voxels per side (see `forward_tiled`)
+        if tile_size is None:
+            h = self._forward_feats(x)
+        else:
+            h = self.forward_tiled(self._forward_feats, x, tile_size, tile_halo)
+
         # Sample from the posterior distribution
         mean, logvar = h.feats.chunk(2, dim=-1)
         if sample_posterior:
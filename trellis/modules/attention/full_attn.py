@@ -2,11 +2,13 @@ from typing import *
 import torch
 import math
 from . import DEBUG, BACKEND
+from ...utils.lazy_import import lazy_import
 
+# Kernels are imported on first use: flash_attn / xformers load large CUDA libraries
 if BACKEND == 'xformers':
-    import xformers.ops as xops
+    xops = lazy_import('xformers.ops')
 elif BACKEND == 'flash_attn':
-    import flash_attn
+    flash_attn = lazy_import('flash_attn')
 elif BACKEND == 'sdpa':
     from torch.nn.functional import scaled_dot_product_attention as sdpa
 elif BACKEND == 'naive':
@@ -22,9 +22,17 @@ class RotaryPositionEmbedder(nn.Module):
         self.hidden_size = hidden_size
         self.in_channels = in_channels
         self.freq_dim = hidden_size // in_channels // 2
-        self.freqs = torch.arange(self.freq_dim, dtype=torch.float32) / self.freq_dim
-        self.freqs = 1.0 / (10000 ** self.freqs)
-        
+        # Derived from the config, so kept out of checkpoints
+        self.register_buffer("freqs", torch.empty(self.freq_dim), persistent=False)
+        self.reset_buffers()
+
+    def reset_buffers(self) -> None:
+        """
+        Compute the non-persistent buffers (on their current device).
+        """
+        freqs = torch.arange(self.freq_dim, dtype=torch.float32, device=self.freqs.device) / self.freq_dim
+        self.freqs = 1.0 / (10000 ** freqs)
+
     def _get_phases(self, indices: torch.Tensor) -> torch.Tensor:
         self.freqs = self.freqs.to(indices.device)
         phases = torch.outer(indices, self.freqs)
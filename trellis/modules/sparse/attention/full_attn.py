@@ -2,11 +2,13 @@ from typing import *
 import torch
 from .. import SparseTensor
 from .. import DEBUG, ATTN
+from ....utils.lazy_import import lazy_import
 
+# Kernels are imported on first use: flash_attn / xformers load large CUDA libraries
 if ATTN == 'xformers':
-    import xformers.ops as xops
+    xops = lazy_import('xformers.ops')
 elif ATTN == 'flash_attn':
-    import flash_attn
+    flash_attn = lazy_import('flash_attn')
 else:
     raise ValueError(f"Unknown attention module: {ATTN}")
 
@@ -14,9 +14,17 @@ class AbsolutePositionEmbedder(nn.Module):
         self.channels = channels
         self.in_channels = in_channels
         self.freq_dim = channels // in_channels // 2
-        self.freqs = torch.arange(self.freq_dim, dtype=torch.float32) / self.freq_dim
-        self.freqs = 1.0 / (10000 ** self.freqs)
-        
+        # Derived from the config, so kept out of checkpoints
+        self.register_buffer("freqs", torch.empty(self.freq_dim), persistent=False)
+        self.reset_buffers()
+
+    def reset_buffers(self) -> None:
+        """
+        Compute the non-persistent buffers (on their current device).
+        """
+        freqs = torch.arange(self.freq_dim, dtype=torch.float32, device=self.freqs.device) / self.freq_dim
+        self.freqs = 1.0 / (10000 ** freqs)
+
     def _sin_cos_embedding(self, x: torch.Tensor) -> torch.Tensor:
         """
         Create sinusoidal position embeddings.
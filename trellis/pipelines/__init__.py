@@ -1,4 +1,5 @@
 from . import samplers
+from .gaussian_vae import GaussianVAE
 
 def from_pretrained(path: str):
     """
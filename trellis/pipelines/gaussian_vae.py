@@ -0,0 +1,253 @@
+import os
+import json
+import time
+from typing import *
+
+import torch
+from easydict import EasyDict as edict
+
+from .. import models
+from ..modules import sparse as sp
+from ..representations import GaussianBatch
+from ..utils.checkpoint_utils import load_model
+from ..utils.scene_store import SceneFeatureStore
+
+# Encode and decode in spatial tiles of this many voxels per side (unset: whole scenes)
+DEFAULT_TILE_SIZE = int(os.environ['SLAT_TILE_SIZE']) if os.environ.get('SLAT_TILE_SIZE') else None
+# Context around each tile in voxels (unset: the exact halo of each model, see `tile_halo`)
+DEFAULT_TILE_HALO = int(os.environ['SLAT_TILE_HALO']) if os.environ.get('SLAT_TILE_HALO') else None
+
+
+def default_cache_params() -> Dict[str, Any]:
+    """
+    `GaussianVAE.cache_params` of a pipeline built with the default settings, for callers that
+    key results without holding the pipeline (e.g. the app, whose workers own it).
+    """
+    return {'tile_size': DEFAULT_TILE_SIZE, 'tile_halo': DEFAULT_TILE_HALO}
+
+
+class GaussianVAE(torch.nn.Module):
+    """
+    Structured-latent VAE that reconstructs Gaussians from voxelized scene features.
+
+    `tile_size` bounds the memory of large scenes: the encoder and decoder then run over
+    spatial tiles of that many voxels per side (see `SparseTransformerBase.forward_tiled`).
+    `tile_halo` is the context around each tile; by default it is the exact receptive field,
+    which matches a pass over the whole scene but only saves memory on scenes much wider than
+    it. Default to `SLAT_TILE_SIZE` and `SLAT_TILE_HALO`.
+    """
+    def __init__(
+        self,
+        cfg_file: str,
+        encoder_ckpt_file: str,
+        decoder_ckpt_file: str,
+        tile_size: Optional[int] = None,
+        tile_halo: Optional[int] = None,
+    ):
+        super().__init__()
+        self.tile_size = tile_size if tile_size is not None else DEFAULT_TILE_SIZE
+        self.tile_halo = tile_halo if tile_halo is not None else DEFAULT_TILE_HALO
+        # Files that determine the model output, hashed into the result cache key
+        self.checkpoint_files = [cfg_file, encoder_ckpt_file, decoder_ckpt_file]
+        train_cfg = edict(json.load(open(cfg_file, "r")))
+        # Built on the meta device and filled from memory-mapped safetensors, directly on the GPU
+        encoder: models.ElasticSLatEncoder = self._load(train_cfg.models.encoder, encoder_ckpt_file)
+        decoder: models.ElasticSLatGaussianDecoder = self._load(train_cfg.models.decoder, decoder_ckpt_file)
+        self.encoder = encoder
+        self.decoder = decoder
+
+    def cache_params(self) -> Dict[str, Any]:
+        """
+        Settings besides the checkpoints that change the output (a halo below the exact receptive
+        field changes the decoded Gaussians), to include in result cache keys.
+        """
+        return {'tile_size': self.tile_size, 'tile_halo': self.tile_halo}
+
+    @staticmethod
+    def _load(model_cfg: edict, ckpt_file: str, device: str = 'cuda') -> torch.nn.Module:
+        model, stats = load_model(lambda: getattr(models, model_cfg.name)(**model_cfg.args), ckpt_file, device=device)
+        print(f"Loaded {model_cfg.name} from {ckpt_file} in {stats['seconds']:.2f}s "
+              f"(init: {stats['init']}, RSS +{stats['rss_mb']:.0f} MB, peak RSS {stats['peak_rss_mb']:.0f} MB, "
+              f"{len(stats['missing_keys'])} missing / {len(stats['unexpected_keys'])} unexpected keys)")
+        return model.eval()
+
+    def encode(self, feats: sp.SparseTensor) -> sp.SparseTensor:
+        structure_latent, _, _ = self.encoder(feats, sample_posterior=True, return_raw=True, tile_size=self.tile_size, tile_halo=self.tile_halo)
+        print(f"Encoded latent code: {structure_latent.shape}")
+        assert torch.isfinite(structure_latent.feats).all(), "Non-finite latent"
+        return structure_latent
+
+    def decode(self, structure_latent: sp.SparseTensor) -> GaussianBatch:
+        decoded_gaussians: GaussianBatch = self.decoder(structure_latent, tile_size=self.tile_size, tile_halo=self.tile_halo)[0]
+        print(f"Decoded gaussians: {len(decoded_gaussians)} scenes, {decoded_gaussians.num_gaussians} splats")
+        return decoded_gaussians
+
+    def forward(self, feats: sp.SparseTensor) -> Tuple[sp.SparseTensor, GaussianBatch]:
+        structure_latent = self.encode(feats)
+        decoded_gaussians = self.decode(structure_latent)
+        return structure_latent, decoded_gaussians
+
+    def run(self, feats: sp.SparseTensor) -> GaussianBatch:
+        _, decoded_gaussians = self.forward(feats)
+        return decoded_gaussians
+
+    def run_batch(self, scenes: List[sp.SparseTensor], max_batch_voxels: Optional[int] = None) -> GaussianBatch:
+        """
+        Reconstruct several scenes with one encoder and decoder pass per batch.
+
+        Args:
+            scenes: single-scene sparse tensors, e.g. from `load_scene_features`.
+            max_batch_voxels: if given, scenes are packed greedily into batches of at most
+                this many voxels (a larger scene still runs on its own).
+
+        Returns:
+            the Gaussians of the input scenes, in input order.
+        """
+        return GaussianBatch.cat([self.run(batch_scene_features(batch)) for batch in pack_scenes(scenes, max_batch_voxels)])
+
+
+_scene_store = None
+
+
+def scene_store() -> SceneFeatureStore:
+    """Process-wide scene feature store (root from `SCENE_STORE_DIR`)."""
+    global _scene_store
+    if _scene_store is None:
+        _scene_store = SceneFeatureStore()
+    return _scene_store
+
+
+def load_scene_features(scene_feature_filepath: str, store: Optional[SceneFeatureStore] = None) -> sp.SparseTensor:
+    """
+    Load the voxelized features of a scene (`patchtokens` and `indices`) as a single-scene SparseTensor.
+
+    The `.npz` is converted once into the scene store; afterwards the tensor is a zero-copy
+    view of memory-mapped arrays.
+    """
+    feats = (store or scene_store()).get(scene_feature_filepath)
+    print(f"Loading scene features from {scene_feature_filepath}. feats shape: {tuple(feats.feats.shape)}, coords shape: {tuple(feats.coords.shape)}")
+    return feats
+
+
+def batch_scene_features(scenes: List[sp.SparseTensor]) -> sp.SparseTensor:
+    """
+    Pack scenes into one SparseTensor, scene `i` becoming batch index `i`.
+    """
+    if len(scenes) == 1:
+        return scenes[0]
+    return sp.sparse_cat(scenes)
+
+
+def pack_scenes(scenes: List[sp.SparseTensor], max_batch_voxels: Optional[int] = None) -> List[List[sp.SparseTensor]]:
+    """
+    Split scenes, in order, into consecutive batches of at most `max_batch_voxels` voxels.
+    """
+    if max_batch_voxels is None:
+        return [scenes] if scenes else []
+    batches, batch, num_voxels = [], [], 0
+    for scene in scenes:
+        if batch and num_voxels + scene.feats.shape[0] > max_batch_voxels:
+            batches.append(batch)
+            batch, num_voxels = [], 0
+        batch.append(scene)
+        num_voxels += scene.feats.shape[0]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def reconstruct_scene(
+    pipeline: GaussianVAE,
+    scene_feature_filepath: str,
+    output_dir: str,
+    num_frames: int = 120,
+    fps: int = 15,
+    progress: Optional[Callable[..., None]] = None,
+) -> Dict[str, Any]:
+    """
+    Reconstruct a scene and write its turntable video and Gaussian PLY.
+
+    Args:
+        pipeline: the Gaussian VAE.
+        scene_feature_filepath: the `.npz` file with the scene's `patchtokens` and `indices`.
+        output_dir: directory receiving `sample.mp4` and `sample.ply`.
+        num_frames: number of turntable frames.
+        fps: frame rate of the video.
+        progress: called as `progress(stage, **fields)` before each of the stages
+            `encode`, `decode`, `render`, `encode_video` and `save_ply`.
+
+    Returns:
+        dict with `video_path`, `ply_path`, `num_gaussians` and per-stage `timings` in seconds.
+    """
+    from ..utils import render_utils
+    from ..utils.video_utils import VideoStreamWriter
+
+    progress = progress or (lambda stage, **fields: None)
+    timings = {}
+
+    def stage(name, **fields):
+        progress(name, **fields)
+        timings[name] = time.perf_counter()
+
+    def end(name):
+        timings[name] = time.perf_counter() - timings[name]
+
+    feats = load_scene_features(scene_feature_filepath).cuda()
+    with torch.no_grad():
+        stage('encode')
+        structure_latent = pipeline.encode(feats)
+        end('encode')
+        stage('decode', num_voxels=structure_latent.feats.shape[0])
+        gs = pipeline.decode(structure_latent)[0]
+        end('decode')
+
+    # Render video, encoding frames on a background thread as they are rendered
+    stage('render', num_frames=num_frames)
+    video_path = os.path.join(output_dir, 'sample.mp4')
+    with VideoStreamWriter(video_path, fps=fps) as writer:
+        for frame in render_utils.render_video_stream(gs, num_frames=num_frames):
+            writer.write(frame)
+        end('render')
+        # Leaving the block drains the frames still queued for the encoder
+        stage('encode_video')
+    end('encode_video')
+
+    # Save Gaussians as PLY files
+    stage('save_ply', num_gaussians=gs.get_xyz.shape[0])
+    ply_path = os.path.join(output_dir, 'sample.ply')
+    gs.save_ply(ply_path)
+    end('save_ply')
+
+    num_gaussians = gs.get_xyz.shape[0]
+    del gs, structure_latent, feats
+    torch.cuda.empty_cache()
+    return {'video_path': video_path, 'ply_path': ply_path, 'num_gaussians': num_gaussians, 'timings': timings}
+
+
+def load_gaussian_vae(
+    cfg_file: str,
+    encoder_ckpt_file: str,
+    decoder_ckpt_file: str,
+    tile_size: Optional[int] = None,
+    tile_halo: Optional[int] = None,
+) -> GaussianVAE:
+    """
+    Job-queue `worker_init`: build the Gaussian VAE in the worker.
+    Use with `functools.partial` so it stays picklable for process workers.
+    """
+    pipeline = GaussianVAE(
+        cfg_file=cfg_file,
+        encoder_ckpt_file=encoder_ckpt_file,
+        decoder_ckpt_file=decoder_ckpt_file,
+        tile_size=tile_size,
+        tile_halo=tile_halo,
+    )
+    pipeline.cuda()
+    return pipeline
+
+
+def reconstruct_job(pipeline: GaussianVAE, payload: Dict[str, Any], progress: Callable[..., None]) -> Dict[str, Any]:
+    """
+    Job-queue `worker_fn`: `payload` holds the keyword arguments of `reconstruct_scene`.
+    """
+    return reconstruct_scene(pipeline, progress=progress, **payload)
@@ -8,7 +8,7 @@ from .classifier_free_guidance_mixin import ClassifierFreeGuidanceSamplerMixin
 from .guidance_interval_mixin import GuidanceIntervalSamplerMixin
 import math
 from trellis.modules.spatial import patchify, unpatchify
-from trellis.utils import render_utils, postprocessing_utils
+from trellis.utils import render_utils
 from trellis.utils import loss_utils
 import trellis.modules.sparse as sp
 import torch.nn.functional as F
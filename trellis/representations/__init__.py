@@ -1,3 +1,34 @@
-from .gaussian import Gaussian
-from .mesh import MeshExtractResult
-from .octree import DfsOctree as Octree
\ No newline at end of file
+import importlib
+
+__attributes = {
+    'Gaussian': ('gaussian', 'Gaussian'),
+    'CompactGaussian': ('gaussian', 'CompactGaussian'),
+    'GaussianIndex': ('gaussian', 'GaussianIndex'),
+    'GaussianBatch': ('gaussian', 'GaussianBatch'),
+    'MeshExtractResult': ('mesh', 'MeshExtractResult'),
+    'Octree': ('octree', 'DfsOctree'),
+}
+
+__submodules = ['gaussian', 'mesh', 'octree']
+
+__all__ = list(__attributes.keys()) + __submodules
+
+def __getattr__(name):
+    if name not in globals():
+        if name in __attributes:
+            module_name, attr_name = __attributes[name]
+            module = importlib.import_module(f".{module_name}", __name__)
+            globals()[name] = getattr(module, attr_name)
+        elif name in __submodules:
+            module = importlib.import_module(f".{name}", __name__)
+            globals()[name] = module
+        else:
+            raise AttributeError(f"module {__name__} has no attribute {name}")
+    return globals()[name]
+
+
+# For Pylance
+if __name__ == '__main__':
+    from .gaussian import Gaussian, CompactGaussian, GaussianIndex, GaussianBatch
+    from .mesh import MeshExtractResult
+    from .octree import DfsOctree as Octree
@@ -1 +1,4 @@
-from .gaussian_model import Gaussian
\ No newline at end of file
+from .gaussian_model import Gaussian
+from .compact import CompactGaussian
+from .gaussian_index import GaussianIndex
+from .gaussian_batch import GaussianBatch
@@ -0,0 +1,194 @@
+from typing import *
+
+import torch
+
+from trellis.representations.gaussian.general_utils import build_scaling_rotation, strip_symmetric
+from trellis.utils.quaternion_utils import QUAT_MAX, QUAT_RANGE
+
+
+def pack_rotations(rotation: torch.Tensor) -> torch.Tensor:
+    """
+    Pack (N, 4) quaternions on their device, with the bit layout of
+    `trellis.utils.quaternion_utils.pack_quaternions` (the viewer's compact format).
+    The uint32 words are kept as int32 with the same bits.
+    """
+    q = torch.nn.functional.normalize(rotation.detach().float(), dim=-1)
+    largest = q.abs().argmax(dim=-1)
+    # q and -q are the same rotation: make the dropped component positive
+    q = q * torch.where(q.gather(1, largest[:, None]) < 0, -1.0, 1.0)
+    keep = torch.arange(4, device=q.device)[None, :] != largest[:, None]
+    rest = q[keep].reshape(-1, 3)
+    rest = ((rest / QUAT_RANGE * 0.5 + 0.5).clamp(0, 1) * QUAT_MAX).round().long()
+    packed = (largest << 30) | (rest[:, 0] << 20) | (rest[:, 1] << 10) | rest[:, 2]
+    return torch.where(packed >= 1 << 31, packed - (1 << 32), packed).to(torch.int32)
+
+
+def unpack_rotations(packed: torch.Tensor) -> torch.Tensor:
+    """Inverse of `pack_rotations`: (N,) int32 -> (N, 4) float32 unit quaternions, on the device."""
+    packed = packed.long() & 0xFFFFFFFF
+    largest = packed >> 30
+    rest = torch.stack([(packed >> 20) & QUAT_MAX, (packed >> 10) & QUAT_MAX, packed & QUAT_MAX], dim=-1)
+    rest = (rest.float() / QUAT_MAX * 2 - 1) * QUAT_RANGE
+    q = torch.empty(packed.shape[0], 4, dtype=torch.float32, device=packed.device)
+    keep = torch.arange(4, device=packed.device)[None, :] != largest[:, None]
+    q[keep] = rest.reshape(-1)
+    q.scatter_(1, largest[:, None], (1 - rest.square().sum(dim=-1, keepdim=True)).clamp(min=0).sqrt())
+    return torch.nn.functional.normalize(q, dim=-1)
+
+
+def palette_quantize(values: torch.Tensor, size: int = 256, iters: int = 8, chunk: int = 1 << 18, seed: int = 0) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    K-means palette of `values` (N, C).
+
+    Returns:
+        (palette, index): float32 (size, C) palette and uint8 (N,) index into it.
+    """
+    values = values.float()
+    n = values.shape[0]
+    generator = torch.Generator(device="cpu").manual_seed(seed)
+    palette = values[torch.randperm(n, generator=generator)[:size].to(values.device)].clone()
+    if palette.shape[0] < size:
+        palette = torch.cat([palette, palette[:1].expand(size - palette.shape[0], -1)], dim=0)
+
+    def assign():
+        return torch.cat([torch.cdist(values[i:i + chunk], palette).argmin(dim=-1) for i in range(0, n, chunk)])
+
+    for _ in range(iters):
+        index = assign()
+        counts = torch.bincount(index, minlength=size).float()
+        sums = torch.zeros_like(palette).index_add_(0, index, values)
+        # Empty clusters keep their previous color
+        filled = counts > 0
+        palette[filled] = sums[filled] / counts[filled, None]
+    return palette, assign().to(torch.uint8)
+
+
+class CompactGaussian:
+    """
+    Storage-compact, read-only form of a `Gaussian` (see `Gaussian.to_compact`).
+
+    Attributes are kept activated, as a structure of arrays:
+
+        xyz       int16 (N, 3)    16-bit fixed point over the splats' bounding box
+        features  fp16 (N, 1, 3) DC, or uint8 (N,) index into a fp16 (256, 3) palette
+        rest      fp16 (N, SH - 1, 3) higher-order SH, if any
+        opacity   uint8 (N, 1)
+        scaling   fp16 (N, 3), log of the scale
+        rotation  int32 (N,), packed unit quaternion (see `pack_rotations`)
+
+    That is 23 bytes per SH0 splat (18 with the palette) against 56 for the float32 `Gaussian`.
+    The `get_*` properties decode to float32 on the fly and match the `Gaussian` getters, so
+    the renderer can draw a `CompactGaussian` directly.
+    """
+    def __init__(
+        self,
+        init_params: Dict[str, Any],
+        xyz: torch.Tensor,
+        xyz_range: torch.Tensor,
+        features_dc: torch.Tensor,
+        features_rest: Optional[torch.Tensor],
+        opacity: torch.Tensor,
+        scaling: torch.Tensor,
+        rotation: torch.Tensor,
+        palette: Optional[torch.Tensor] = None,
+    ):
+        self.init_params = init_params
+        self.sh_degree = init_params["sh_degree"]
+        self.active_sh_degree = self.sh_degree
+        self.xyz = xyz
+        self.xyz_range = xyz_range
+        self.features_dc = features_dc
+        self.features_rest = features_rest
+        self.opacity = opacity
+        self.scaling = scaling
+        self.rotation = rotation
+        self.palette = palette
+
+    @classmethod
+    def from_gaussian(cls, gaussian: "Gaussian", palette: bool = False) -> "CompactGaussian":
+        with torch.no_grad():
+            xyz = gaussian.get_xyz.float()
+            if xyz.shape[0] > 0:
+                lo, hi = xyz.min(dim=0).values, xyz.max(dim=0).values
+            else:
+                lo = hi = torch.zeros(3, device=xyz.device)
+            extent = (hi - lo).clamp(min=1e-12)
+            xyz = ((xyz - lo) / extent * 65535).round().clamp(0, 65535)
+            # uint16 lacks kernels on some backends: keep the 16 bits as offset int16
+            xyz = (xyz.to(torch.int32) - 32768).to(torch.int16)
+
+            features_dc = gaussian._features_dc.float()
+            colors = None
+            if palette:
+                colors, features_dc = palette_quantize(features_dc.reshape(features_dc.shape[0], -1))
+                colors = colors.half()
+            else:
+                features_dc = features_dc.half()
+            features_rest = gaussian._features_rest.half() if gaussian._features_rest is not None else None
+
+            opacity = (gaussian.get_opacity.float() * 256).floor().clamp(0, 255).to(torch.uint8)
+            scaling = torch.log(gaussian.get_scaling.float().clamp(min=1e-12)).half()
+            rotation = pack_rotations(gaussian.get_rotation)
+        return cls(
+            dict(gaussian.init_params), xyz, torch.stack([lo, extent]), features_dc, features_rest,
+            opacity, scaling, rotation, palette=colors,
+        )
+
+    def to_gaussian(self, device=None) -> "Gaussian":
+        from .gaussian_model import Gaussian
+        device = device or self.device
+        gaussian = Gaussian(**self.init_params, device=device)
+        gaussian.from_compact(self)
+        return gaussian
+
+    @property
+    def device(self) -> torch.device:
+        return self.xyz.device
+
+    @property
+    def num_gaussians(self) -> int:
+        return self.xyz.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        tensors = [self.xyz, self.xyz_range, self.features_dc, self.features_rest, self.opacity, self.scaling, self.rotation, self.palette]
+        return sum(t.numel() * t.element_size() for t in tensors if t is not None)
+
+    @property
+    def get_xyz(self):
+        xyz = self.xyz.to(torch.int32) + 32768
+        return xyz.float() / 65535 * self.xyz_range[1] + self.xyz_range[0]
+
+    @property
+    def get_features_dc(self):
+        if self.palette is not None:
+            return self.palette.float()[self.features_dc.long()].reshape(-1, 1, 3)
+        return self.features_dc.float()
+
+    @property
+    def get_features(self):
+        features_dc = self.get_features_dc
+        return torch.cat((features_dc, self.features_rest.float()), dim=1) if self.features_rest is not None else features_dc
+
+    @property
+    def get_opacity(self):
+        return (self.opacity.float() + 0.5) / 256
+
+    @property
+    def get_scaling(self):
+        return torch.exp(self.scaling.float())
+
+    @property
+    def get_rotation(self):
+        return unpack_rotations(self.rotation)
+
+    def get_covariance(self, scaling_modifier=1):
+        L = build_scaling_rotation(scaling_modifier * self.get_scaling, self.get_rotation)
+        return strip_symmetric(L @ L.transpose(1, 2))
+
+    def to(self, device: torch.device) -> "CompactGaussian":
+        for name in ["xyz", "xyz_range", "features_dc", "features_rest", "opacity", "scaling", "rotation", "palette"]:
+            value = getattr(self, name)
+            if value is not None:
+                setattr(self, name, value.to(device))
+        return self
@@ -0,0 +1,129 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+import torch
+
+from trellis.representations.gaussian.gaussian_model import Gaussian
+from trellis.utils.ply_utils import write_ply
+
+
+class GaussianBatch:
+    """
+    Gaussians of several scenes packed into one set of concatenated tensors.
+
+    The splats of all scenes live in a single `Gaussian` (`flat`), scene `i` owning the rows
+    `layout[i]`, like `SparseTensor.layout`. Indexing returns a `Gaussian` whose tensors are
+    views of those rows (no copy). The `get_*` activations run over all scenes at once.
+
+    Args:
+        flat: Gaussian holding the splats of every scene, scene after scene.
+        layout: row slice of each scene in `flat`.
+    """
+    def __init__(self, flat: Gaussian, layout: List[slice]):
+        self.flat = flat
+        self.layout = layout
+
+    @classmethod
+    def from_gaussians(cls, gaussians: List[Gaussian]) -> "GaussianBatch":
+        """Concatenate Gaussians sharing the same parameters into a batch."""
+        assert len(gaussians) > 0, "Cannot batch zero Gaussians"
+        flat = Gaussian(**gaussians[0].init_params, device=gaussians[0].device)
+        for name in ["_xyz", "_features_dc", "_features_rest", "_scaling", "_rotation", "_opacity"]:
+            values = [getattr(g, name) for g in gaussians]
+            setattr(flat, name, torch.cat(values) if values[0] is not None else None)
+        layout, start = [], 0
+        for g in gaussians:
+            layout.append(slice(start, start + g._xyz.shape[0]))
+            start += g._xyz.shape[0]
+        return cls(flat, layout)
+
+    @classmethod
+    def cat(cls, batches: List["GaussianBatch"]) -> "GaussianBatch":
+        """Concatenate batches, keeping their scenes in order."""
+        if len(batches) == 1:
+            return batches[0]
+        batch = cls.from_gaussians([b.flat for b in batches])
+        batch.layout = [
+            slice(offset.start + s.start, offset.start + s.stop)
+            for offset, b in zip(batch.layout, batches) for s in b.layout
+        ]
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.layout)
+
+    def __getitem__(self, i: int) -> Gaussian:
+        rows = self.layout[i]
+        flat = self.flat
+        gaussian = Gaussian(**flat.init_params, device=flat.device)
+        gaussian._xyz = flat._xyz[rows]
+        gaussian._features_dc = flat._features_dc[rows]
+        gaussian._features_rest = flat._features_rest[rows] if flat._features_rest is not None else None
+        gaussian._scaling = flat._scaling[rows]
+        gaussian._rotation = flat._rotation[rows]
+        gaussian._opacity = flat._opacity[rows]
+        return gaussian
+
+    def __iter__(self) -> Iterator[Gaussian]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def unbind(self) -> List[Gaussian]:
+        return list(self)
+
+    @property
+    def device(self):
+        return self.flat.device
+
+    @property
+    def num_gaussians(self) -> List[int]:
+        return [s.stop - s.start for s in self.layout]
+
+    @property
+    def offsets(self) -> torch.Tensor:
+        """(B + 1,) row offsets: scene `i` owns rows `offsets[i]:offsets[i + 1]`."""
+        return torch.tensor([0] + [s.stop for s in self.layout], dtype=torch.long, device=self.flat._xyz.device)
+
+    @property
+    def batch_ids(self) -> torch.Tensor:
+        """(N,) scene index of every splat."""
+        counts = torch.tensor(self.num_gaussians, device=self.flat._xyz.device)
+        return torch.repeat_interleave(torch.arange(len(self), device=counts.device), counts)
+
+    @property
+    def get_xyz(self):
+        return self.flat.get_xyz
+
+    @property
+    def get_features(self):
+        return self.flat.get_features
+
+    @property
+    def get_scaling(self):
+        return self.flat.get_scaling
+
+    @property
+    def get_rotation(self):
+        return self.flat.get_rotation
+
+    @property
+    def get_opacity(self):
+        return self.flat.get_opacity
+
+    def to(self, device: torch.device = None, dtype: torch.dtype = None) -> "GaussianBatch":
+        self.flat.to(device, dtype)
+        return self
+
+    def save_ply(self, paths: List[str], transform=[[1, 0, 0], [0, 0, -1], [0, 1, 0]], max_workers: Optional[int] = None):
+        """
+        Write one PLY per scene. The attributes of all scenes are assembled and copied to
+        the host in one go (see `Gaussian.ply_attributes`); the files are written by a
+        thread pool.
+        """
+        assert len(paths) == len(self), f"Expected {len(self)} paths, got {len(paths)}"
+        attributes = self.flat.ply_attributes(transform)
+        names = self.flat.construct_list_of_attributes()
+        max_workers = max_workers or min(len(paths), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda args: write_ply(args[0], attributes[args[1]], names), zip(paths, self.layout)))
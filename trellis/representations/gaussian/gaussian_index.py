@@ -0,0 +1,212 @@
+from typing import *
+
+import torch
+
+from trellis.representations.gaussian.general_utils import build_rotation
+
+
+_MORTON_BITS = 21
+
+
+def _spread_bits(x: torch.Tensor) -> torch.Tensor:
+    """Insert two zero bits between each of the low 21 bits of `x` (int64)."""
+    x = x & 0x1FFFFF
+    x = (x | (x << 32)) & 0x1F00000000FFFF
+    x = (x | (x << 16)) & 0x1F0000FF0000FF
+    x = (x | (x << 8)) & 0x100F00F00F00F00F
+    x = (x | (x << 4)) & 0x10C30C30C30C30C3
+    x = (x | (x << 2)) & 0x1249249249249249
+    return x
+
+
+def morton_codes(points: torch.Tensor, lo: torch.Tensor, hi: torch.Tensor) -> torch.Tensor:
+    """63-bit Morton codes of (N, 3) points quantized to 21 bits per axis over the box [lo, hi]."""
+    scale = (1 << _MORTON_BITS) - 1
+    q = ((points - lo) / (hi - lo).clamp(min=1e-12) * scale).clamp(0, scale).long()
+    return (_spread_bits(q[:, 0]) << 2) | (_spread_bits(q[:, 1]) << 1) | _spread_bits(q[:, 2])
+
+
+def gaussian_extents(gaussian: "Gaussian", sigma: float = 3.0) -> torch.Tensor:
+    """Half size (N, 3) of the axis-aligned box holding each splat's `sigma` ellipsoid."""
+    R = build_rotation(gaussian.get_rotation)
+    return sigma * (R * gaussian.get_scaling[:, None, :]).norm(dim=-1)
+
+
+def frustum_planes(extrinsics: torch.Tensor, intrinsics: torch.Tensor, near: float, far: float) -> torch.Tensor:
+    """
+    World-space planes (6, 4) of a camera frustum, in the renderer's convention (OpenCV
+    world-to-camera extrinsics, normalized intrinsics). A point p is inside when
+    `n . p + d >= 0` for every plane (n, d).
+    """
+    fx, fy, cx, cy = intrinsics[0, 0], intrinsics[1, 1], intrinsics[0, 2], intrinsics[1, 2]
+    zero, one = torch.zeros_like(fx), torch.ones_like(fx)
+    planes = torch.stack([
+        torch.stack([zero, zero, one, -near * one]),
+        torch.stack([zero, zero, -one, far * one]),
+        torch.stack([fx, zero, cx, zero]),              # u >= 0
+        torch.stack([-fx, zero, 1 - cx, zero]),         # u <= 1
+        torch.stack([zero, fy, cy, zero]),              # v >= 0
+        torch.stack([zero, -fy, 1 - cy, zero]),         # v <= 1
+    ])
+    R, t = extrinsics[:3, :3], extrinsics[:3, 3]
+    return torch.cat([planes[:, :3] @ R, (planes[:, 3] + planes[:, :3] @ t)[:, None]], dim=1)
+
+
+class GaussianIndex:
+    """
+    Spatial index over the splats of a `Gaussian`.
+
+    Splats are sorted along a Morton curve of their centers. A bounding volume hierarchy is
+    built over the sorted order: leaves hold `leaf_size` consecutive splats, and each upper
+    level merges pairs of nodes. Node boxes bound the splats' `sigma`-ellipsoid boxes (see
+    `gaussian_extents`). Queries walk the hierarchy one level at a time, testing all
+    candidate nodes in one batched op per level.
+
+    The index is rebuilt on the next query after the Gaussian's attributes change (see
+    `Gaussian.version`).
+
+    Args:
+        gaussian: the splats to index.
+        leaf_size: splats per leaf.
+        sigma: extent of each splat, in standard deviations.
+        reorder: permute the Gaussian's tensors in place into Morton order, so that nearby
+            splats are also close in memory (see `reorder`).
+    """
+    def __init__(self, gaussian: "Gaussian", leaf_size: int = 32, sigma: float = 3.0, reorder: bool = False):
+        self.gaussian = gaussian
+        self.leaf_size = leaf_size
+        self.sigma = sigma
+        self.build()
+        if reorder:
+            self.reorder()
+
+    @torch.no_grad()
+    def build(self):
+        xyz = self.gaussian.get_xyz.detach().float()
+        extents = gaussian_extents(self.gaussian, self.sigma).detach().float()
+        self.bounds = torch.stack([xyz.min(dim=0).values, xyz.max(dim=0).values])
+        codes = morton_codes(xyz, self.bounds[0], self.bounds[1])
+        self.codes, self.order = torch.sort(codes)
+        self.centers = xyz[self.order]
+        self.boxes_lo = self.centers - extents[self.order]
+        self.boxes_hi = self.centers + extents[self.order]
+
+        # Leaves: `leaf_size` consecutive sorted splats, padded with empty boxes
+        num_leaves = max(1, -(-xyz.shape[0] // self.leaf_size))
+        pad = num_leaves * self.leaf_size - xyz.shape[0]
+        lo = torch.cat([self.boxes_lo, self.boxes_lo.new_full((pad, 3), float('inf'))])
+        hi = torch.cat([self.boxes_hi, self.boxes_hi.new_full((pad, 3), float('-inf'))])
+        level = (lo.reshape(num_leaves, self.leaf_size, 3).amin(dim=1), hi.reshape(num_leaves, self.leaf_size, 3).amax(dim=1))
+        self.levels = [level]
+        while level[0].shape[0] > 1:
+            lo, hi = level
+            if lo.shape[0] % 2:
+                lo = torch.cat([lo, lo.new_full((1, 3), float('inf'))])
+                hi = torch.cat([hi, hi.new_full((1, 3), float('-inf'))])
+            level = (lo.reshape(-1, 2, 3).amin(dim=1), hi.reshape(-1, 2, 3).amax(dim=1))
+            self.levels.append(level)
+        # Root first
+        self.levels.reverse()
+        self.version = self.gaussian.version
+
+    def _ensure_current(self):
+        if self.version != self.gaussian.version:
+            self.build()
+
+    def reorder(self) -> torch.Tensor:
+        """
+        Permute the Gaussian's attributes into Morton order, in place, and return the
+        permutation applied (new position -> old index).
+        """
+        self._ensure_current()
+        order = self.order
+        gaussian = self.gaussian
+        for name in ["_xyz", "_features_dc", "_features_rest", "_scaling", "_rotation", "_opacity"]:
+            value = getattr(gaussian, name)
+            if value is not None:
+                setattr(gaussian, name, value[order])
+        self.order = torch.arange(order.shape[0], device=order.device)
+        self.version = gaussian.version
+        return order
+
+    def _traverse(self, num_queries: int, test: Callable) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Walk the hierarchy for `num_queries` queries at once. `test(query, lo, hi)` tells, for
+        each (query, box) pair, whether the box can hold a match.
+
+        Returns:
+            (query, splat): matching pairs, splat indices into the Gaussian.
+        """
+        self._ensure_current()
+        device = self.centers.device
+        query = torch.arange(num_queries, device=device)
+        node = torch.zeros(num_queries, dtype=torch.long, device=device)
+        for depth, (lo, hi) in enumerate(self.levels):
+            keep = test(query, lo[node], hi[node])
+            query, node = query[keep], node[keep]
+            if depth + 1 < len(self.levels):
+                size = self.levels[depth + 1][0].shape[0]
+                query = query.repeat_interleave(2)
+                node = (node[:, None] * 2 + torch.arange(2, device=device)).reshape(-1)
+                query, node = query[node < size], node[node < size]
+        # Leaves -> splats
+        query = query.repeat_interleave(self.leaf_size)
+        splat = (node[:, None] * self.leaf_size + torch.arange(self.leaf_size, device=device)).reshape(-1)
+        valid = splat < self.centers.shape[0]
+        query, splat = query[valid], splat[valid]
+        keep = test(query, self.boxes_lo[splat], self.boxes_hi[splat])
+        return query[keep], self.order[splat[keep]]
+
+    @torch.no_grad()
+    def query_aabb(self, lo: torch.Tensor, hi: torch.Tensor) -> torch.Tensor:
+        """Indices (sorted) of the splats whose box intersects the axis-aligned box [lo, hi]."""
+        lo = torch.as_tensor(lo, dtype=torch.float32, device=self.centers.device)
+        hi = torch.as_tensor(hi, dtype=torch.float32, device=self.centers.device)
+        test = lambda query, node_lo, node_hi: ((node_lo <= hi) & (node_hi >= lo)).all(dim=-1)
+        return self._traverse(1, test)[1].sort().values
+
+    @torch.no_grad()
+    def query_frustum(self, extrinsics: torch.Tensor, intrinsics: torch.Tensor, near: float = 0.1, far: float = 100.0) -> torch.Tensor:
+        """Indices (sorted) of the splats whose box intersects the camera frustum."""
+        planes = frustum_planes(extrinsics.float(), intrinsics.float(), near, far).to(self.centers.device)
+        normals, offsets = planes[:, :3], planes[:, 3]
+
+        def test(query, node_lo, node_hi):
+            center, half = (node_lo + node_hi) / 2, (node_hi - node_lo) / 2
+            # Farthest box corner along each normal is on the inner side of every plane
+            reach = center @ normals.T + offsets + half @ normals.abs().T
+            return (reach >= 0).all(dim=-1)
+        return self._traverse(1, test)[1].sort().values
+
+    @torch.no_grad()
+    def knn(self, points: torch.Tensor, k: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        The `k` splat centers nearest to each of the (M, 3) `points`.
+
+        Returns:
+            (distances, indices): (M, k) each, nearest first.
+        """
+        self._ensure_current()
+        points = points.to(self.centers.device, torch.float32)
+        n = self.centers.shape[0]
+        assert 0 < k <= n, f"k must be in [1, {n}], got {k}"
+
+        # Search radius: k-th distance among the 2k splats around each point on the Morton curve
+        window = min(2 * k, n)
+        start = torch.searchsorted(self.codes, morton_codes(points, self.bounds[0], self.bounds[1])) - k
+        start = start.clamp(0, n - window)
+        neighbors = start[:, None] + torch.arange(window, device=points.device)
+        radius = (self.centers[neighbors] - points[:, None]).norm(dim=-1).kthvalue(k, dim=-1).values
+        lo, hi = points - radius[:, None], points + radius[:, None]
+
+        test = lambda query, node_lo, node_hi: ((node_lo <= hi[query]) & (node_hi >= lo[query])).all(dim=-1)
+        query, splat = self._traverse(points.shape[0], test)
+        dist = (self.gaussian.get_xyz.detach().float()[splat] - points[query]).norm(dim=-1)
+        # Group candidates per query, nearest first, and keep the first k of each group
+        perm = dist.argsort(stable=True)
+        perm = perm[query[perm].argsort(stable=True)]
+        query, dist, splat = query[perm], dist[perm], splat[perm]
+        counts = torch.bincount(query, minlength=points.shape[0])
+        rank = torch.arange(query.shape[0], device=query.device) - (torch.cumsum(counts, 0) - counts)[query]
+        keep = rank < k
+        return dist[keep].reshape(-1, k), splat[keep].reshape(-1, k)
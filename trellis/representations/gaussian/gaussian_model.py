@@ -1,16 +1,44 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
 import numpy as np
 import torch
-import utils3d
-from plyfile import PlyData, PlyElement
 
+from trellis.utils.ply_utils import write_ply, memmap_ply_vertices, indexed_fields, read_columns
 from trellis.representations.gaussian.general_utils import (
     build_scaling_rotation,
     inverse_sigmoid,
     strip_symmetric,
 )
 
+if TYPE_CHECKING:
+    from trellis.representations.gaussian.compact import CompactGaussian
+
+
+class _TrackedAttribute:
+    """Tensor attribute whose assignment bumps `Gaussian.version` and drops cached activations."""
+    def __set_name__(self, owner, name):
+        self.slot = "_tracked" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.__dict__.get(self.slot)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.slot] = value
+        obj.version += 1
+        obj._activation_cache.clear()
+
 
 class Gaussian:
+    _xyz = _TrackedAttribute()
+    _features_dc = _TrackedAttribute()
+    _features_rest = _TrackedAttribute()
+    _scaling = _TrackedAttribute()
+    _rotation = _TrackedAttribute()
+    _opacity = _TrackedAttribute()
+
     def __init__(
         self,
         aabb: list,
@@ -43,6 +71,10 @@ class Gaussian:
         self.aabb = torch.tensor(aabb, dtype=torch.float32, device=device)
         self.setup_functions()
 
+        # Opt-in cache of the get_* activations, see `activation_cache`
+        self.cache_activations = False
+        self.version = 0
+        self._activation_cache = {}
         self._xyz = None
         self._features_dc = None
         self._features_rest = None
@@ -71,10 +103,10 @@ class Gaussian:
 
         self.rotation_activation = torch.nn.functional.normalize
 
-        self.scale_bias = self.inverse_scaling_activation(torch.tensor(self.scaling_bias)).cuda()
-        self.rots_bias = torch.zeros((4)).cuda()
+        self.scale_bias = self.inverse_scaling_activation(torch.tensor(self.scaling_bias)).to(self.device)
+        self.rots_bias = torch.zeros((4)).to(self.device)
         self.rots_bias[0] = 1
-        self.opacity_bias = self.inverse_opacity_activation(torch.tensor(self.opacity_bias)).cuda()
+        self.opacity_bias = self.inverse_opacity_activation(torch.tensor(self.opacity_bias)).to(self.device)
 
     # @property
     # def get_scaling(self):
@@ -83,27 +115,70 @@ class Gaussian:
     #     scales = torch.sqrt(scales)
     #     # print(f"[GaussianModel] min scale: {scales.min().item()}, max scale: {scales.max().item()}, mean scale: {scales.mean().item()}")
     #     return scales
+    @contextmanager
+    def activation_cache(self):
+        """
+        Compute each activation once while the block runs, e.g. across the frames of a video
+        of a static scene. Entries are dropped when an attribute is reassigned or modified in
+        place, and skipped for attributes that require grad while grad is enabled, so
+        optimization still gets a fresh graph per step. The cache is emptied on exit.
+
+        Inside the block every caller of a getter receives the same tensor, so callers must not
+        modify it in place (clone first). A cached value modified in place anyway is detected
+        through its version counter and recomputed on the next access, but tensors already
+        handed out share the modification.
+        """
+        previous = self.cache_activations
+        self.cache_activations = True
+        try:
+            yield self
+        finally:
+            self.cache_activations = previous
+            self._activation_cache.clear()
+
+    def _cached(self, key, sources, compute):
+        sources = [s for s in sources if s is not None]
+        if not self.cache_activations or (torch.is_grad_enabled() and any(s.requires_grad for s in sources)):
+            return compute()
+        # Tensor versions catch in-place edits that bypass the attribute setters
+        stamp = tuple((id(s), s._version) for s in sources)
+        hit = self._activation_cache.get(key)
+        # The value's own version catches callers that modified a returned tensor in place
+        if hit is not None and hit[0] == stamp and hit[1]._version == hit[2]:
+            return hit[1]
+        value = compute()
+        self._activation_cache[key] = (stamp, value, value._version)
+        return value
+
     @property
     def get_scaling(self):
-        scales = self.scaling_activation(self._scaling).clamp(min=0.0, max=self.scaling_max)
-        # print(f"[GaussianModel] min scale: {scales.min().item()}, max scale: {scales.max().item()}, mean scale: {scales.mean().item()}")
-        return scales
+        def compute():
+            scales = self.scaling_activation(self._scaling).clamp(min=0.0, max=self.scaling_max)
+            # print(f"[GaussianModel] min scale: {scales.min().item()}, max scale: {scales.max().item()}, mean scale: {scales.mean().item()}")
+            return scales
+        return self._cached("scaling", [self._scaling], compute)
 
     @property
     def get_rotation(self):
-        return self.rotation_activation(self._rotation + self.rots_bias[None, :], p=2, dim=-1)
+        return self._cached(
+            "rotation", [self._rotation, self.rots_bias],
+            lambda: self.rotation_activation(self._rotation + self.rots_bias[None, :], p=2, dim=-1),
+        )
 
     @property
     def get_xyz(self):
-        return self._xyz * self.aabb[None, 3:] + self.aabb[None, :3]
+        return self._cached("xyz", [self._xyz, self.aabb], lambda: self._xyz * self.aabb[None, 3:] + self.aabb[None, :3])
 
     @property
     def get_features(self):
-        return torch.cat((self._features_dc, self._features_rest), dim=2) if self._features_rest is not None else self._features_dc
+        return self._cached(
+            "features", [self._features_dc, self._features_rest],
+            lambda: torch.cat((self._features_dc, self._features_rest), dim=2) if self._features_rest is not None else self._features_dc,
+        )
 
     @property
     def get_opacity(self):
-        return self.opacity_activation(self._opacity + self.opacity_bias)
+        return self._cached("opacity", [self._opacity, self.opacity_bias], lambda: self.opacity_activation(self._opacity + self.opacity_bias))
 
     def get_covariance(self, scaling_modifier=1):
         return self.covariance_activation(self.get_scaling, scaling_modifier, self._rotation + self.rots_bias[None, :])
@@ -124,6 +199,24 @@ class Gaussian:
     def from_opacity(self, opacities):
         self._opacity = self.inverse_opacity_activation(opacities) - self.opacity_bias
 
+    def to_compact(self, palette: bool = False) -> "CompactGaussian":
+        """
+        Compact copy for caching and serving: 16-bit positions, fp16 SH and scales, 8-bit
+        opacity and packed quaternions; `palette=True` also replaces the DC colors with a
+        256-entry palette. See `CompactGaussian`.
+        """
+        from trellis.representations.gaussian.compact import CompactGaussian
+        return CompactGaussian.from_gaussian(self, palette=palette)
+
+    def from_compact(self, compact: "CompactGaussian"):
+        xyz = compact.get_xyz.to(self.device)
+        self._xyz = (xyz - self.aabb[None, :3]) / self.aabb[None, 3:]
+        self._features_dc = compact.get_features_dc.to(self.device)
+        self._features_rest = compact.features_rest.float().to(self.device) if compact.features_rest is not None else None
+        self._opacity = self.inverse_opacity_activation(compact.get_opacity.to(self.device)) - self.opacity_bias
+        self._scaling = self.inverse_scaling_activation(compact.get_scaling.to(self.device))
+        self._rotation = compact.get_rotation.to(self.device) - self.rots_bias[None, :]
+
     def construct_list_of_attributes(self):
         l = ["x", "y", "z", "nx", "ny", "nz"]
         # All channels except the 3 DC
@@ -136,84 +229,66 @@ class Gaussian:
             l.append("rot_{}".format(i))
         return l
 
-    def save_ply(self, path, transform=[[1, 0, 0], [0, 0, -1], [0, 1, 0]]):
-        xyz = self.get_xyz.detach().cpu().numpy()
-        normals = np.zeros_like(xyz)
-        f_dc = self._features_dc.detach().transpose(1, 2).flatten(start_dim=1).contiguous().cpu().numpy()
-        opacities = inverse_sigmoid(self.get_opacity).detach().cpu().numpy()
-        scale = torch.log(self.get_scaling).detach().cpu().numpy()
-        rotation = (self._rotation + self.rots_bias[None, :]).detach().cpu().numpy()
+    def ply_attributes(self, transform=[[1, 0, 0], [0, 0, -1], [0, 1, 0]]) -> np.ndarray:
+        """
+        Per-splat PLY attributes as one contiguous (N, K) float32 array, columns in
+        `construct_list_of_attributes` order. Assembled on the device, copied to host once.
+        """
+        xyz = self.get_xyz.detach()
+        f_dc = self._features_dc.detach().transpose(1, 2).flatten(start_dim=1)
+        opacities = inverse_sigmoid(self.get_opacity).detach()
+        scale = torch.log(self.get_scaling).detach()
+        rotation = (self._rotation + self.rots_bias[None, :]).detach()
+        attributes = torch.cat((xyz, torch.zeros_like(xyz), f_dc, opacities, scale, rotation), dim=1)
+        attributes = attributes.float().cpu().numpy()
 
         if transform is not None:
             transform = np.array(transform)
-            xyz = np.matmul(xyz, transform.T)
-            rotation = utils3d.numpy.quaternion_to_matrix(rotation)
+            attributes[:, 0:3] = np.matmul(attributes[:, 0:3], transform.T)
+            import utils3d
+            rotation = utils3d.numpy.quaternion_to_matrix(attributes[:, -4:])
             rotation = np.matmul(transform, rotation)
-            rotation = utils3d.numpy.matrix_to_quaternion(rotation)
+            attributes[:, -4:] = utils3d.numpy.matrix_to_quaternion(rotation)
+        return attributes
 
-        dtype_full = [(attribute, "f4") for attribute in self.construct_list_of_attributes()]
-
-        elements = np.empty(xyz.shape[0], dtype=dtype_full)
-        attributes = np.concatenate((xyz, normals, f_dc, opacities, scale, rotation), axis=1)
-        elements[:] = list(map(tuple, attributes))
-        el = PlyElement.describe(elements, "vertex")
-        PlyData([el]).write(path)
+    def save_ply(self, path, transform=[[1, 0, 0], [0, 0, -1], [0, 1, 0]]):
+        write_ply(path, self.ply_attributes(transform), self.construct_list_of_attributes())
 
     def load_ply(self, path, transform=[[1, 0, 0], [0, 0, -1], [0, 1, 0]]):
-        plydata = PlyData.read(path)
-
-        xyz = np.stack(
-            (
-                np.asarray(plydata.elements[0]["x"]),
-                np.asarray(plydata.elements[0]["y"]),
-                np.asarray(plydata.elements[0]["z"]),
-            ),
-            axis=1,
-        )
-        opacities = np.asarray(plydata.elements[0]["opacity"])[..., np.newaxis]
-
-        features_dc = np.zeros((xyz.shape[0], 3, 1))
-        features_dc[:, 0, 0] = np.asarray(plydata.elements[0]["f_dc_0"])
-        features_dc[:, 1, 0] = np.asarray(plydata.elements[0]["f_dc_1"])
-        features_dc[:, 2, 0] = np.asarray(plydata.elements[0]["f_dc_2"])
-
+        vertices = memmap_ply_vertices(path)
+        names = vertices.dtype.names
+        rest_names = indexed_fields(names, "f_rest_")
+        scale_names = indexed_fields(names, "scale_")
+        rot_names = indexed_fields(names, "rot_")
         if self.sh_degree > 0:
-            extra_f_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("f_rest_")]
-            extra_f_names = sorted(extra_f_names, key=lambda x: int(x.split("_")[-1]))
-            assert len(extra_f_names) == 3 * (self.sh_degree + 1) ** 2 - 3
-            features_extra = np.zeros((xyz.shape[0], len(extra_f_names)))
-            for idx, attr_name in enumerate(extra_f_names):
-                features_extra[:, idx] = np.asarray(plydata.elements[0][attr_name])
-            # Reshape (P,F*SH_coeffs) to (P, F, SH_coeffs except DC)
-            features_extra = features_extra.reshape((features_extra.shape[0], 3, (self.max_sh_degree + 1) ** 2 - 1))
-
-        scale_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("scale_")]
-        scale_names = sorted(scale_names, key=lambda x: int(x.split("_")[-1]))
-        scales = np.zeros((xyz.shape[0], len(scale_names)))
-        for idx, attr_name in enumerate(scale_names):
-            scales[:, idx] = np.asarray(plydata.elements[0][attr_name])
-
-        rot_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("rot")]
-        rot_names = sorted(rot_names, key=lambda x: int(x.split("_")[-1]))
-        rots = np.zeros((xyz.shape[0], len(rot_names)))
-        for idx, attr_name in enumerate(rot_names):
-            rots[:, idx] = np.asarray(plydata.elements[0][attr_name])
+            assert len(rest_names) == 3 * (self.sh_degree + 1) ** 2 - 3
+        else:
+            rest_names = []
+
+        # All needed properties in one (N, K) float32 array, read straight from the mapped file
+        fields = ["x", "y", "z", "f_dc_0", "f_dc_1", "f_dc_2"] + rest_names + ["opacity"] + scale_names + rot_names
+        data = read_columns(vertices, fields)
+        del vertices
 
         if transform is not None:
             transform = np.array(transform)
-            xyz = np.matmul(xyz, transform)
-            rotation = utils3d.numpy.quaternion_to_matrix(rotation)
-            rotation = np.matmul(rotation, transform)
-            rotation = utils3d.numpy.matrix_to_quaternion(rotation)
-
-        # convert to actual gaussian attributes
-        xyz = torch.tensor(xyz, dtype=torch.float, device=self.device)
-        features_dc = torch.tensor(features_dc, dtype=torch.float, device=self.device).transpose(1, 2).contiguous()
+            data[:, 0:3] = np.matmul(data[:, 0:3], transform)
+            import utils3d
+            rotation = utils3d.numpy.quaternion_to_matrix(data[:, -len(rot_names):])
+            rotation = np.matmul(transform.T, rotation)
+            data[:, -len(rot_names):] = utils3d.numpy.matrix_to_quaternion(rotation)
+
+        # Single host-to-device transfer, then views per attribute
+        data = torch.from_numpy(data).to(self.device)
+        columns = torch.split(data, [3, 3, len(rest_names), 1, len(scale_names), len(rot_names)], dim=1)
+        xyz, features_dc, features_extra, opacities, scales, rots = columns
+        features_dc = features_dc[:, None, :].contiguous()                                           # [N, 1, 3]
         if self.sh_degree > 0:
-            features_extra = torch.tensor(features_extra, dtype=torch.float, device=self.device).transpose(1, 2).contiguous()
-        opacities = torch.sigmoid(torch.tensor(opacities, dtype=torch.float, device=self.device))
-        scales = torch.exp(torch.tensor(scales, dtype=torch.float, device=self.device))
-        rots = torch.tensor(rots, dtype=torch.float, device=self.device)
+            # (N, 3 * SH) stored channel-major -> [N, SH - 1, 3]
+            features_extra = features_extra.reshape(-1, 3, (self.sh_degree + 1) ** 2 - 1).transpose(1, 2).contiguous()
+        opacities = torch.sigmoid(opacities)
+        scales = torch.exp(scales)
+        rots = rots.contiguous()
 
         # convert to _hidden attributes
         self._xyz = (xyz - self.aabb[None, :3]) / self.aabb[None, 3:]
@@ -1,5 +1,9 @@
 from .cube2mesh import SparseFeatures2Mesh, MeshExtractResult
-try:
-    from .mc2mesh import SparseFeatures2MCMesh
-except ImportError:
-    pass
\ No newline at end of file
+
+
+def __getattr__(name):
+    # The marching-cubes extractor needs the diso CUDA extension; import it only when requested
+    if name == 'SparseFeatures2MCMesh':
+        from .mc2mesh import SparseFeatures2MCMesh
+        return SparseFeatures2MCMesh
+    raise AttributeError(f"module {__name__} has no attribute {name}")
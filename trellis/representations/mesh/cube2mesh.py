@@ -12,8 +12,11 @@ from .utils_cube import *
 from .flexicube import FlexiCubes
 
 import torch
-import trimesh
 import numpy as np
+from ...utils.lazy_import import lazy_import
+
+# Only needed by to_trimesh / from_trimesh
+trimesh = lazy_import('trimesh')
 
 # Dependency for mesh cleaning and hole fix
 # from ...utils.random_utils import sphere_hammersley_sequence
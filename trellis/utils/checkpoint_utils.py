@@ -0,0 +1,152 @@
+import os
+import time
+import resource
+from typing import *
+
+import torch
+import torch.nn as nn
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (Linux), or NaN if unavailable."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError):
+        return float('nan')
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def safetensors_path(ckpt_file: str) -> str:
+    return os.path.splitext(ckpt_file)[0] + '.safetensors'
+
+
+def ensure_safetensors(ckpt_file: str) -> str:
+    """
+    Return a safetensors version of a checkpoint, converting a `.pt` state dict once.
+
+    The converted file is written next to the original (`<name>.safetensors`) and reused
+    until the `.pt` file is newer than it.
+    """
+    if ckpt_file.endswith('.safetensors'):
+        return ckpt_file
+    from safetensors.torch import save_file
+
+    out_file = safetensors_path(ckpt_file)
+    if os.path.exists(out_file) and os.path.getmtime(out_file) >= os.path.getmtime(ckpt_file):
+        return out_file
+
+    state_dict = torch.load(ckpt_file, map_location='cpu', weights_only=True)
+    tensors, seen = {}, set()
+    for name, tensor in state_dict.items():
+        tensor = tensor.detach().contiguous()
+        # safetensors refuses tensors sharing storage (e.g. tied weights)
+        if tensor.untyped_storage().data_ptr() in seen:
+            tensor = tensor.clone()
+        seen.add(tensor.untyped_storage().data_ptr())
+        tensors[name] = tensor
+    tmp_file = f"{out_file}.tmp.{os.getpid()}"
+    save_file(tensors, tmp_file, metadata={'source': os.path.basename(ckpt_file)})
+    os.replace(tmp_file, out_file)
+    print(f"Converted {ckpt_file} to {out_file}")
+    return out_file
+
+
+def _meta_tensors(model: nn.Module) -> List[str]:
+    """Names of parameters, buffers and plain tensor attributes still on the meta device."""
+    names = []
+    for module_name, module in model.named_modules():
+        prefix = f"{module_name}." if module_name else ''
+        for name, value in vars(module).items():
+            if isinstance(value, torch.Tensor) and value.is_meta:
+                names.append(prefix + name)
+        for name, value in list(module._parameters.items()) + list(module._buffers.items()):
+            if value is not None and value.is_meta:
+                names.append(prefix + name)
+    return names
+
+
+def _reset_buffers(model: nn.Module, device: torch.device) -> None:
+    """
+    Recompute the non-persistent buffers of a meta-built model on `device`. They are not in
+    checkpoints; modules holding them implement `reset_buffers()`.
+    """
+    for module in model.modules():
+        if hasattr(module, 'reset_buffers'):
+            for name in module._non_persistent_buffers_set:
+                if module._buffers[name] is not None:
+                    module._buffers[name] = torch.empty_like(module._buffers[name], device=device)
+            module.reset_buffers()
+
+
+def load_model(
+    build: Callable[[], nn.Module],
+    ckpt_file: str,
+    device: Union[str, torch.device] = 'cuda',
+    strict: bool = False,
+) -> Tuple[nn.Module, Dict[str, Any]]:
+    """
+    Build a model and load its weights without allocating it twice.
+
+    The model is constructed on the meta device (no memory, no random init), and the
+    safetensors checkpoint is memory-mapped and read tensor by tensor straight onto
+    `device`, replacing the meta parameters. `.pt` checkpoints are converted once with
+    `ensure_safetensors`. Non-persistent buffers are recomputed on `device` (see
+    `_reset_buffers`). If the model creates other tensors outside its state dict at
+    construction time (which cannot be recovered from the checkpoint), it is rebuilt
+    directly on `device` instead.
+
+    Args:
+        build: zero-argument constructor of the model.
+        ckpt_file: `.safetensors` or `.pt` checkpoint.
+        device: device the parameters are placed on.
+        strict: passed to `load_state_dict`.
+
+    Returns:
+        the model and load statistics (`seconds`, `rss_mb`, `peak_rss_mb`,
+        `init`, `missing_keys`, `unexpected_keys`).
+    """
+    from safetensors import safe_open
+
+    t0 = time.perf_counter()
+    rss_before = _rss_mb()
+    ckpt_file = ensure_safetensors(ckpt_file)
+    device = torch.device(device)
+
+    with torch.device('meta'):
+        model = build()
+    _reset_buffers(model, device)
+    expected = model.state_dict()
+    init = 'meta'
+    # Keys absent from the checkpoint would stay on meta: build on the target device instead
+    with safe_open(ckpt_file, framework='pt') as f:
+        keys = set(f.keys())
+    if (set(expected) - keys) or set(_meta_tensors(model)) - set(expected):
+        with torch.device(device):
+            model = build()
+        expected = model.state_dict()
+        init = 'device'
+
+    state_dict = {}
+    with safe_open(ckpt_file, framework='pt', device=str(device)) as f:
+        for name in f.keys():
+            tensor = f.get_tensor(name)
+            if name in expected:
+                tensor = tensor.to(dtype=expected[name].dtype)
+            state_dict[name] = tensor
+    result = model.load_state_dict(state_dict, strict=strict, assign=True)
+    del state_dict
+
+    stats = {
+        'seconds': time.perf_counter() - t0,
+        'rss_mb': _rss_mb() - rss_before,
+        'peak_rss_mb': _peak_rss_mb(),
+        'init': init,
+        'missing_keys': list(result.missing_keys),
+        'unexpected_keys': list(result.unexpected_keys),
+    }
+    return model, stats
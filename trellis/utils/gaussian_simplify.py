@@ -0,0 +1,240 @@
+from typing import *
+import math
+
+import torch
+
+from .random_utils import sphere_hammersley_sequence
+from ..representations import Gaussian
+
+
+def quaternion_to_matrix(q: torch.Tensor) -> torch.Tensor:
+    """(N, 4) quaternions (w, x, y, z) -> (N, 3, 3) rotation matrices."""
+    w, x, y, z = torch.nn.functional.normalize(q, dim=-1).unbind(-1)
+    return torch.stack([
+        1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y),
+        2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x),
+        2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y),
+    ], dim=-1).reshape(-1, 3, 3)
+
+
+def matrix_to_quaternion(R: torch.Tensor) -> torch.Tensor:
+    """(N, 3, 3) rotation matrices -> (N, 4) unit quaternions (w, x, y, z)."""
+    m = R.reshape(-1, 9).unbind(-1)
+    m00, m01, m02, m10, m11, m12, m20, m21, m22 = m
+    # One candidate per largest diagonal term, pick the numerically safest per row
+    candidates = torch.stack([
+        torch.stack([1 + m00 + m11 + m22, m21 - m12, m02 - m20, m10 - m01], dim=-1),
+        torch.stack([m21 - m12, 1 + m00 - m11 - m22, m01 + m10, m02 + m20], dim=-1),
+        torch.stack([m02 - m20, m01 + m10, 1 - m00 + m11 - m22, m12 + m21], dim=-1),
+        torch.stack([m10 - m01, m02 + m20, m12 + m21, 1 - m00 - m11 + m22], dim=-1),
+    ], dim=1)
+    best = torch.stack([m00 + m11 + m22, m00, m11, m22], dim=-1).argmax(dim=-1)
+    q = candidates[torch.arange(R.shape[0], device=R.device), best]
+    return torch.nn.functional.normalize(q, dim=-1)
+
+
+def covariances(gs: Gaussian) -> torch.Tensor:
+    """World-space covariance matrices (N, 3, 3) of the splats."""
+    R = quaternion_to_matrix(gs.get_rotation)
+    return (R * gs.get_scaling.square()[:, None, :]) @ R.transpose(1, 2)
+
+
+def sphere_cameras(num_views: int = 8, r: float = 2, fov: float = 40, device='cuda') -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Look-at cameras on a Hammersley sphere around the origin, in the renderer's convention
+    (OpenCV world-to-camera extrinsics, normalized intrinsics).
+
+    Returns:
+        (extrinsics, intrinsics): (V, 4, 4) and (V, 3, 3).
+    """
+    extrinsics = []
+    for i in range(num_views):
+        yaw, pitch = sphere_hammersley_sequence(i, num_views)
+        origin = torch.tensor([math.sin(yaw) * math.cos(pitch), math.cos(yaw) * math.cos(pitch), math.sin(pitch)]) * r
+        forward = torch.nn.functional.normalize(-origin, dim=0)
+        # Views straight from above or below need another up vector
+        up = torch.tensor([0.0, 0.0, 1.0]) if forward[2].abs() < 0.999 else torch.tensor([0.0, 1.0, 0.0])
+        right = torch.nn.functional.normalize(torch.linalg.cross(forward, up), dim=0)
+        down = torch.linalg.cross(forward, right)
+        extr = torch.eye(4)
+        extr[:3, :3] = torch.stack([right, down, forward])
+        extr[:3, 3] = -extr[:3, :3] @ origin
+        extrinsics.append(extr)
+    focal = 0.5 / math.tan(math.radians(fov) / 2)
+    intrinsics = torch.tensor([[focal, 0, 0.5], [0, focal, 0.5], [0, 0, 1]]).expand(num_views, 3, 3)
+    return torch.stack(extrinsics).to(device), intrinsics.to(device)
+
+
+def contribution(
+    gs: Gaussian,
+    extrinsics: torch.Tensor,
+    intrinsics: torch.Tensor,
+    resolution: int = 512,
+) -> torch.Tensor:
+    """
+    Cheap screen-space contribution of each splat: opacity times its projected footprint in
+    pixels (from the two largest scales), maximized over the views. Occlusion is ignored,
+    splats behind a camera or outside its image do not count for that view.
+
+    Returns:
+        (N,) contribution in pixels.
+    """
+    xyz = gs.get_xyz
+    opacity = gs.get_opacity[:, 0]
+    scales = gs.get_scaling.sort(dim=-1, descending=True).values
+    footprint = math.pi * scales[:, 0] * scales[:, 1]
+    score = torch.zeros_like(opacity)
+    for extr, intr in zip(extrinsics, intrinsics):
+        cam = xyz @ extr[:3, :3].T + extr[:3, 3]
+        z = cam[:, 2]
+        uv = cam[:, :2] / z.clamp(min=1e-6)[:, None] * intr[[0, 1], [0, 1]] + intr[:2, 2]
+        visible = (z > 1e-6) & (uv >= 0).all(dim=-1) & (uv <= 1).all(dim=-1)
+        pixels = footprint * (intr[0, 0] * intr[1, 1] * resolution ** 2) / z.clamp(min=1e-6).square()
+        score = torch.maximum(score, torch.where(visible, opacity * pixels.clamp(max=resolution ** 2), 0))
+    return score
+
+
+def select(gs: Gaussian, mask: torch.Tensor) -> Gaussian:
+    """New Gaussian holding the splats selected by `mask` (boolean or index)."""
+    out = Gaussian(**gs.init_params, device=gs.device)
+    out._xyz = gs._xyz[mask]
+    out._features_dc = gs._features_dc[mask]
+    out._features_rest = gs._features_rest[mask] if gs._features_rest is not None else None
+    out._scaling = gs._scaling[mask]
+    out._rotation = gs._rotation[mask]
+    out._opacity = gs._opacity[mask]
+    return out
+
+
+def cell_ids(xyz: torch.Tensor, cell_size: float) -> torch.Tensor:
+    """Linear id of the `cell_size` voxel holding each point, (N,) int64."""
+    cells = torch.floor((xyz - xyz.min(dim=0).values) / cell_size).long()
+    dims = cells.max(dim=0).values + 1
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def count_cells(xyz: torch.Tensor, cell_size: float) -> int:
+    return torch.unique(cell_ids(xyz, cell_size)).shape[0]
+
+
+def cell_size_for(xyz: torch.Tensor, target_count: int, iters: int = 16) -> float:
+    """Smallest cell size (bisection in log space) whose occupied-cell count is <= `target_count`."""
+    extent = (xyz.max(dim=0).values - xyz.min(dim=0).values).max().item()
+    lo, hi = extent * 1e-5, extent * 2 + 1e-12
+    for _ in range(iters):
+        mid = math.sqrt(lo * hi)
+        if count_cells(xyz, mid) > target_count:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def merge_cells(gs: Gaussian, cell_size: float) -> Gaussian:
+    """
+    Merge the splats of each `cell_size` voxel into one Gaussian by moment matching:
+
+    - mean and covariance are the mixture's first two moments, weighting each splat by its
+      opacity times its squared geometric-mean scale (a proxy for its visible mass);
+    - SH coefficients are the opacity-weighted average;
+    - opacity keeps the visible mass over the merged footprint, capped by the opacity of
+      the splats stacked on top of each other (1 - prod(1 - alpha)).
+
+    Cells holding a single splat keep it unchanged.
+    """
+    xyz = gs.get_xyz
+    opacity = gs.get_opacity[:, 0].clamp(1e-6, 1 - 1e-6)
+    scales = gs.get_scaling
+    cov = covariances(gs)
+    _, cell, counts = torch.unique(cell_ids(xyz, cell_size), return_inverse=True, return_counts=True)
+    num_cells = counts.shape[0]
+
+    def segment_sum(values):
+        return torch.zeros((num_cells, *values.shape[1:]), dtype=values.dtype, device=values.device).index_add_(0, cell, values)
+
+    area = scales.prod(dim=-1).pow(2 / 3)
+    mass = opacity * area
+    mass_sum = segment_sum(mass).clamp(min=1e-20)
+    mean = segment_sum(mass[:, None] * xyz) / mass_sum[:, None]
+    d = xyz - mean[cell]
+    merged_cov = segment_sum(mass[:, None, None] * (cov + d[:, :, None] * d[:, None, :])) / mass_sum[:, None, None]
+
+    alpha_sum = segment_sum(opacity)
+    features_dc = segment_sum(opacity[:, None, None] * gs._features_dc) / alpha_sum[:, None, None]
+    features_rest = None
+    if gs._features_rest is not None:
+        features_rest = segment_sum(opacity[:, None, None] * gs._features_rest) / alpha_sum[:, None, None]
+
+    eigvals, eigvecs = torch.linalg.eigh(merged_cov)
+    # eigh may return a reflection
+    eigvecs = eigvecs * torch.where(torch.linalg.det(eigvecs) < 0, -1.0, 1.0)[:, None, None]
+    merged_scales = eigvals.clamp(min=1e-20).sqrt()
+    rotation = matrix_to_quaternion(eigvecs)
+    stacked = 1 - torch.exp(segment_sum(torch.log1p(-opacity)))
+    merged_opacity = torch.minimum(mass_sum / merged_scales.prod(dim=-1).pow(2 / 3).clamp(min=1e-20), stacked)
+
+    # Singletons keep their exact parameters
+    first = torch.empty(num_cells, dtype=torch.long, device=xyz.device).scatter_(0, cell, torch.arange(xyz.shape[0], device=xyz.device))
+    single = counts == 1
+    mean[single] = xyz[first[single]]
+    merged_scales[single] = scales[first[single]]
+    rotation[single] = gs.get_rotation[first[single]]
+    merged_opacity[single] = opacity[first[single]]
+    features_dc[single] = gs._features_dc[first[single]]
+    if features_rest is not None:
+        features_rest[single] = gs._features_rest[first[single]]
+
+    # Merged splats can be larger than the decoder's scale cap, which the getter would clamp
+    init_params = dict(gs.init_params)
+    init_params["scaling_max"] = max(init_params["scaling_max"], merged_scales.max().item())
+    out = Gaussian(**init_params, device=gs.device)
+    out._xyz = (mean - out.aabb[None, :3]) / out.aabb[None, 3:]
+    out._features_dc = features_dc
+    out._features_rest = features_rest
+    out._scaling = out.inverse_scaling_activation(merged_scales)
+    out._rotation = rotation - out.rots_bias[None, :]
+    out._opacity = out.inverse_opacity_activation(merged_opacity.clamp(1e-6, 1 - 1e-6))[:, None] - out.opacity_bias
+    return out
+
+
+@torch.no_grad()
+def simplify(
+    gs: Gaussian,
+    target_count: Optional[int] = None,
+    min_opacity: float = 0.05,
+    min_contribution: float = 0.05,
+    num_views: int = 8,
+    resolution: int = 512,
+    extrinsics: Optional[torch.Tensor] = None,
+    intrinsics: Optional[torch.Tensor] = None,
+    verbose: bool = True,
+) -> Gaussian:
+    """
+    Simplify 3D Gaussians without optimization:
+
+    1. prune splats below `min_opacity`, or whose contribution (see `contribution`) over
+       `num_views` cheap views is below `min_contribution` pixels;
+    2. if more than `target_count` remain, merge them in voxel cells (see `merge_cells`),
+       with the cell size chosen by bisection so at most `target_count` are left.
+
+    Args:
+        gs: 3D Gaussians.
+        target_count: number of splats to keep at most. None only prunes.
+        extrinsics, intrinsics: views for the contribution estimate. Default to
+            `num_views` cameras on a sphere (see `sphere_cameras`).
+
+    Returns:
+        simplified Gaussians.
+    """
+    num_input = gs._xyz.shape[0]
+    if extrinsics is None:
+        extrinsics, intrinsics = sphere_cameras(num_views, device=gs._xyz.device)
+    keep = (gs.get_opacity[:, 0] >= min_opacity) & (contribution(gs, extrinsics, intrinsics, resolution) >= min_contribution)
+    gs = select(gs, keep)
+    num_pruned = gs._xyz.shape[0]
+
+    if target_count is not None and gs._xyz.shape[0] > target_count:
+        gs = merge_cells(gs, cell_size_for(gs.get_xyz, target_count))
+    if verbose:
+        print(f"Simplified Gaussians: {num_input} -> {num_pruned} (pruned) -> {gs._xyz.shape[0]}")
+    return gs
@@ -0,0 +1,441 @@
+import heapq
+import itertools
+import queue
+from abc import ABC, abstractmethod
+import threading
+import time
+import traceback
+import uuid
+import multiprocessing as mp
+from typing import *
+
+
+# Terminal job states
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TERMINAL_STATES = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """Raised by `JobQueue.submit` when the queue already holds `max_pending` jobs."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker (from the progress callback) when its job was cancelled."""
+
+
+class JobFailed(Exception):
+    """Raised by `Job.wait` when the job failed in the worker."""
+
+
+class Job:
+    """
+    Handle on a submitted job. Progress and state changes are delivered as event dicts:
+        {'type': 'queued' | 'started' | 'progress' | 'done' | 'failed' | 'cancelled', ...}
+    Progress events carry the `stage` name plus any fields reported by the worker.
+    """
+    def __init__(self, payload: Any, session: Optional[str] = None, priority: int = 0):
+        self.job_id = uuid.uuid4().hex
+        self.payload = payload
+        self.session = session
+        self.priority = priority
+        self.status = 'queued'
+        self.stage = None
+        self.result = None
+        self.error = None
+        self._events = queue.Queue()
+        self._done = threading.Event()
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        kind = event['type']
+        if kind == 'progress':
+            self.stage = event.get('stage')
+        elif kind == 'started':
+            self.status = 'running'
+        elif kind in TERMINAL_STATES:
+            if self._done.is_set():
+                return
+            self.status = kind
+            self.result = event.get('result')
+            self.error = event.get('error')
+        self._events.put(event)
+        if kind in TERMINAL_STATES:
+            self._done.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def events(self, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield events until the job reaches a terminal state."""
+        while True:
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                return
+            yield event
+            if event['type'] in TERMINAL_STATES:
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """
+        Block until the job finishes and return its result.
+
+        Raises:
+            JobCancelled: if the job was cancelled.
+            JobFailed: if the worker raised.
+            TimeoutError: if the job did not finish within `timeout`.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"job {self.job_id} did not finish in {timeout} s")
+        if self.status == CANCELLED:
+            raise JobCancelled(self.job_id)
+        if self.status == FAILED:
+            raise JobFailed(self.error)
+        return self.result
+
+
+class JobQueue(ABC):
+    """
+    Bounded priority queue of jobs executed by workers that own the models.
+
+    Each worker calls `worker_init()` once to build its models, then runs
+    `worker_fn(models, payload, progress)` per job, where `progress(stage, **fields)`
+    reports a stage and raises `JobCancelled` once the job has been cancelled.
+    Lower `priority` values run first; jobs of equal priority run in submission order.
+
+    Subclasses provide the execution backend.
+
+    Args:
+        worker_init: builds the per-worker models.
+        worker_fn: runs one job.
+        num_workers: number of workers.
+        max_pending: maximum number of queued (not yet running) jobs.
+    """
+    def __init__(self, worker_init: Callable[[], Any], worker_fn: Callable, num_workers: int = 1, max_pending: int = 16):
+        self.worker_init = worker_init
+        self.worker_fn = worker_fn
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._idle = num_workers
+        self._closed = False
+        self._cond = threading.Condition()
+        self._start()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    # Backend interface
+    @abstractmethod
+    def _start(self) -> None:
+        """Start the workers."""
+        pass
+
+    @abstractmethod
+    def _execute(self, job: Job) -> None:
+        """Hand a job to an idle worker; the backend reports its end through `_finish`."""
+        pass
+
+    @abstractmethod
+    def _cancel_running(self, job: Job) -> None:
+        """Ask the worker running a job to cancel it."""
+        pass
+
+    @abstractmethod
+    def _stop(self) -> None:
+        """Stop the workers."""
+        pass
+
+    # Public API
+    def submit(self, payload: Any, session: Optional[str] = None, priority: int = 0) -> Job:
+        """
+        Queue a job.
+
+        Raises:
+            QueueFull: if `max_pending` jobs are already waiting.
+        """
+        job = Job(payload, session=session, priority=priority)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('job queue is shut down')
+            if len(self._heap) >= self.max_pending:
+                raise QueueFull(f"{len(self._heap)} jobs already pending")
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._jobs[job.job_id] = job
+            job._emit({'type': 'queued', 'position': len(self._heap)})
+            self._cond.notify_all()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it is unknown or already finished."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            if any(item[2] is job for item in self._heap):
+                self._heap = [item for item in self._heap if item[2] is not job]
+                heapq.heapify(self._heap)
+                self._jobs.pop(job_id, None)
+                job._emit({'type': CANCELLED})
+                return True
+        self._cancel_running(job)
+        return True
+
+    def cancel_session(self, session: str) -> int:
+        """Cancel every job of a session. Returns the number of cancelled jobs."""
+        with self._cond:
+            job_ids = [job.job_id for job in self._jobs.values() if job.session == session]
+        return sum(self.cancel(job_id) for job_id in job_ids)
+
+    def wait_session(self, session: str, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every job of a session has finished (e.g. after `cancel_session`; running
+        jobs stop at their next progress report). Returns False if some were still running
+        after `timeout` seconds.
+        """
+        with self._cond:
+            jobs = [job for job in self._jobs.values() if job.session == session]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in jobs:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job._done.wait(remaining):
+                return False
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            running = sum(1 for job in self._jobs.values() if job.status == 'running')
+            return {'pending': len(self._heap), 'running': running, 'idle_workers': self._idle, 'workers': self.num_workers}
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        with self._cond:
+            self._closed = True
+            if cancel_pending:
+                for _, _, job in self._heap:
+                    job._emit({'type': CANCELLED})
+                self._heap = []
+            self._cond.notify_all()
+        self._stop()
+
+    # Internals
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (self._idle == 0 or not self._heap):
+                    self._cond.wait()
+                if self._closed and not self._heap:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                self._idle -= 1
+            self._execute(job)
+
+    def _finish(self, job: Job, event: Dict[str, Any]) -> None:
+        """Called by backends when a job reached a terminal state."""
+        job._emit(event)
+        with self._cond:
+            self._jobs.pop(job.job_id, None)
+            self._idle += 1
+            self._cond.notify_all()
+
+
+def _run_job(worker_fn, models, payload, progress) -> Dict[str, Any]:
+    try:
+        return {'type': DONE, 'result': worker_fn(models, payload, progress)}
+    except JobCancelled:
+        return {'type': CANCELLED}
+    except Exception as e:
+        return {'type': FAILED, 'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()}
+
+
+class LocalJobQueue(JobQueue):
+    """
+    In-process backend: worker threads that each build their models with `worker_init`.
+    Needs no external services, which makes it the default for a single-GPU app and for testing.
+    """
+    def _start(self) -> None:
+        self._tasks = queue.Queue()
+        self._cancelled = set()
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _worker_loop(self) -> None:
+        try:
+            models, init_error = self.worker_init(), None
+        except Exception as e:
+            models, init_error = None, f"worker_init failed: {type(e).__name__}: {e}"
+        while True:
+            job = self._tasks.get()
+            if job is None:
+                return
+            if init_error is not None:
+                self._finish(job, {'type': FAILED, 'error': init_error})
+                continue
+            job._emit({'type': 'started'})
+
+            def progress(stage, **fields):
+                if job.job_id in self._cancelled:
+                    raise JobCancelled(job.job_id)
+                job._emit({'type': 'progress', 'stage': stage, **fields})
+
+            event = _run_job(self.worker_fn, models, job.payload, progress)
+            self._cancelled.discard(job.job_id)
+            self._finish(job, event)
+
+    def _execute(self, job: Job) -> None:
+        self._tasks.put(job)
+
+    def _cancel_running(self, job: Job) -> None:
+        self._cancelled.add(job.job_id)
+
+    def _stop(self) -> None:
+        for _ in self._threads:
+            self._tasks.put(None)
+
+
+def _process_worker(worker, worker_init, worker_fn, tasks, events, cancelled) -> None:
+    try:
+        models, init_error = worker_init(), None
+    except Exception as e:
+        models, init_error = None, f"worker_init failed: {type(e).__name__}: {e}"
+    events.put((worker, None, {'type': 'ready', 'error': init_error}))
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        job_id, payload = task
+        if init_error is not None:
+            events.put((worker, job_id, {'type': FAILED, 'error': init_error}))
+            continue
+        events.put((worker, job_id, {'type': 'started'}))
+
+        def progress(stage, **fields):
+            if job_id in cancelled:
+                raise JobCancelled(job_id)
+            events.put((worker, job_id, {'type': 'progress', 'stage': stage, **fields}))
+
+        events.put((worker, job_id, _run_job(worker_fn, models, payload, progress)))
+
+
+class ProcessJobQueue(JobQueue):
+    """
+    Multi-process backend: `num_workers` spawned processes, each owning its models (and GPU context).
+    `worker_init`, `worker_fn`, payloads and results must be picklable.
+
+    Each worker has its own task queue, so the queue knows which process runs which job. A
+    worker that dies (crash, OOM kill) fails its job and is replaced by a new process.
+    """
+    # Seconds between liveness checks of the worker processes
+    poll_interval = 1.0
+
+    def _start(self) -> None:
+        self._ctx = mp.get_context('spawn')
+        self._manager = self._ctx.Manager()
+        self._cancelled = self._manager.dict()
+        self._events = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._tasks = [None] * self.num_workers
+        self._processes = [None] * self.num_workers
+        self._assigned = {}     # worker index -> running job
+        self._free = []         # idle worker indices
+        for worker in range(self.num_workers):
+            self._spawn(worker)
+            self._free.append(worker)
+        self._listener = threading.Thread(target=self._listen_loop, name='job-events', daemon=True)
+        self._listener.start()
+
+    def _spawn(self, worker: int) -> None:
+        self._tasks[worker] = self._ctx.Queue()
+        self._processes[worker] = self._ctx.Process(
+            target=_process_worker,
+            args=(worker, self.worker_init, self.worker_fn, self._tasks[worker], self._events, self._cancelled),
+            name=f'job-worker-{worker}',
+            daemon=True,
+        )
+        self._processes[worker].start()
+
+    def _release(self, worker: int, event: Dict[str, Any]) -> None:
+        with self._lock:
+            job = self._assigned.pop(worker, None)
+            if job is None:
+                return
+            self._free.append(worker)
+        self._cancelled.pop(job.job_id, None)
+        self._finish(job, event)
+
+    def _check_workers(self) -> None:
+        """Fail the job of every dead worker and start a replacement."""
+        for worker, process in enumerate(self._processes):
+            if process.is_alive() or self._stopping:
+                continue
+            print(f"[ProcessJobQueue] worker {worker} exited with code {process.exitcode}, restarting it")
+            with self._lock:
+                self._spawn(worker)
+            self._release(worker, {'type': FAILED, 'error': f"worker process exited with code {process.exitcode}"})
+
+    def _listen_loop(self) -> None:
+        last_check = time.monotonic()
+        while True:
+            if time.monotonic() - last_check >= self.poll_interval:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                worker, job_id, event = self._events.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if job_id is None:
+                if event['type'] == 'stop':
+                    return
+                continue
+            with self._lock:
+                job = self._assigned.get(worker)
+            if job is None or job.job_id != job_id:
+                continue
+            if event['type'] in TERMINAL_STATES:
+                self._release(worker, event)
+            else:
+                job._emit(event)
+
+    def _execute(self, job: Job) -> None:
+        with self._lock:
+            worker = self._free.pop()
+            self._assigned[worker] = job
+            self._tasks[worker].put((job.job_id, job.payload))
+
+    def _cancel_running(self, job: Job) -> None:
+        self._cancelled[job.job_id] = True
+
+    def _stop(self) -> None:
+        self._stopping = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._events.put((None, None, {'type': 'stop'}))
+        self._manager.shutdown()
+
+
+def create_job_queue(backend: str, worker_init: Callable[[], Any], worker_fn: Callable, **kwargs) -> JobQueue:
+    """
+    Create a job queue with the `local` (threads) or `process` backend.
+    """
+    if backend == 'local':
+        return LocalJobQueue(worker_init, worker_fn, **kwargs)
+    elif backend == 'process':
+        return ProcessJobQueue(worker_init, worker_fn, **kwargs)
+    raise ValueError(f"Unknown job queue backend: {backend}")
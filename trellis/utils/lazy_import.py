@@ -0,0 +1,43 @@
+import importlib
+from types import ModuleType
+from typing import *
+
+
+class LazyModule:
+    """
+    Module proxy that imports `name` on first attribute access.
+
+    Lets heavy optional dependencies (CUDA kernels, mesh tools) stay module-level names,
+    e.g. `dr = lazy_import('nvdiffrast.torch')`, without paying for the import, or
+    requiring the package, until the code that uses them actually runs.
+    """
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Return a proxy for module `name` that is imported on first use.
+    """
+    return LazyModule(name)
@@ -2,7 +2,6 @@ import torch
 import torch.nn.functional as F
 from torch.autograd import Variable
 from math import exp
-from lpips import LPIPS
 
 
 def smooth_l1_loss(pred, target, beta=1.0):
@@ -76,6 +75,7 @@ loss_fn_vgg = None
 def lpips(img1, img2, value_range=(0, 1), size_average=True):
     global loss_fn_vgg
     if loss_fn_vgg is None:
+        from lpips import LPIPS
         loss_fn_vgg = LPIPS(net='vgg').cuda().eval()
     # normalize to [-1, 1]
     img1 = (img1 - value_range[0]) / (value_range[1] - value_range[0]) * 2 - 1
@@ -0,0 +1,149 @@
+"""
+Binary PLY reading and writing on numpy only (no torch), shared by the Gaussian
+representation and the viewer server.
+"""
+from typing import *
+
+import numpy as np
+
+
+_PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+_PLY_BYTE_ORDERS = {'binary_little_endian': '<', 'binary_big_endian': '>'}
+_PLY_TYPE_NAMES = {
+    'i1': 'char', 'u1': 'uchar', 'i2': 'short', 'u2': 'ushort',
+    'i4': 'int', 'u4': 'uint', 'f4': 'float', 'f8': 'double',
+}
+
+
+def read_ply_header(path: str) -> Tuple[np.dtype, int, int]:
+    """
+    Parse a binary PLY header whose first element is `vertex`.
+
+    Returns:
+        (dtype, count, offset): structured dtype of a vertex, number of vertices and byte
+        offset of the vertex block.
+    """
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b'ply':
+            raise ValueError(f"{path} is not a PLY file")
+        byte_order, elements = None, []
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path}: unexpected end of PLY header")
+            tokens = line.decode('ascii').split()
+            if not tokens or tokens[0] in ('comment', 'obj_info'):
+                continue
+            if tokens[0] == 'format':
+                if tokens[1] not in _PLY_BYTE_ORDERS:
+                    raise ValueError(f"{path}: unsupported PLY format {tokens[1]}")
+                byte_order = _PLY_BYTE_ORDERS[tokens[1]]
+            elif tokens[0] == 'element':
+                elements.append((tokens[1], int(tokens[2]), []))
+            elif tokens[0] == 'property':
+                if tokens[1] == 'list':
+                    raise ValueError(f"{path}: list properties are not supported")
+                elements[-1][2].append((tokens[2], byte_order + _PLY_TYPES[tokens[1]]))
+            elif tokens[0] == 'end_header':
+                offset = f.tell()
+                break
+    if not elements or elements[0][0] != 'vertex':
+        raise ValueError(f"{path}: the first PLY element must be vertex")
+    _, count, properties = elements[0]
+    return np.dtype(properties), count, offset
+
+
+def memmap_ply_vertices(path: str) -> np.memmap:
+    """
+    Memory-map the vertex block of a binary PLY as a structured array (read-only).
+    """
+    dtype, count, offset = read_ply_header(path)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+
+def indexed_fields(names: Sequence[str], prefix: str) -> List[str]:
+    """Fields `<prefix><i>` sorted by index, e.g. scale_0, scale_1, scale_2."""
+    fields = [name for name in names if name.startswith(prefix) and name[len(prefix):].isdigit()]
+    return sorted(fields, key=lambda name: int(name[len(prefix):]))
+
+
+def read_columns(vertices: np.ndarray, fields: List[str]) -> np.ndarray:
+    """
+    Gather `fields` of a structured vertex array into one contiguous (N, len(fields)) float32
+    array in a single vectorized pass over the (memory-mapped) rows.
+    """
+    dtype = vertices.dtype
+    if all(dtype.fields[name][0] == np.dtype('<f4') for name in dtype.names) and dtype.itemsize == 4 * len(dtype.names):
+        # Packed float32 rows: view the block as a (N, P) matrix and take the columns
+        table = vertices.view('<f4').reshape(vertices.shape[0], len(dtype.names))
+        return np.ascontiguousarray(table[:, [dtype.names.index(name) for name in fields]])
+    from numpy.lib.recfunctions import structured_to_unstructured
+    return np.ascontiguousarray(structured_to_unstructured(vertices[fields], dtype=np.float32))
+
+
+def ply_header(dtype: np.dtype, count: int) -> bytes:
+    """
+    Header of a binary PLY with `count` vertices of the structured `dtype`. For float32
+    little-endian fields, byte-identical to the one plyfile writes for the same element.
+    """
+    big_endian = any(dtype.fields[name][0].byteorder == '>' for name in dtype.names)
+    lines = ['ply', f"format {'binary_big_endian' if big_endian else 'binary_little_endian'} 1.0", f'element vertex {count}']
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        lines.append(f'property {_PLY_TYPE_NAMES[field.kind + str(field.itemsize)]} {name}')
+    lines.append('end_header')
+    return ('\n'.join(lines) + '\n').encode('ascii')
+
+
+def vertex_view(attributes: np.ndarray, names: List[str]) -> np.ndarray:
+    """
+    Zero-copy structured (`f4` per field) view of a contiguous `(N, len(names))` float32 buffer.
+    """
+    assert attributes.ndim == 2 and attributes.shape[1] == len(names), \
+        f"Expected (N, {len(names)}) attributes, got {attributes.shape}"
+    attributes = np.ascontiguousarray(attributes, dtype='<f4')
+    return attributes.view(np.dtype([(name, '<f4') for name in names])).reshape(-1)
+
+
+def write_ply(path: str, attributes: np.ndarray, names: List[str]) -> None:
+    """
+    Write `(N, K)` float32 per-vertex attributes as a binary PLY, one property per column.
+
+    The body is the buffer itself, written in one call; there is no per-row conversion.
+    """
+    vertices = vertex_view(attributes, names)
+    with open(path, 'wb') as f:
+        f.write(ply_header(vertices.dtype, vertices.shape[0]))
+        f.write(vertices.data)
+
+
+def gaussian_attributes(vertices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Gather the Gaussian attributes of a PLY written by `Gaussian.save_ply` into dense float32 arrays.
+
+    Returns:
+        dict with xyz [N, 3], f_dc [N, 3], opacity [N] (logit), scale [N, 3] (log) and rot [N, 4].
+    """
+    stack = lambda names: read_columns(vertices, names)
+    return {
+        'xyz': stack(['x', 'y', 'z']),
+        'f_dc': stack(['f_dc_0', 'f_dc_1', 'f_dc_2']),
+        'opacity': stack(['opacity'])[:, 0],
+        'scale': stack(['scale_0', 'scale_1', 'scale_2']),
+        'rot': stack(['rot_0', 'rot_1', 'rot_2', 'rot_3']),
+    }
+
+
+def write_ply_plyfile(path: str, attributes: np.ndarray, names: List[str]) -> None:
+    """
+    Reference writer through plyfile, kept for compatibility checks against `write_ply`.
+    """
+    from plyfile import PlyData, PlyElement
+    elements = np.empty(attributes.shape[0], dtype=[(name, 'f4') for name in names])
+    elements[:] = list(map(tuple, attributes))
+    PlyData([PlyElement.describe(elements, 'vertex')]).write(path)
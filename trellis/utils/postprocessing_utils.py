@@ -1,22 +1,24 @@
 from typing import *
 import numpy as np
 import torch
-import utils3d
-import nvdiffrast.torch as dr
 from tqdm import tqdm
-import trimesh
-import trimesh.visual
-import xatlas
-import pyvista as pv
-from pymeshfix import _meshfix
-import igraph
-import cv2
 from PIL import Image
 from .random_utils import sphere_hammersley_sequence
 from .render_utils import render_multiview
-from ..renderers import GaussianRenderer
+from .gaussian_simplify import simplify as simplify_gaussians
+from .lazy_import import lazy_import
 from ..representations import Gaussian, MeshExtractResult
 
+# Mesh processing dependencies are imported on first use
+utils3d = lazy_import('utils3d')
+dr = lazy_import('nvdiffrast.torch')
+trimesh = lazy_import('trimesh')
+xatlas = lazy_import('xatlas')
+pv = lazy_import('pyvista')
+_meshfix = lazy_import('pymeshfix._meshfix')
+igraph = lazy_import('igraph')
+cv2 = lazy_import('cv2')
+
 
 @torch.no_grad()
 def _fill_holes(
@@ -405,7 +407,7 @@ def to_glb(
     texture_size: int = 1024,
     debug: bool = False,
     verbose: bool = True,
-) -> trimesh.Trimesh:
+) -> 'trimesh.Trimesh':
     """
     Convert a generated asset to a glb file.
 
@@ -470,118 +472,12 @@ def simplify_gs(
     verbose: bool = True,
 ):
     """
-    Simplify 3D Gaussians
-    NOTE: this function is not used in the current implementation for the unsatisfactory performance.
-    
+    Simplify 3D Gaussians by pruning and voxel merging (see `gaussian_simplify.simplify`).
+
     Args:
         gs (Gaussian): 3D Gaussian.
         simplify (float): Ratio of Gaussians to remove in simplification.
     """
     if simplify <= 0:
         return gs
-    
-    # simplify
-    observations, extrinsics, intrinsics = render_multiview(gs, resolution=1024, nviews=100, only_color=True)
-    observations = [torch.tensor(obs / 255.0).float().cuda().permute(2, 0, 1) for obs in observations]
-    
-    # Following https://arxiv.org/pdf/2411.06019
-    renderer = GaussianRenderer({
-            "resolution": 1024,
-            "near": 0.8,
-            "far": 1.6,
-            "ssaa": 1,
-            "bg_color": (0,0,0),
-        })
-    new_gs = Gaussian(**gs.init_params)
-    new_gs._features_dc = gs._features_dc.clone()
-    new_gs._features_rest = gs._features_rest.clone() if gs._features_rest is not None else None
-    new_gs._opacity = torch.nn.Parameter(gs._opacity.clone())
-    new_gs._rotation = torch.nn.Parameter(gs._rotation.clone())
-    new_gs._scaling = torch.nn.Parameter(gs._scaling.clone())
-    new_gs._xyz = torch.nn.Parameter(gs._xyz.clone())
-    
-    start_lr = [1e-4, 1e-3, 5e-3, 0.025]
-    end_lr = [1e-6, 1e-5, 5e-5, 0.00025]
-    optimizer = torch.optim.Adam([
-        {"params": new_gs._xyz, "lr": start_lr[0]},
-        {"params": new_gs._rotation, "lr": start_lr[1]},
-        {"params": new_gs._scaling, "lr": start_lr[2]},
-        {"params": new_gs._opacity, "lr": start_lr[3]},
-    ], lr=start_lr[0])
-    
-    def exp_anealing(optimizer, step, total_steps, start_lr, end_lr):
-            return start_lr * (end_lr / start_lr) ** (step / total_steps)
-
-    def cosine_anealing(optimizer, step, total_steps, start_lr, end_lr):
-        return end_lr + 0.5 * (start_lr - end_lr) * (1 + np.cos(np.pi * step / total_steps))
-    
-    _zeta = new_gs.get_opacity.clone().detach().squeeze()
-    _lambda = torch.zeros_like(_zeta)
-    _delta = 1e-7
-    _interval = 10
-    num_target = int((1 - simplify) * _zeta.shape[0])
-    
-    with tqdm(total=2500, disable=not verbose, desc='Simplifying Gaussian') as pbar:
-        for i in range(2500):
-            # prune
-            if i % 100 == 0:
-                mask = new_gs.get_opacity.squeeze() > 0.05
-                mask = torch.nonzero(mask).squeeze()
-                new_gs._xyz = torch.nn.Parameter(new_gs._xyz[mask])
-                new_gs._rotation = torch.nn.Parameter(new_gs._rotation[mask])
-                new_gs._scaling = torch.nn.Parameter(new_gs._scaling[mask])
-                new_gs._opacity = torch.nn.Parameter(new_gs._opacity[mask])
-                new_gs._features_dc = new_gs._features_dc[mask]
-                new_gs._features_rest = new_gs._features_rest[mask] if new_gs._features_rest is not None else None
-                _zeta = _zeta[mask]
-                _lambda = _lambda[mask]
-                # update optimizer state
-                for param_group, new_param in zip(optimizer.param_groups, [new_gs._xyz, new_gs._rotation, new_gs._scaling, new_gs._opacity]):
-                    stored_state = optimizer.state[param_group['params'][0]]
-                    if 'exp_avg' in stored_state:
-                        stored_state['exp_avg'] = stored_state['exp_avg'][mask]
-                        stored_state['exp_avg_sq'] = stored_state['exp_avg_sq'][mask]
-                    del optimizer.state[param_group['params'][0]]
-                    param_group['params'][0] = new_param
-                    optimizer.state[param_group['params'][0]] = stored_state
-
-            opacity = new_gs.get_opacity.squeeze()
-            
-            # sparisfy
-            if i % _interval == 0:
-                _zeta = _lambda + opacity.detach()
-                if opacity.shape[0] > num_target:
-                    index = _zeta.topk(num_target)[1]
-                    _m = torch.ones_like(_zeta, dtype=torch.bool)
-                    _m[index] = 0
-                    _zeta[_m] = 0
-                _lambda = _lambda + opacity.detach() - _zeta
-            
-            # sample a random view
-            view_idx = np.random.randint(len(observations))
-            observation = observations[view_idx]
-            extrinsic = extrinsics[view_idx]
-            intrinsic = intrinsics[view_idx]
-            
-            color = renderer.render(new_gs, extrinsic, intrinsic)['color']
-            rgb_loss = torch.nn.functional.l1_loss(color, observation)
-            loss = rgb_loss + \
-                   _delta * torch.sum(torch.pow(_lambda + opacity - _zeta, 2))
-            
-            optimizer.zero_grad()
-            loss.backward()
-            optimizer.step()
-            
-            # update lr
-            for j in range(len(optimizer.param_groups)):
-                optimizer.param_groups[j]['lr'] = cosine_anealing(optimizer, i, 2500, start_lr[j], end_lr[j])
-            
-            pbar.set_postfix({'loss': rgb_loss.item(), 'num': opacity.shape[0], 'lambda': _lambda.mean().item()})
-            pbar.update()
-            
-    new_gs._xyz = new_gs._xyz.data
-    new_gs._rotation = new_gs._rotation.data
-    new_gs._scaling = new_gs._scaling.data
-    new_gs._opacity = new_gs._opacity.data
-    
-    return new_gs
+    return simplify_gaussians(gs, target_count=int((1 - simplify) * gs._xyz.shape[0]), verbose=verbose)
@@ -0,0 +1,56 @@
+"""
+Smallest-three quaternion packing on numpy only (no torch), for the viewer's compact format.
+`CompactGaussian` packs the same words with torch ops on the device (see `pack_rotations`).
+
+A unit quaternion (w, x, y, z) is packed into one 32-bit word: bits 30-31 hold the index of the
+largest component, which is dropped (its sign is made positive, q and -q being the same rotation),
+and three 10-bit fields hold the other components, quantized over [-1/sqrt(2), 1/sqrt(2)].
+"""
+import math
+
+import numpy as np
+
+QUAT_BITS = 10
+QUAT_MAX = (1 << QUAT_BITS) - 1
+QUAT_RANGE = 1 / math.sqrt(2)           # |smallest three| of a unit quaternion
+
+# Indices of the three kept components, by index of the dropped one
+_KEEP = np.array([[j for j in range(4) if j != i] for i in range(4)])
+
+
+def pack_quaternions(rot: np.ndarray) -> np.ndarray:
+    """
+    Pack [N, 4] quaternions (w, x, y, z, not necessarily normalized) into [N] uint32 words.
+    """
+    rot = np.asarray(rot, dtype=np.float32)
+    q = rot / np.linalg.norm(rot, axis=1, keepdims=True).clip(min=1e-12)
+    largest = np.abs(q).argmax(axis=1)
+    # q and -q are the same rotation: make the dropped component positive
+    q = q * np.where(q[np.arange(len(q)), largest] < 0, -1.0, 1.0)[:, None]
+    rest = np.take_along_axis(q, _KEEP[largest], axis=1)
+    rest = np.rint((rest / QUAT_RANGE * 0.5 + 0.5).clip(0, 1) * QUAT_MAX).astype(np.uint32)
+    return (
+        (largest.astype(np.uint32) << 30)
+        | (rest[:, 0] << 20)
+        | (rest[:, 1] << 10)
+        | rest[:, 2]
+    )
+
+
+def unpack_quaternions(packed: np.ndarray) -> np.ndarray:
+    """
+    Inverse of `pack_quaternions`. Returns normalized [N, 4] float32 quaternions (w, x, y, z).
+    Words stored as int32 (same bits) are accepted too.
+    """
+    packed = np.asarray(packed)
+    if packed.dtype == np.int32:
+        packed = packed.view(np.uint32)
+    packed = packed.astype(np.uint32, copy=False)
+    largest = (packed >> 30).astype(np.int64)
+    rest = np.stack([(packed >> 20) & QUAT_MAX, (packed >> 10) & QUAT_MAX, packed & QUAT_MAX], axis=1)
+    rest = (rest.astype(np.float32) / QUAT_MAX * 2 - 1) * QUAT_RANGE
+    dropped = np.sqrt((1 - np.square(rest).sum(axis=1)).clip(min=0))
+    q = np.empty((len(packed), 4), dtype=np.float32)
+    np.put_along_axis(q, _KEEP[largest], rest, axis=1)
+    q[np.arange(len(q)), largest] = dropped
+    return q / np.linalg.norm(q, axis=1, keepdims=True).clip(min=1e-12)
@@ -1,12 +1,15 @@
+import sys
+from contextlib import nullcontext
 import torch
 import numpy as np
 from tqdm import tqdm
-import utils3d
-from PIL import Image
 
-from ..renderers import MeshRenderer
-from ..representations import Octree, Gaussian, MeshExtractResult
 from .random_utils import sphere_hammersley_sequence
+from .lazy_import import lazy_import
+from .. import representations
+
+# Imported on first use to keep `import render_utils` cheap
+utils3d = lazy_import('utils3d')
 
 
 def yaw_pitch_r_fov_to_extrinsics_intrinsics(yaws, pitchs, rs, fovs, device='cuda'):
@@ -39,14 +42,22 @@ def yaw_pitch_r_fov_to_extrinsics_intrinsics(yaws, pitchs, rs, fovs, device='cud
     return extrinsics, intrinsics
 
 
-def render_frames(sample, extrinsics, intrinsics, options={}, colors_overwrite=None, verbose=True, need_depth=False, opt=False, **kwargs):
-    if isinstance(sample, MeshExtractResult):
+def is_mesh(sample):
+    # A MeshExtractResult can only exist once the mesh module is loaded, so don't import it
+    # (and its CUDA dependencies) just to check Gaussians and octrees
+    mesh = sys.modules.get('trellis.representations.mesh')
+    return mesh is not None and isinstance(sample, mesh.MeshExtractResult)
+
+
+def get_renderer(sample, options={}, **kwargs):
+    if is_mesh(sample):
+        from ..renderers import MeshRenderer
         renderer = MeshRenderer()
         renderer.rendering_options.resolution = options.get('resolution', 1024)
         renderer.rendering_options.near = options.get('near', 1)
         renderer.rendering_options.far = options.get('far', 100)
         renderer.rendering_options.ssaa = options.get('ssaa', 4)
-    elif isinstance(sample, Gaussian):
+    elif isinstance(sample, (representations.Gaussian, representations.CompactGaussian)):
         # from ..renderers import GSplatRenderer, GaussianRenderer
         # renderer = GSplatRenderer()
         from ..renderers import GaussianRenderer
@@ -58,7 +69,7 @@ def render_frames(sample, extrinsics, intrinsics, options={}, colors_overwrite=N
         renderer.rendering_options.ssaa = options.get('ssaa', 1)
         renderer.pipe.kernel_size = kwargs.get('kernel_size', 0.1)
         renderer.pipe.use_mip_gaussian = True
-    elif isinstance(sample, Octree):
+    elif isinstance(sample, representations.Octree):
         from ..renderers import OctreeRenderer
         renderer = OctreeRenderer()
         renderer.rendering_options.resolution = options.get('resolution', 512)
@@ -69,44 +80,68 @@ def render_frames(sample, extrinsics, intrinsics, options={}, colors_overwrite=N
         renderer.pipe.primitive = sample.primitive
     else:
         raise ValueError(f'Unsupported sample type: {type(sample)}')
-    
-    rets = {}
-    for j, (extr, intr) in tqdm(enumerate(zip(extrinsics, intrinsics)), desc='Rendering', disable=not verbose):
-        if not isinstance(sample, MeshExtractResult):
-            res = renderer.render(sample, extr, intr, colors_overwrite=colors_overwrite, need_depth=need_depth)
-            if 'color' not in rets: rets['color'] = []
-            if 'depth' not in rets: rets['depth'] = []
-            rets['color'].append(res['color'].clamp(0, 1) if opt else \
-                                 np.clip(res['color'].detach().cpu().numpy().transpose(1, 2, 0) * 255, 0, 255).astype(np.uint8))
-            if 'percent_depth' in res:
-                rets['depth'].append(res['percent_depth'] if opt else res['percent_depth'].detach().cpu().numpy())
-            elif 'depth' in res:
-                rets['depth'].append(res['depth'] if opt else res['depth'].detach().cpu().numpy())
+    return renderer
+
+
+def to_uint8_image(image):
+    return np.clip(image.detach().cpu().numpy().transpose(1, 2, 0) * 255, 0, 255).astype(np.uint8)
+
+
+def iter_frames(sample, extrinsics, intrinsics, options={}, colors_overwrite=None, verbose=True, need_depth=False, opt=False, keys=None, **kwargs):
+    """
+    Render the views one at a time, yielding a dict of per-frame outputs for each camera.
+
+    Only one frame is held at a time; `render_frames` collects them into lists.
+    `keys` restricts the outputs copied back to the host (e.g. `['color']` for videos).
+    A Gaussian's activations are computed once for all views (see `Gaussian.activation_cache`).
+    """
+    renderer = get_renderer(sample, options, **kwargs)
+    want = lambda key: keys is None or key in keys
+    cache = sample.activation_cache() if isinstance(sample, representations.Gaussian) else nullcontext()
+    with cache:
+        for j, (extr, intr) in tqdm(enumerate(zip(extrinsics, intrinsics)), desc='Rendering', disable=not verbose):
+            frame = {}
+            if not is_mesh(sample):
+                res = renderer.render(sample, extr, intr, colors_overwrite=colors_overwrite, need_depth=need_depth)
+                if want('color'):
+                    frame['color'] = res['color'].clamp(0, 1) if opt else to_uint8_image(res['color'])
+                if want('depth'):
+                    if 'percent_depth' in res:
+                        frame['depth'] = res['percent_depth'] if opt else res['percent_depth'].detach().cpu().numpy()
+                    elif 'depth' in res:
+                        frame['depth'] = res['depth'] if opt else res['depth'].detach().cpu().numpy()
+                    else:
+                        frame['depth'] = None
             else:
-                rets['depth'].append(None)
-        else:
-            return_types = kwargs.get('return_types', ["color", "normal", "nocs", "depth", "mask"])
-            res = renderer.render(sample, extr, intr, return_types = return_types)
-            if 'normal' not in rets: rets['normal'] = []
-            if 'color' not in rets: rets['color'] = []
-            if 'nocs' not in rets: rets['nocs'] = []
-            if 'depth' not in rets: rets['depth'] = []
-            if 'mask' not in rets: rets['mask'] = []
-            if 'color' in return_types:
-                rets['color'].append(res['color'].clamp(0,1) if opt else \
-                                    np.clip(res['color'].detach().cpu().numpy().transpose(1, 2, 0) * 255, 0, 255).astype(np.uint8))
-            rets['normal'].append(res['normal'].clamp(0,1) if opt else \
-                                  np.clip(res['normal'].detach().cpu().numpy().transpose(1, 2, 0) * 255, 0, 255).astype(np.uint8))
-            rets['nocs'].append(res['nocs'].clamp(0,1) if opt else \
-                                np.clip(res['nocs'].detach().cpu().numpy().transpose(1, 2, 0) * 255, 0, 255).astype(np.uint8))
-            rets['depth'].append(res['depth'] if opt else \
-                                 res['depth'].detach().cpu().numpy())
-            rets['mask'].append(res['mask'].detach().cpu().numpy().astype(np.uint8))
+                return_types = kwargs.get('return_types', ["color", "normal", "nocs", "depth", "mask"])
+                res = renderer.render(sample, extr, intr, return_types = return_types)
+                if 'color' in return_types and want('color'):
+                    frame['color'] = res['color'].clamp(0,1) if opt else to_uint8_image(res['color'])
+                if want('normal'):
+                    frame['normal'] = res['normal'].clamp(0,1) if opt else to_uint8_image(res['normal'])
+                if want('nocs'):
+                    frame['nocs'] = res['nocs'].clamp(0,1) if opt else to_uint8_image(res['nocs'])
+                if want('depth'):
+                    frame['depth'] = res['depth'] if opt else res['depth'].detach().cpu().numpy()
+                if want('mask'):
+                    frame['mask'] = res['mask'].detach().cpu().numpy().astype(np.uint8)
+            yield frame
+
+
+def render_frames(sample, extrinsics, intrinsics, options={}, colors_overwrite=None, verbose=True, need_depth=False, opt=False, **kwargs):
+    if is_mesh(sample):
+        rets = {'normal': [], 'color': [], 'nocs': [], 'depth': [], 'mask': []}
+    else:
+        rets = {'color': [], 'depth': []}
+    for frame in iter_frames(sample, extrinsics, intrinsics, options, colors_overwrite=colors_overwrite, verbose=verbose, need_depth=need_depth, opt=opt, **kwargs):
+        for key, value in frame.items():
+            rets[key].append(value)
     return rets
 
 def render_orth_frames(sample, extrinsics, projections, options={}, colors_overwrite=None, verbose=True, **kwargs):
     # Select renderer according to sample type
-    if isinstance(sample, MeshExtractResult):
+    if is_mesh(sample):
+        from ..renderers import MeshRenderer
         renderer = MeshRenderer()
         renderer.rendering_options.resolution = options.get('resolution', 1024)
         renderer.rendering_options.ssaa = options.get('ssaa', 4)
@@ -221,8 +256,7 @@ def render_multiview(sample, resolution=518, ssaa=4, bg_color=(0, 0, 0), num_fra
     res = render_frames(sample, extrinsics, intrinsics, {'resolution': resolution, 'bg_color': bg_color, 'ssaa': ssaa}, **kwargs)
     return res['color'] if only_color else res, extrinsics, intrinsics
 
-def render_video(sample, resolution=512, ssaa=4, bg_color=(0, 0, 0), num_frames=300, r=2, fov=40, 
-                 inverse_direction=False, pitch=-1, **kwargs):
+def turntable_cameras(num_frames=300, r=2, fov=40, inverse_direction=False, pitch=-1):
     if inverse_direction:
         yaws = torch.linspace(3.1415, -3.1415, num_frames)
         # pitch = 0.25 + 0.5 * torch.sin(torch.linspace(2 * 3.1415, 0, num_frames))
@@ -234,12 +268,27 @@ def render_video(sample, resolution=512, ssaa=4, bg_color=(0, 0, 0), num_frames=
         pitch = 0.25 + 0.5 * torch.sin(torch.linspace(0, 2 * 3.1415, num_frames))
     yaws = yaws.tolist()
     pitch = pitch.tolist()
-    extrinsics, intrinsics = yaw_pitch_r_fov_to_extrinsics_intrinsics(yaws, pitch, r, fov)
+    return yaw_pitch_r_fov_to_extrinsics_intrinsics(yaws, pitch, r, fov)
+
+def render_video(sample, resolution=512, ssaa=4, bg_color=(0, 0, 0), num_frames=300, r=2, fov=40, 
+                 inverse_direction=False, pitch=-1, **kwargs):
+    extrinsics, intrinsics = turntable_cameras(num_frames, r, fov, inverse_direction, pitch)
     
     res = render_frames(sample, extrinsics, intrinsics, {'resolution': resolution, 'bg_color': bg_color, 'ssaa': ssaa}, **kwargs)
     res.update({'extrinsics': extrinsics, 'intrinsics': intrinsics})
     return res
 
+def render_video_stream(sample, resolution=512, ssaa=4, bg_color=(0, 0, 0), num_frames=300, r=2, fov=40,
+                        inverse_direction=False, pitch=-1, key='color', **kwargs):
+    """
+    Same camera path as `render_video`, but yields the `key` frames one by one instead of
+    materializing all of them. Feed it to `video_utils.save_video_stream` to overlap
+    rendering with encoding.
+    """
+    extrinsics, intrinsics = turntable_cameras(num_frames, r, fov, inverse_direction, pitch)
+    for frame in iter_frames(sample, extrinsics, intrinsics, {'resolution': resolution, 'bg_color': bg_color, 'ssaa': ssaa}, keys=[key], **kwargs):
+        yield frame[key]
+
 def render_condition_images(sample, resolution=512, ssaa=4, bg_color=(0, 0, 0), num_frames=300, r=2, fov=40, **kwargs):
     yaws = []
     pitchs = []
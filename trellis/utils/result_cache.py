@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import *
+
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 22) -> str:
+    """
+    SHA-256 of a file's content. Memoized per (path, mtime, size) so large checkpoints are hashed once per process.
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def cache_key(**parts) -> str:
+    """
+    Content-addressed key: SHA-256 of the canonical JSON of `parts` (file digests, parameters, ...).
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """
+    Hard-link a cached artifact to `dst`, copying if linking is not possible.
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of reconstruction artifacts on local disk.
+
+    Each entry is a directory `<root>/<key>/` holding the artifact files and a `meta.json`.
+    The directory mtime records the last access, and the least recently used entries are evicted
+    once the total size exceeds `max_bytes`.
+
+    Args:
+        root: cache directory.
+        max_bytes: maximum total size of all entries.
+    """
+    META_FILE = 'meta.json'
+
+    def __init__(self, root: str, max_bytes: int = 20 * 1024**3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry.
+
+        The returned paths can be evicted by a concurrent `put`; use `checkout` to copy the
+        artifacts out safely.
+
+        Returns:
+            None on a miss, otherwise the entry metadata with `artifacts` mapping names to file paths.
+        """
+        with self._lock:
+            return self._get_locked(key)
+
+    def checkout(self, key: str, destinations: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry and hard-link (or copy) its artifacts to `destinations` (name -> path)
+        under the cache lock, so eviction cannot remove them in between.
+
+        Returns:
+            None on a miss (nothing is written), otherwise the entry metadata with `artifacts`
+            mapping names to the destination paths.
+        """
+        with self._lock:
+            meta = self._get_locked(key)
+            if meta is None:
+                return None
+            for name, dst_path in destinations.items():
+                link_or_copy(meta['artifacts'][name], dst_path)
+        meta['artifacts'] = dict(meta['artifacts'], **destinations)
+        return meta
+
+    def _get_locked(self, key: str) -> Optional[Dict[str, Any]]:
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, self.META_FILE), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        artifacts = {name: os.path.join(entry_dir, filename) for name, filename in meta['artifacts'].items()}
+        if not all(os.path.exists(p) for p in artifacts.values()):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        os.utime(entry_dir)
+        meta['artifacts'] = artifacts
+        return meta
+
+    def put(self, key: str, artifacts: Dict[str, str], meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Store artifact files (name -> source path) under `key`, then evict old entries beyond `max_bytes`.
+
+        Returns:
+            The stored entry, as returned by `get`.
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            files = {}
+            for name, src_path in artifacts.items():
+                filename = os.path.basename(src_path)
+                shutil.copyfile(src_path, os.path.join(tmp_dir, filename))
+                files[name] = filename
+            meta = dict(meta or {}, key=key, created=time.time(), artifacts=files)
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w') as f:
+                json.dump(meta, f, indent=2)
+            with self._lock:
+                if os.path.exists(entry_dir):
+                    shutil.rmtree(entry_dir)
+                os.replace(tmp_dir, entry_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict(keep=key)
+        return self.get(key)
+
+    def entries(self) -> List[Tuple[str, float, int]]:
+        """(key, last access, size in bytes) of every entry."""
+        ret = []
+        for key in os.listdir(self.root):
+            entry_dir = self._entry_dir(key)
+            if key.endswith('.tmp') or not os.path.isdir(entry_dir):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(entry_dir) if e.is_file())
+            ret.append((key, os.stat(entry_dir).st_mtime, size))
+        return ret
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Remove least recently used entries until the cache fits in `max_bytes`. Returns the evicted keys."""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda e: e[1])
+            total = sum(e[2] for e in entries)
+            evicted = []
+            for key, _, size in entries:
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                total -= size
+                evicted.append(key)
+        return evicted
@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+from typing import *
+
+import numpy as np
+import torch
+
+
+# Bump when the on-disk layout changes; older entries are reconverted
+STORE_VERSION = 1
+DEFAULT_STORE_DIR = os.environ.get(
+    'SCENE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'tmp', 'scene_store'),
+)
+
+
+def _source_signature(path: str) -> Dict[str, Any]:
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def convert_npz(npz_file: str, out_dir: str) -> str:
+    """
+    Convert a scene feature `.npz` (`patchtokens`, `indices`) into an uncompressed store entry:
+
+        <out_dir>/feats.npy   float32 [N, C]
+        <out_dir>/coords.npy  int32 [N, 4], batch column (0) already prepended
+        <out_dir>/meta.json   shapes, version and the source file signature
+
+    `.npy` headers are padded to 64 bytes, so the arrays are aligned for memory mapping.
+    The entry is written to a temporary directory and renamed into place.
+    """
+    data = np.load(npz_file)
+    feats = np.ascontiguousarray(data['patchtokens'], dtype=np.float32)
+    indices = data['indices']
+    coords = np.empty((indices.shape[0], indices.shape[1] + 1), dtype=np.int32)
+    coords[:, 0] = 0
+    coords[:, 1:] = indices
+
+    tmp_dir = f"{out_dir}.tmp.{os.getpid()}.{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'feats.npy'), feats)
+    np.save(os.path.join(tmp_dir, 'coords.npy'), coords)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'version': STORE_VERSION,
+            'num_voxels': int(feats.shape[0]),
+            'channels': int(feats.shape[1]),
+            'source': _source_signature(npz_file),
+        }, f)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+class SceneFeatureStore:
+    """
+    Scene features as memory-mapped `.npy` arrays, with an LRU of recently used scenes.
+
+    `get` returns a CPU SparseTensor whose feats and coords are `torch.from_numpy` views of
+    copy-on-write memmaps: nothing is decompressed or copied until the tensor is moved to
+    the GPU. The LRU holds the memmaps; each call builds a fresh SparseTensor so requests
+    never share a spatial cache. `.npz` sources are converted on first use (see
+    `convert_npz`) and reconverted when they change.
+
+    Args:
+        root: directory holding one subdirectory per scene.
+        max_scenes: number of scenes kept in the in-process LRU.
+    """
+    def __init__(self, root: str = DEFAULT_STORE_DIR, max_scenes: int = 16):
+        self.root = root
+        self.max_scenes = max_scenes
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._convert_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def entry_dir(self, npz_file: str) -> str:
+        """`<root>/<name>-<hash of the absolute path>`: files of the same name never share an entry."""
+        path = os.path.abspath(npz_file)
+        digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.root, f"{os.path.splitext(os.path.basename(path))[0]}-{digest}")
+
+    def _entry_lock(self, entry_dir: str) -> threading.Lock:
+        with self._lock:
+            return self._convert_locks.setdefault(entry_dir, threading.Lock())
+
+    def _is_current(self, entry_dir: str, npz_file: str) -> bool:
+        try:
+            with open(os.path.join(entry_dir, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get('version') == STORE_VERSION and meta.get('source') == _source_signature(npz_file)
+
+    def convert(self, npz_file: str, force: bool = False) -> str:
+        """Make sure the store entry for `npz_file` exists and is current. Returns its directory."""
+        entry_dir = self.entry_dir(npz_file)
+        with self._entry_lock(entry_dir):
+            if force or not self._is_current(entry_dir, npz_file):
+                convert_npz(npz_file, entry_dir)
+        return entry_dir
+
+    def get(self, npz_file: str) -> 'sp.SparseTensor':
+        """Load a scene as a single-scene SparseTensor (batch index 0) on the CPU."""
+        from ..modules import sparse as sp
+
+        feats, coords = self.arrays(npz_file)
+        return sp.SparseTensor(feats=torch.from_numpy(feats), coords=torch.from_numpy(coords))
+
+    def arrays(self, npz_file: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-mapped `(feats, coords)` of a scene, from the LRU when possible."""
+        key = os.path.abspath(npz_file)
+        signature = _source_signature(npz_file)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == signature:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[1], cached[2]
+            self.misses += 1
+
+        entry_dir = self.entry_dir(npz_file)
+        # Convert and map under the entry lock, so no other thread replaces the entry in between;
+        # the arrays are cached under the signature recorded with them
+        with self._entry_lock(entry_dir):
+            if not self._is_current(entry_dir, npz_file):
+                convert_npz(npz_file, entry_dir)
+            with open(os.path.join(entry_dir, 'meta.json'), 'r') as f:
+                signature = json.load(f)['source']
+            # mmap_mode='c' gives writable copy-on-write views, so torch.from_numpy does not warn or copy
+            feats = np.load(os.path.join(entry_dir, 'feats.npy'), mmap_mode='c')
+            coords = np.load(os.path.join(entry_dir, 'coords.npy'), mmap_mode='c')
+
+        with self._lock:
+            self._cache[key] = (signature, feats, coords)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_scenes:
+                self._cache.popitem(last=False)
+        return feats, coords
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'scenes': len(self._cache), 'max_scenes': self.max_scenes, 'hits': self.hits, 'misses': self.misses}
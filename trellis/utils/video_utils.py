@@ -0,0 +1,96 @@
+import queue
+import threading
+from typing import *
+
+import numpy as np
+
+
+class VideoStreamWriter:
+    """
+    Incremental video writer that encodes frames on a background thread.
+
+    Frames are handed over through a bounded queue, so rendering and encoding overlap while
+    at most `queue_size` frames are held in memory. `write` blocks when the encoder falls
+    behind. Errors raised by the encoder are re-raised on the next `write` or on `close`.
+
+    Args:
+        path: output video file.
+        fps: frame rate.
+        queue_size: maximum number of frames waiting to be encoded.
+        **writer_kwargs: forwarded to `imageio.get_writer`.
+    """
+    _STOP = object()
+
+    def __init__(self, path: str, fps: int = 15, queue_size: int = 4, **writer_kwargs):
+        import imageio
+        self.path = path
+        self.num_frames = 0
+        self._writer = imageio.get_writer(path, fps=fps, **writer_kwargs)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='video-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is self._STOP:
+                    break
+                self._writer.append_data(frame)
+        except BaseException as e:
+            self._error = e
+            # Keep draining so a blocked producer can observe the error
+            while self._queue.get() is not self._STOP:
+                pass
+        finally:
+            try:
+                self._writer.close()
+            except BaseException as e:
+                self._error = self._error or e
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"Video encoding failed for {self.path}") from self._error
+
+    def write(self, frame: np.ndarray) -> None:
+        assert not self._closed, "write() after close()"
+        self._check()
+        self._queue.put(frame)
+        self.num_frames += 1
+
+    def close(self) -> None:
+        """
+        Flush the queued frames and finalize the file.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Finalize the file but let the original exception propagate
+            self._closed = True
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+
+def save_video_stream(frames: Iterable[np.ndarray], path: str, fps: int = 15, queue_size: int = 4, **writer_kwargs) -> int:
+    """
+    Encode frames from an iterable (e.g. a render generator) into a video as they arrive.
+
+    Returns:
+        the number of frames written.
+    """
+    with VideoStreamWriter(path, fps=fps, queue_size=queue_size, **writer_kwargs) as writer:
+        for frame in frames:
+            writer.write(frame)
+    return writer.num_frames